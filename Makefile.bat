@@ -8,7 +8,7 @@ if not defined PYTHON set "PYTHON=python"
 
 if "%~1"=="" (
     echo Usage: %~nx0 ^<target^>
-    echo Targets: setup import clean test bench
+    echo Targets: setup import clean test bench bench-suite bench-startup
     exit /b 1
 )
 
@@ -19,16 +19,25 @@ if /I "%TARGET%"=="import" goto import
 if /I "%TARGET%"=="clean" goto clean
 if /I "%TARGET%"=="test" goto test
 if /I "%TARGET%"=="bench" goto bench
+if /I "%TARGET%"=="bench-suite" goto bench_suite
+if /I "%TARGET%"=="bench-startup" goto bench_startup
 
 goto usage
 
 :usage
 echo Unknown target: %TARGET%
-echo Available targets: setup import clean test bench
+echo Available targets: setup import clean test bench bench-suite bench-startup
 exit /b 1
 
 :setup
-call :ensure_raw_dir
+call :bench_startup
+setlocal
+set "PYTHONPATH=src"
+"%PYTHON%" benchmarks/benchmark_startup.py
+set "exitcode=%errorlevel%"
+endlocal & exit /b %exitcode%
+
+:ensure_raw_dir
 if errorlevel 1 exit /b %errorlevel%
 call :expand_zip
 exit /b %errorlevel%
@@ -63,6 +72,14 @@ set "PYTHONPATH=src"
 set "exitcode=%errorlevel%"
 endlocal & exit /b %exitcode%
 
+:bench_suite
+setlocal
+set "PYTHONPATH=src"
+if not defined BENCH_JSON set "BENCH_JSON=bench.json"
+"%PYTHON%" benchmarks/benchmark_suite.py --json "%BENCH_JSON%"
+set "exitcode=%errorlevel%"
+endlocal & exit /b %exitcode%
+
 :ensure_raw_dir
 if not exist "%RAW_DIR%" mkdir "%RAW_DIR%"
 exit /b %errorlevel%
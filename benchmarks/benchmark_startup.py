@@ -0,0 +1,148 @@
+"""Measure cold CLI startup: a single-number lookup against bare interpreter startup.
+
+Every sample runs in a fresh interpreter.  The report also lists the slowest
+imports of ``phone_lookup.cli`` (from ``python -X importtime``) and any heavy
+module that a plain ``lookup`` run should never load.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import phone_lookup
+from phone_lookup.store import PhoneLookupStore
+
+# Modules that only other subcommands (or a colour terminal) need.
+FORBIDDEN_MODULES = (
+    "phone_lookup.importer",
+    "phone_lookup.delta",
+    "phone_lookup.parallel",
+    "phone_lookup.server",
+    "phone_lookup.daemon",
+    "asyncio",
+    "csv",
+    "multiprocessing",
+    "concurrent.futures",
+    "termcolor",
+    "colorama",
+    "dataclasses",
+)
+
+PROBE = """
+import sys
+from phone_lookup import cli
+sys.argv = ["phone-lookup", *sys.argv[1:]]
+try:
+    cli.run()
+except SystemExit:
+    pass
+print("\\t".join(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    src = str(Path(phone_lookup.__file__).resolve().parent.parent)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (src, env.get("PYTHONPATH"))))
+    return env
+
+
+def wall_times(command: Sequence[str], samples: int, env: Dict[str, str]) -> List[float]:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def import_breakdown(env: Dict[str, str], top: int) -> List[Dict[str, object]]:
+    """Slowest modules imported by ``phone_lookup.cli``, by cumulative microseconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import phone_lookup.cli"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            }
+        )
+    rows.sort(key=lambda row: row["cumulative_us"], reverse=True)
+    return rows[:top]
+
+
+def loaded_modules(lookup_args: Sequence[str], env: Dict[str, str]) -> List[str]:
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, *lookup_args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return proc.stderr.strip().splitlines()[-1].split("\t")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cold CLI startup for a single-number lookup")
+    parser.add_argument("--samples", type=int, default=20, help="Fresh interpreters to time per command")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    env = environment()
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "store"
+        with PhoneLookupStore.open(database) as store:
+            store.bulk_put([("npanxx:415555:1", {"OCN": "1234", "LTYPE": "C"}), ("ocn:1234", {"CommonName": "Carrier"})])
+        numbers = Path(tmp) / "numbers.txt"
+        numbers.write_text("4155551234\n", encoding="utf-8")
+        lookup_args = ["lookup", "--database-path", str(database), "--file", str(numbers), "--output", "-", "--quiet"]
+
+        bare = wall_times([sys.executable, "-c", "pass"], args.samples, env)
+        lookup = wall_times([sys.executable, "-m", "phone_lookup.cli", *lookup_args], args.samples, env)
+        modules = set(loaded_modules(lookup_args, env))
+
+    report = {
+        "samples": args.samples,
+        "bare_interpreter_ms": round(statistics.median(bare) * 1e3, 2),
+        "single_lookup_ms": round(statistics.median(lookup) * 1e3, 2),
+        "forbidden_loaded": [name for name in FORBIDDEN_MODULES if name in modules],
+        "imports": import_breakdown(env, args.top),
+    }
+    report["overhead_ms"] = round(report["single_lookup_ms"] - report["bare_interpreter_ms"], 2)
+
+    print(f"bare interpreter:      {report['bare_interpreter_ms']:8.2f} ms (median of {args.samples})")
+    print(f"single-number lookup:  {report['single_lookup_ms']:8.2f} ms (+{report['overhead_ms']:.2f} ms)")
+    print(f"forbidden modules:     {', '.join(report['forbidden_loaded']) or 'none'}")
+    print("slowest imports of phone_lookup.cli (cumulative / self, us):")
+    for row in report["imports"]:
+        print(f"  {row['cumulative_us']:>8} {row['self_us']:>8}  {'  ' * row['depth']}{row['module']}")
+
+    if args.json_path == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
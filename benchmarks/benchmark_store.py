@@ -8,6 +8,8 @@ import tempfile
 import time
 from pathlib import Path
 
+from phone_lookup.backends import BACKENDS
+from phone_lookup.codec import NPANXX_SCHEMA, decode_record, encode_json, encode_record
 from phone_lookup.store import PhoneLookupStore
 
 
@@ -22,7 +24,7 @@ def random_mapping(index: int) -> dict[str, str]:
 
 def generate_items(count: int) -> list[tuple[str, dict[str, str]]]:
     return [
-        (f"npanxx:{i:03d}{(i + 1) % 1000:03d}:{i % 10}", random_mapping(i))
+        (f"npanxx:{i // 10 % 1_000_000:06d}:{i % 10}", random_mapping(i))
         for i in range(count)
     ]
 
@@ -33,30 +35,71 @@ def bulk_insert(store: PhoneLookupStore, items: list[tuple[str, dict[str, str]]]
     return time.perf_counter() - start
 
 
-def random_reads(store: PhoneLookupStore, keys: list[str], samples: int) -> float:
+def random_reads(store: PhoneLookupStore, keys: list[str]) -> float:
     start = time.perf_counter()
-    for _ in range(samples):
-        key = random.choice(keys)
+    for key in keys:
         store.get_mapping(key)
     return time.perf_counter() - start
 
 
-def run_benchmark(count: int, batch_size: int, samples: int, db_path: Path | None) -> None:
+def batched_reads(store: PhoneLookupStore, keys: list[str], chunk_size: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(keys), chunk_size):
+        store.get_many(keys[offset : offset + chunk_size])
+    return time.perf_counter() - start
+
+
+def codec_comparison(items: list[tuple[str, dict[str, str]]]) -> tuple[float, float, float, float]:
+    """Return average JSON/binary record sizes and lookup-field decode times."""
+    json_values = [encode_json(mapping) for _, mapping in items]
+    binary_values = [encode_record(mapping, NPANXX_SCHEMA) for _, mapping in items]
+    fields = ("LTYPE", "OCN")
+
+    start = time.perf_counter()
+    for raw in json_values:
+        decode_record(raw, fields)
+    json_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for raw in binary_values:
+        decode_record(raw, fields)
+    binary_time = time.perf_counter() - start
+
+    json_size = sum(map(len, json_values)) / len(items)
+    binary_size = sum(map(len, binary_values)) / len(items)
+    return json_size, binary_size, json_time, binary_time
+
+
+def run_benchmark(
+    count: int,
+    batch_size: int,
+    samples: int,
+    chunk_size: int,
+    db_path: Path | None,
+    backend: str | None = None,
+) -> None:
     temp_dir: tempfile.TemporaryDirectory[str] | None = None
     if db_path is None:
         temp_dir = tempfile.TemporaryDirectory()
         db_path = Path(temp_dir.name) / "bench-db"
 
-    store = PhoneLookupStore.open(db_path)
+    store = PhoneLookupStore.open(db_path, backend=backend)
     try:
         items = generate_items(count)
         insert_time = bulk_insert(store, items, batch_size)
-        read_time = random_reads(store, [key for key, _ in items], samples)
+        sample_keys = random.choices([key for key, _ in items], k=samples)
+        read_time = random_reads(store, sample_keys)
+        batched_time = batched_reads(store, sample_keys, chunk_size)
+        speedup = read_time / batched_time if batched_time else float("inf")
+        json_size, binary_size, json_decode, binary_decode = codec_comparison(items)
 
-        print("Benchmark results")
+        print(f"Benchmark results ({store.backend} backend)")
         print("-----------------")
         print(f"Bulk insert of {count} records (batch_size={batch_size}): {insert_time:.3f}s")
         print(f"Random reads ({samples} samples): {read_time:.3f}s")
+        print(f"Batched reads ({samples} samples, chunk_size={chunk_size}): {batched_time:.3f}s ({speedup:.1f}x faster)")
+        print(f"Record size: {json_size:.0f} bytes as JSON, {binary_size:.0f} bytes binary")
+        print(f"Decode LTYPE/OCN of {count} records: {json_decode:.3f}s JSON, {binary_decode:.3f}s binary")
     finally:
         store.close()
         if temp_dir is not None:
@@ -68,13 +111,15 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--count", type=int, default=10000, help="Number of records to insert")
     parser.add_argument("--batch-size", type=int, default=1000, help="Batch size for bulk inserts")
     parser.add_argument("--samples", type=int, default=5000, help="Number of random reads to perform")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Keys fetched per read transaction in batched reads")
     parser.add_argument("--db-path", type=Path, default=None, help="Optional path to reuse an existing LMDB directory")
+    parser.add_argument("--backend", choices=BACKENDS, default=None, help="Storage backend for a new store (default: lmdb if installed)")
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    run_benchmark(args.count, args.batch_size, args.samples, args.db_path)
+    run_benchmark(args.count, args.batch_size, args.samples, args.chunk_size, args.db_path, args.backend)
 
 
 if __name__ == "__main__":
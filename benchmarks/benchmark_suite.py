@@ -0,0 +1,456 @@
+"""End-to-end benchmark suite: import, lookups, carrier resolution, scaling and the CLI.
+
+Every scenario runs against a seeded synthetic dataset (see ``synthetic_data``)
+and reports throughput plus latency percentiles.  ``--json`` writes the same
+results in a machine-readable form for comparing releases::
+
+    PYTHONPATH=src python benchmarks/benchmark_suite.py --json bench.json
+    PYTHONPATH=src python benchmarks/benchmark_suite.py --scenarios lookup,workers --workers 1,2,4
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from itertools import repeat
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from synthetic_data import Dataset, generate_dataset, generate_numbers
+
+from phone_lookup.backends import default_backend
+from phone_lookup.engines import create_engine
+from phone_lookup.formats import RECORD_FIELDS, ParquetSink, create_formatter, parquet_available, parse_fields
+from phone_lookup.importer import fast_import_all, import_all, import_generation
+from phone_lookup.keys import OCN_TABLE, unpack_ocn
+from phone_lookup.lookup import chunked, lookup_many, normalize_number, run_deduplicated, run_lookup, run_record_lookup
+from phone_lookup.memo import LookupMemo
+from phone_lookup.parallel import ParallelLookup
+from phone_lookup.snapshot import write_snapshot
+from phone_lookup.store import PhoneLookupStore
+
+SCENARIOS = (
+    "normalize",
+    "import",
+    "lookup",
+    "hit-ratio",
+    "memo",
+    "locality",
+    "carriers",
+    "formats",
+    "engines",
+    "threads",
+    "workers",
+    "cli",
+)
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+@dataclass
+class Result:
+    scenario: str
+    name: str
+    items: int
+    seconds: float
+    params: Dict[str, object] = field(default_factory=dict)
+    # Per-item latency in microseconds, derived from individually timed operations.
+    latency_us: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else float("inf")
+
+    def as_json(self) -> Dict[str, object]:
+        data = asdict(self)
+        data["throughput"] = round(self.throughput, 1)
+        data["seconds"] = round(self.seconds, 6)
+        return data
+
+
+def latency_summary(samples_us: List[float]) -> Dict[str, float]:
+    samples_us.sort()
+    summary = {f"p{pct}": round(percentile(samples_us, pct), 3) for pct in PERCENTILES}
+    summary["max"] = round(samples_us[-1], 3) if samples_us else 0.0
+    return summary
+
+
+def timed_chunks(numbers: List[str], chunk_size: int, resolve: Callable[[List[str]], object]) -> tuple[float, Dict[str, float]]:
+    """Resolve ``numbers`` chunk by chunk; latency is per number within each chunk."""
+    samples: List[float] = []
+    total = 0.0
+    for chunk in chunked(numbers, chunk_size):
+        start = time.perf_counter()
+        resolve(chunk)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        samples.append(elapsed / len(chunk) * 1e6)
+    return total, latency_summary(samples)
+
+
+def evict_page_cache(directory: Path) -> bool:
+    """Drop the cached pages of the store files in ``directory``; ``False`` where the OS cannot."""
+    advise = getattr(os, "posix_fadvise", None)
+    if advise is None:
+        return False
+    for path in [*directory.glob("*.mdb"), *directory.glob("data.sqlite*")]:
+        with path.open("rb") as handle:
+            os.fsync(handle.fileno())
+            advise(handle.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return True
+
+
+def single_latencies(numbers: List[str], resolve: Callable[[List[str]], object]) -> tuple[float, Dict[str, float]]:
+    samples: List[float] = []
+    for number in numbers:
+        start = time.perf_counter()
+        resolve([number])
+        samples.append((time.perf_counter() - start) * 1e6)
+    return sum(samples) / 1e6, latency_summary(samples)
+
+
+class Suite:
+    def __init__(self, args: argparse.Namespace, workdir: Path):
+        self.args = args
+        self.workdir = workdir
+        self.results: List[Result] = []
+        started = time.perf_counter()
+        self.dataset: Dataset = generate_dataset(
+            workdir / "feeds",
+            exchanges=args.exchanges,
+            ocns=args.ocns,
+            fallback_ratio=args.fallback_ratio,
+            seed=args.seed,
+        )
+        self.numbers, self.expected_hits = generate_numbers(
+            self.dataset, args.count, hit_ratio=args.hit_ratio, seed=args.seed
+        )
+        print(
+            f"Dataset: {self.dataset.npanxx_rows} NPANXX rows, {self.dataset.ocn_rows} OCN rows, "
+            f"{len(self.numbers)} numbers (generated in {time.perf_counter() - started:.2f}s)"
+        )
+        self.store_root = workdir / "store"
+        self.snapshot_path = workdir / "lookup.snapshot"
+        import_generation(self.store_root, self.dataset.npanxx_path, self.dataset.ocn_path, fast=True, workers=args.import_workers)
+
+    def record(self, result: Result) -> None:
+        self.results.append(result)
+        latency = " ".join(f"{name}={value:.1f}us" for name, value in result.latency_us.items())
+        print(
+            f"  {result.scenario:<10} {result.name:<28} {result.items:>9} items {result.seconds:>8.3f}s "
+            f"{result.throughput:>12,.0f}/s  {latency}"
+        )
+
+    def open_store(self) -> PhoneLookupStore:
+        return PhoneLookupStore.open(self.store_root, readonly=True)
+
+    def normalize(self) -> None:
+        start = time.perf_counter()
+        for number in self.numbers:
+            normalize_number(number)
+        self.record(Result("normalize", "normalize_number", len(self.numbers), time.perf_counter() - start))
+
+    def import_(self) -> None:
+        npanxx, ocn = self.dataset.npanxx_path, self.dataset.ocn_path
+        rows = self.dataset.npanxx_rows + self.dataset.ocn_rows
+        runs: Dict[str, Callable[[Path], object]] = {
+            "import_all": lambda path: self._into_store(path, lambda store: import_all(store, npanxx, ocn)),
+            "fast_import_all": lambda path: self._into_store(
+                path, lambda store: fast_import_all(store, npanxx, ocn, workers=self.args.import_workers)
+            ),
+            "import_generation(fast)": lambda path: import_generation(
+                path, npanxx, ocn, fast=True, workers=self.args.import_workers
+            ),
+        }
+        for index, (name, run) in enumerate(runs.items()):
+            start = time.perf_counter()
+            run(self.workdir / f"import-{index}")
+            params = {} if name == "import_all" else {"workers": self.args.import_workers}
+            self.record(Result("import", name, rows, time.perf_counter() - start, params))
+
+    @staticmethod
+    def _into_store(path: Path, load: Callable[[PhoneLookupStore], object]) -> None:
+        with PhoneLookupStore.open(path) as store:
+            load(store)
+
+    def lookup(self) -> None:
+        chunk_size = self.args.chunk_size
+        with self.open_store() as store:
+            # Cold: a freshly opened environment with an empty carrier cache.
+            seconds, latency = timed_chunks(self.numbers, chunk_size, lambda chunk: list(run_lookup(store, chunk)))
+            self.record(Result("lookup", "run_lookup (cold)", len(self.numbers), seconds, {"chunk_size": chunk_size}, latency))
+            seconds, latency = timed_chunks(self.numbers, chunk_size, lambda chunk: list(run_lookup(store, chunk)))
+            self.record(Result("lookup", "run_lookup (warm)", len(self.numbers), seconds, {"chunk_size": chunk_size}, latency))
+            found = sum(result.found for result in run_lookup(store, self.numbers, chunk_size=chunk_size))
+            if found != self.expected_hits:
+                raise SystemExit(f"Expected {self.expected_hits} hits, resolved {found}")
+            sample = self.numbers[: self.args.samples]
+            digits = [normalize_number(number) or "0000000000" for number in sample]
+            seconds, latency = single_latencies(digits, lambda batch: lookup_many(store, batch))
+            self.record(Result("lookup", "lookup_many (1 per txn)", len(digits), seconds, {}, latency))
+
+    def hit_ratio(self) -> None:
+        with self.open_store() as store:
+            store.preload_carriers()
+            for ratio in self.args.hit_ratios:
+                numbers, _ = generate_numbers(self.dataset, self.args.count, hit_ratio=ratio, seed=self.args.seed)
+                seconds, latency = timed_chunks(
+                    numbers, self.args.chunk_size, lambda chunk: list(run_lookup(store, chunk))
+                )
+                self.record(Result("hit-ratio", f"hit_ratio={ratio:g}", len(numbers), seconds, {"hit_ratio": ratio}, latency))
+
+    def memo(self) -> None:
+        """Plain, prefix-memoized and deduplicated lookups, on the generated numbers and on a job with hot repeats."""
+        rng = random.Random(self.args.seed)
+        hot = self.numbers[: max(1, len(self.numbers) // 100)]
+        repeated = [rng.choice(hot) if rng.random() < 0.7 else number for number in self.numbers]
+        chunk_size = self.args.chunk_size
+        with self.open_store() as store:
+            store.preload_carriers()
+            for label, numbers in (("generated", self.numbers), ("70% repeats", repeated)):
+                runs: Dict[str, Callable[[], object]] = {
+                    "plain": lambda: list(run_lookup(store, numbers, chunk_size=chunk_size)),
+                    "prefix memo": lambda: list(run_lookup(store, numbers, chunk_size=chunk_size, memo=LookupMemo())),
+                }
+                exact = LookupMemo(exact=True)
+                runs["dedup"] = lambda: list(
+                    run_deduplicated(
+                        lambda batch: run_lookup(store, batch, chunk_size=chunk_size, memo=exact),
+                        numbers,
+                        memo=exact,
+                        chunk_size=chunk_size,
+                    )
+                )
+                for name, run in runs.items():
+                    start = time.perf_counter()
+                    run()
+                    self.record(Result("memo", f"{name} ({label})", len(numbers), time.perf_counter() - start, {"input": label}))
+
+    def locality(self) -> None:
+        """Input-order gets against sorted-key cursor scans, on a cold page cache and a fresh mmap, then warm."""
+        chunk_size = self.args.chunk_size
+        for label in ("cold", "warm"):
+            for name, sort_keys in (("input order", False), ("sorted keys", True)):
+                with self.open_store() as store:
+                    evicted = label == "cold" and evict_page_cache(store.path)  # type: ignore[arg-type]
+                    if label == "cold" and not evicted:
+                        print("  locality   page cache eviction unavailable; cold runs only use a fresh mmap")
+                    seconds, latency = timed_chunks(
+                        self.numbers,
+                        chunk_size,
+                        lambda chunk: list(run_lookup(store, chunk, chunk_size=chunk_size, sort_keys=sort_keys)),
+                    )
+                params = {"chunk_size": chunk_size, "sort_keys": sort_keys, "page_cache_evicted": evicted}
+                self.record(Result("locality", f"{name} ({label})", len(self.numbers), seconds, params, latency))
+
+    def carriers(self) -> None:
+        with self.open_store() as store:
+            codes = [unpack_ocn(key) for key, _ in store.iterate_table(OCN_TABLE, ("CommonName",))]
+            codes += [f"{int(code) + len(codes):04d}" for code in codes[: len(codes) // 10]]  # unknown OCNs
+            for label in ("cold", "warm"):
+                if label == "cold":
+                    store.carriers.clear()
+                samples: List[float] = []
+                for code in codes:
+                    start = time.perf_counter()
+                    store.resolve_carrier(code)
+                    samples.append((time.perf_counter() - start) * 1e6)
+                self.record(
+                    Result("carriers", f"resolve_carrier ({label})", len(codes), sum(samples) / 1e6, {}, latency_summary(samples))
+                )
+
+    def formats(self) -> None:
+        """Lookup plus formatting into memory, for each output format and a few ``--fields`` projections."""
+        cases = [
+            ("line", None),
+            ("csv", None),
+            ("jsonl", None),
+            ("csv", "number,STATE,RC,LATA"),
+            ("jsonl", "number,STATE,RC,LATA"),
+            ("csv", ",".join(("number", "line_type", "carrier", *RECORD_FIELDS))),
+        ]
+        if parquet_available():
+            cases.append(("parquet", "number,STATE,RC,LATA"))
+        with self.open_store() as store:
+            store.preload_carriers()
+            for fmt, spec in cases:
+                selection = parse_fields(spec)
+                format_row = create_formatter(fmt, selection, explicit=spec is not None)
+                sink = ParquetSink(self.workdir / "results.parquet", selection.columns) if fmt == "parquet" else io.StringIO()
+                start = time.perf_counter()
+                if selection.needs_records:
+                    rows = run_record_lookup(
+                        store,
+                        self.numbers,
+                        npanxx_fields=selection.npanxx,
+                        ocn_fields=selection.ocn,
+                        chunk_size=self.args.chunk_size,
+                    )
+                else:
+                    rows = zip(run_lookup(store, self.numbers, chunk_size=self.args.chunk_size), repeat({}))
+                for result, record in rows:
+                    sink.write(format_row(result, record))
+                if isinstance(sink, ParquetSink):
+                    sink.close()
+                seconds = time.perf_counter() - start
+                if spec is None and fmt == "line":
+                    name = "line (number:line_type:carrier)"
+                else:
+                    name = f"{fmt} ({len(selection.columns)} columns{', stored' if selection.needs_records else ''})"
+                self.record(Result("formats", name, len(self.numbers), seconds, {"format": fmt, "fields": spec}))
+
+    def engines(self) -> None:
+        with self.open_store() as store:
+            start = time.perf_counter()
+            engine = create_engine("memory", store)
+            self.record(Result("engines", "memory index build", self.dataset.npanxx_rows, time.perf_counter() - start))
+            with engine:
+                seconds, latency = timed_chunks(
+                    self.numbers, self.args.chunk_size, lambda chunk: list(run_lookup(engine, chunk))
+                )
+                self.record(Result("engines", "run_lookup (memory)", len(self.numbers), seconds, {}, latency))
+            start = time.perf_counter()
+            records, _ = write_snapshot(store, self.snapshot_path)
+            self.record(Result("engines", "mmap snapshot export", records, time.perf_counter() - start))
+        start = time.perf_counter()
+        engine = create_engine("mmap", None, snapshot=self.snapshot_path)
+        self.record(Result("engines", "mmap snapshot open", 1, time.perf_counter() - start))
+        with engine:
+            seconds, latency = timed_chunks(self.numbers, self.args.chunk_size, lambda chunk: list(run_lookup(engine, chunk)))
+            self.record(Result("engines", "run_lookup (mmap)", len(self.numbers), seconds, {}, latency))
+
+    def threads(self) -> None:
+        """Single-number lookups from request threads sharing one store, renewing every read or within a bound."""
+        digits = [normalize_number(number) or "0000000000" for number in self.numbers]
+        for max_staleness in (0.0, self.args.max_staleness):
+            with PhoneLookupStore.open(self.store_root, readonly=True, max_staleness=max_staleness) as store:
+                for threads in self.args.threads:
+                    shares = [digits[index::threads] for index in range(threads)]
+                    samples: List[List[float]] = [[] for _ in range(threads)]
+                    barrier = threading.Barrier(threads + 1)
+
+                    def serve(share: List[str], latencies: List[float]) -> None:
+                        clock = time.perf_counter
+                        barrier.wait()
+                        for number in share:
+                            start = clock()
+                            lookup_many(store, [number])
+                            latencies.append((clock() - start) * 1e6)
+
+                    pool = [threading.Thread(target=serve, args=pair) for pair in zip(shares, samples)]
+                    for thread in pool:
+                        thread.start()
+                    barrier.wait()
+                    start = time.perf_counter()
+                    for thread in pool:
+                        thread.join()
+                    seconds = time.perf_counter() - start
+                    params = {"threads": threads, "max_staleness": max_staleness}
+                    latency = latency_summary([value for share in samples for value in share])
+                    name = f"x{threads} max_staleness={max_staleness:g}"
+                    self.record(Result("threads", name, len(digits), seconds, params, latency))
+
+    def workers(self) -> None:
+        if not self.snapshot_path.exists():
+            with self.open_store() as store:
+                write_snapshot(store, self.snapshot_path)
+        for engine in ("lmdb", "mmap"):
+            for workers in self.args.workers:
+                parallel = ParallelLookup(
+                    self.store_root, workers=workers, chunk_size=self.args.chunk_size, engine=engine, snapshot=self.snapshot_path
+                )
+                start = time.perf_counter()
+                for _ in parallel.run(self.numbers):
+                    pass
+                params = {"workers": workers, "engine": engine}
+                self.record(Result("workers", f"ParallelLookup x{workers} ({engine})", len(self.numbers), time.perf_counter() - start, params))
+
+    def cli(self) -> None:
+        numbers_path = self.workdir / "numbers.txt"
+        numbers_path.write_text("\n".join(self.numbers) + "\n", encoding="utf-8")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(Path(__file__).parents[1] / "src"), os.environ.get("PYTHONPATH")])))
+        for workers in (1, max(self.args.workers)):
+            command = [
+                sys.executable, "-m", "phone_lookup.cli", "lookup",
+                "--database-path", str(self.store_root),
+                "--file", str(numbers_path),
+                "--output", str(self.workdir / "results.txt"),
+                "--quiet", "--workers", str(workers),
+            ]
+            start = time.perf_counter()
+            subprocess.run(command, check=True, env=env, stdout=subprocess.DEVNULL)
+            self.record(Result("cli", f"phone-lookup lookup -w{workers}", len(self.numbers), time.perf_counter() - start, {"workers": workers}))
+
+    def run(self, scenarios: Sequence[str]) -> None:
+        for scenario in scenarios:
+            getattr(self, scenario.replace("-", "_") if scenario != "import" else "import_")()
+
+
+def csv_list(kind: Callable[[str], object]) -> Callable[[str], list]:
+    return lambda value: [kind(item) for item in value.split(",") if item]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark import, lookup and scaling on synthetic data")
+    parser.add_argument("--scenarios", type=csv_list(str), default=list(SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--exchanges", type=int, default=20_000, help="NPA-NXX exchanges in the synthetic feed")
+    parser.add_argument("--ocns", type=int, default=2_000, help="OCN records in the synthetic feed")
+    parser.add_argument("--fallback-ratio", type=float, default=0.4, help="Share of exchanges with an 'A' block record")
+    parser.add_argument("--count", type=int, default=200_000, help="Phone numbers resolved per lookup scenario")
+    parser.add_argument("--hit-ratio", type=float, default=0.9, help="Share of resolvable numbers in the main workload")
+    parser.add_argument("--hit-ratios", type=csv_list(float), default=[1.0, 0.5, 0.0], help="Hit ratios for the hit-ratio scenario")
+    parser.add_argument("--samples", type=int, default=5_000, help="Individually timed lookups for single-number latency")
+    parser.add_argument("--chunk-size", type=int, default=1_000, help="Numbers per read transaction")
+    parser.add_argument("--workers", type=csv_list(int), default=[1, 2, 4], help="Worker counts for the workers scenario")
+    parser.add_argument("--threads", type=csv_list(int), default=[1, 4, 16], help="Reader thread counts for the threads scenario")
+    parser.add_argument("--max-staleness", type=float, default=1.0, help="Snapshot age bound compared with renewing every read")
+    parser.add_argument("--import-workers", type=int, default=os.cpu_count() or 1, help="Parser processes for fast imports")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the dataset and workloads")
+    parser.add_argument("--json", type=Path, default=None, help="Write machine-readable results to this file ('-' for stdout)")
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        suite = Suite(args, Path(tmp))
+        suite.run(args.scenarios)
+    if args.json is None:
+        return
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": default_backend(),
+        "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "results": [result.as_json() for result in suite.results],
+    }
+    text = json.dumps(report, indent=2)
+    if str(args.json) == "-":
+        print(text)
+    else:
+        args.json.write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
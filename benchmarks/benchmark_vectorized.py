@@ -0,0 +1,75 @@
+"""Compare the scalar and NumPy-vectorized lookup paths on a memory index."""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from phone_lookup.lookup import LookupResult, run_lookup
+from phone_lookup.memory_index import MemoryIndex
+from phone_lookup.store import PhoneLookupStore
+from phone_lookup.vectorized import available, run_vectorized_lookup
+
+
+def populate(store: PhoneLookupStore, prefixes: int) -> list[str]:
+    items = []
+    exchanges = random.sample(range(200_000, 1_000_000), prefixes)
+    for index, exchange in enumerate(exchanges):
+        block = "A" if index % 3 == 0 else str(index % 10)
+        ocn = f"{index % 500:04d}"
+        items.append((f"npanxx:{exchange:06d}:{block}", {"OCN": ocn, "LTYPE": random.choice("CSV")}))
+    items.extend((f"ocn:{i:04d}", {"CommonName": f"Carrier {i}"}) for i in range(500))
+    store.bulk_put(items)
+    return [f"{exchange:06d}" for exchange in exchanges]
+
+
+def generate_numbers(prefixes: list[str], count: int) -> list[str]:
+    formats = ("{0}{1:04d}", "1{0}{1:04d}", "({p}) {n}-{1:04d}", "+1 {p}.{n}.{1:04d}")
+    numbers = []
+    for _ in range(count):
+        prefix = random.choice(prefixes)
+        template = random.choice(formats)
+        numbers.append(template.format(prefix, random.randrange(10_000), p=prefix[:3], n=prefix[3:]))
+    numbers[:: max(1, count // 50)] = ["bogus"] * len(numbers[:: max(1, count // 50)])
+    return numbers
+
+
+def timed(label: str, func: Callable[[], list[LookupResult]]) -> tuple[float, list[LookupResult]]:
+    start = time.perf_counter()
+    results = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {elapsed:.3f}s")
+    return elapsed, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs NumPy-vectorized lookups")
+    parser.add_argument("--prefixes", type=int, default=20_000, help="Number of NPANXX records to create")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of phone numbers to resolve")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Vectorized batch size")
+    args = parser.parse_args()
+
+    if not available():
+        raise SystemExit("numpy is not installed; install it with: pip install 'phone-lookup[fast]'")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with PhoneLookupStore.open(Path(tmp)) as store:
+            prefixes = populate(store, args.prefixes)
+            index = MemoryIndex.build(store)
+    numbers = generate_numbers(prefixes, args.count)
+
+    print(f"Resolving {args.count} numbers against {args.prefixes} NPANXX records")
+    scalar_time, scalar = timed("Scalar path", lambda: list(run_lookup(index, numbers, chunk_size=args.chunk_size)))
+    vector_time, vector = timed(
+        "Vectorized path", lambda: list(run_vectorized_lookup(index, numbers, chunk_size=args.chunk_size))
+    )
+    if scalar != vector:
+        raise SystemExit("Vectorized results differ from the scalar path")
+    print(f"Speedup: {scalar_time / vector_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Seedable synthetic NPANXX/OCN feeds and phone numbers for the benchmarks.
+
+Exchanges follow the shape of the real feed: some are pooled into thousands
+blocks (one row per assigned block), some only carry the NPA-NXX wide ``A``
+record and some have both.  A share of NPANXX rows point at OCNs that are
+missing from the OCN feed, and some OCN rows have no ``CommonName``, so every
+branch of carrier resolution is exercised.
+"""
+from __future__ import annotations
+
+import csv
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from phone_lookup.codec import NPANXX_FIELDS, OCN_FIELDS
+
+LINE_TYPES = "SSSCCCVPM"
+NUMBER_FORMATS = ("{0}{1}", "1{0}{1}", "({2}) {3}-{1}", "+1 {2}.{3}.{1}")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    npanxx_path: Path
+    ocn_path: Path
+    npanxx_rows: int
+    ocn_rows: int
+    # NPA-NXX -> block digits that resolve (all ten when the exchange has an ``A`` record).
+    resolvable: Dict[str, str]
+
+
+def _ocn_row(code: str, rng: random.Random) -> Dict[str, str]:
+    company = f"Carrier {code} Communications"
+    return {
+        "OCN": code,
+        "COMPANY": company,
+        "DBA": company.upper() if rng.random() < 0.5 else "",
+        "CommonName": "" if rng.random() < 0.2 else f"Carrier {code}",
+        "TYPE": rng.choice(("ILEC", "CLEC", "WIRELESS", "IPES")),
+        "SMS": rng.choice(("Y", "N")),
+        "Rural": rng.choice(("Y", "N")),
+    }
+
+
+def _npanxx_row(npanxx: str, block: str, ocn: str, rng: random.Random) -> Dict[str, str]:
+    row = {field: "" for field in NPANXX_FIELDS}
+    row.update(
+        NPA=npanxx[:3],
+        NXX=npanxx[3:],
+        BLOCK_ID=block,
+        OCN=ocn,
+        LTYPE=rng.choice(LINE_TYPES),
+        NXXTYPE="EOC",
+        RC=f"RC{rng.randrange(1000):03d}",
+        RCLONG=f"RATE CENTER {rng.randrange(1000):03d}",
+        STATE=rng.choice(("CA", "NY", "TX", "FL", "WA")),
+        COUNTRY="US",
+        LATA=f"{rng.randrange(100, 999)}",
+        SWITCH=f"SW{rng.randrange(10**8):08d}",
+        TBP_IND="N",
+        ADATE="2020-01-01",
+        EFFDATE="2020-01-01",
+    )
+    return row
+
+
+def generate_dataset(
+    directory: Path,
+    *,
+    exchanges: int = 20_000,
+    ocns: int = 2_000,
+    fallback_ratio: float = 0.4,
+    missing_ocn_ratio: float = 0.02,
+    seed: int = 0,
+) -> Dataset:
+    """Write ``npanxx.csv`` and ``ocn.csv`` under ``directory``.
+
+    ``fallback_ratio`` is the share of exchanges with an ``A`` record; half of
+    those also carry a few explicit blocks.  The other exchanges only have
+    explicit blocks, so numbers in their unassigned blocks miss.
+    """
+    if exchanges > 800 * 800:
+        raise ValueError("at most 640000 exchanges can be generated")
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    codes = [f"{index:04d}" for index in range(1, ocns + 1)]
+    prefixes = sorted(
+        f"{value // 800 + 200:03d}{value % 800 + 200:03d}" for value in rng.sample(range(800 * 800), exchanges)
+    )
+
+    resolvable: Dict[str, str] = {}
+    npanxx_path = directory / "npanxx.csv"
+    npanxx_rows = 0
+    with npanxx_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=["NPA", "NXX", "BLOCK_ID", *NPANXX_FIELDS])
+        writer.writeheader()
+        for npanxx in prefixes:
+            fallback = rng.random() < fallback_ratio
+            blocks: List[str] = []
+            if not fallback or rng.random() < 0.5:
+                blocks = sorted(rng.sample("0123456789", rng.randint(1, 10)))
+            if fallback:
+                blocks.append("A")
+            for block in blocks:
+                ocn = f"{ocns + rng.randrange(1, 100):04d}" if rng.random() < missing_ocn_ratio else rng.choice(codes)
+                writer.writerow(_npanxx_row(npanxx, block, ocn, rng))
+                npanxx_rows += 1
+            resolvable[npanxx] = "0123456789" if fallback else "".join(blocks)
+
+    ocn_path = directory / "ocn.csv"
+    with ocn_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=["OCN", *OCN_FIELDS])
+        writer.writeheader()
+        for code in codes:
+            writer.writerow(_ocn_row(code, rng))
+    return Dataset(npanxx_path, ocn_path, npanxx_rows, len(codes), resolvable)
+
+
+def generate_numbers(
+    dataset: Dataset,
+    count: int,
+    *,
+    hit_ratio: float = 0.9,
+    invalid_ratio: float = 0.01,
+    seed: int = 0,
+) -> Tuple[List[str], int]:
+    """Return ``(numbers, expected hits)`` in mixed formatting.
+
+    Misses are split between unknown exchanges and unassigned blocks of known
+    ones; ``invalid_ratio`` of the numbers cannot be normalized at all.
+    """
+    rng = random.Random(seed)
+    prefixes = list(dataset.resolvable)
+    unassigned = [(npanxx, digit) for npanxx, blocks in dataset.resolvable.items() for digit in "0123456789" if digit not in blocks]
+    numbers: List[str] = []
+    hits = 0
+    for _ in range(count):
+        roll = rng.random()
+        if roll < invalid_ratio:
+            numbers.append(f"{rng.randrange(10**6):06d}")
+            continue
+        if roll < invalid_ratio + (1 - invalid_ratio) * hit_ratio:
+            npanxx = rng.choice(prefixes)
+            block = rng.choice(dataset.resolvable[npanxx])
+            hits += 1
+        elif unassigned and rng.random() < 0.5:
+            npanxx, block = rng.choice(unassigned)
+        else:
+            npanxx = f"{rng.randrange(100, 200):03d}{rng.randrange(1000):03d}"  # NPAs below 200 are never generated
+            block = str(rng.randrange(10))
+        line = f"{block}{rng.randrange(1000):03d}"
+        template = rng.choice(NUMBER_FORMATS)
+        numbers.append(template.format(npanxx, line, npanxx[:3], npanxx[3:]))
+    return numbers, hits
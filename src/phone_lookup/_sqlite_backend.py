@@ -0,0 +1,368 @@
+"""Pure-Python storage backend with the subset of py-lmdb's API the store uses, built on :mod:`sqlite3`.
+
+Used where the ``lmdb`` package cannot be installed (see :mod:`phone_lookup.backends`).
+An environment is one ``data.sqlite`` file in WAL mode.  Every named database
+is a ``WITHOUT ROWID`` table keyed by the raw key bytes, so gets and range
+scans are B-tree searches on disk, nothing is loaded up front and a write
+transaction costs O(batch).  Read transactions see a snapshot taken when they
+begin and never block the writer.  Transaction IDs follow LMDB: they grow by
+one with every write transaction that changed something.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+SQLITE_FILE = "data.sqlite"
+# Written by the in-memory shim that earlier releases fell back to; converted on first writable open.
+LEGACY_STUB_FILE = "stub-lmdb.pickle"
+
+_MAIN_TABLE = "main_db"
+_BUSY_TIMEOUT = 30.0
+
+
+class Error(Exception):
+    pass
+
+
+class NotFoundError(Error):
+    pass
+
+
+class ReadonlyError(Error):
+    pass
+
+
+def _table_name(name: Optional[bytes]) -> str:
+    return _MAIN_TABLE if name is None else f"db_{name.hex()}"
+
+
+class _Database:
+    __slots__ = ("name", "table")
+
+    def __init__(self, name: Optional[bytes]):
+        self.name = name
+        self.table = _table_name(name)
+
+
+class Cursor:
+    """Position in one table of a transaction; every move is a single indexed query."""
+
+    def __init__(self, txn: "Transaction", db: _Database):
+        self._txn = txn
+        self._table = db.table
+        self._key = b""
+        self._value = b""
+        self._positioned = False
+
+    def __enter__(self) -> "Cursor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        self.close()
+
+    def _move(self, row: Optional[Tuple[bytes, bytes]]) -> bool:
+        if row is None:
+            self._key = self._value = b""
+            self._positioned = False
+            return False
+        self._key, self._value = row
+        self._positioned = True
+        return True
+
+    def _first_row(self, where: str, params: tuple, order: str = "ASC") -> Optional[Tuple[bytes, bytes]]:
+        return self._txn._conn.execute(
+            f'SELECT key, value FROM "{self._table}" {where} ORDER BY key {order} LIMIT 1', params
+        ).fetchone()
+
+    def set_key(self, key: bytes) -> bool:
+        row = self._txn._conn.execute(f'SELECT value FROM "{self._table}" WHERE key = ?', (key,)).fetchone()
+        return self._move(None if row is None else (key, row[0]))
+
+    def set_range(self, key: bytes) -> bool:
+        return self._move(self._first_row("WHERE key >= ?", (key,)))
+
+    def first(self) -> bool:
+        return self._move(self._first_row("", ()))
+
+    def last(self) -> bool:
+        return self._move(self._first_row("", (), "DESC"))
+
+    def next(self) -> bool:
+        if not self._positioned:
+            return self.first()
+        return self._move(self._first_row("WHERE key > ?", (self._key,)))
+
+    def iternext(self) -> Iterator[Tuple[bytes, bytes]]:
+        """Yield ``(key, value)`` from the current position (or the first key) onwards."""
+        if not self._positioned and not self.first():
+            return
+        rows = self._txn._conn.execute(
+            f'SELECT key, value FROM "{self._table}" WHERE key >= ? ORDER BY key', (self._key,)
+        )
+        for row in rows:
+            self._move(row)
+            yield row
+
+    def key(self) -> bytes:
+        return self._key
+
+    def value(self) -> bytes:
+        return self._value
+
+    def putmulti(
+        self,
+        items: Iterable[Tuple[bytes, bytes]],
+        dupdata: bool = False,
+        overwrite: bool = True,
+        append: bool = False,
+    ) -> Tuple[int, int]:
+        self._txn._require_write()
+        conn = self._txn._conn
+        consumed = 0
+
+        def counted() -> Iterator[Tuple[bytes, bytes]]:
+            nonlocal consumed
+            for item in items:
+                consumed += 1
+                yield item
+
+        before = conn.total_changes
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        conn.executemany(f'{verb} INTO "{self._table}" (key, value) VALUES (?, ?)', counted())
+        return consumed, conn.total_changes - before
+
+    def close(self) -> None:
+        self._positioned = False
+
+
+class Transaction:
+    def __init__(self, env: "Environment", write: bool, db: Optional[_Database] = None):
+        if write and env._readonly:
+            raise ReadonlyError("Environment is read-only")
+        self._env = env
+        self._write = write
+        self._db = db if db is not None else _Database(None)
+        self._conn = env._acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            # Reading pins the snapshot now, like LMDB does when a transaction begins.
+            last = self._conn.execute("SELECT value FROM meta WHERE name = 'last_txnid'").fetchone()[0]
+        except BaseException:
+            self._finish("ROLLBACK")
+            raise
+        self._id = last + 1 if write else last
+        self._changes = self._conn.total_changes
+        self._completed = False
+
+    def __enter__(self) -> "Transaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.commit()
+
+    def _require_write(self) -> None:
+        if not self._write:
+            raise ReadonlyError("Cannot write in a read-only transaction")
+
+    def _table(self, db: Optional[_Database]) -> str:
+        return (db if db is not None else self._db).table
+
+    def _finish(self, statement: str) -> None:
+        try:
+            if self._conn.in_transaction:
+                self._conn.execute(statement)
+        finally:
+            self._env._release(self._conn)
+
+    def get(self, key: bytes, default: Optional[bytes] = None, db: Optional[_Database] = None) -> Optional[bytes]:
+        row = self._conn.execute(f'SELECT value FROM "{self._table(db)}" WHERE key = ?', (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def put(self, key: bytes, value: bytes, overwrite: bool = True, db: Optional[_Database] = None) -> bool:
+        self._require_write()
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        return self._conn.execute(f'{verb} INTO "{self._table(db)}" (key, value) VALUES (?, ?)', (key, value)).rowcount > 0
+
+    def delete(self, key: bytes, db: Optional[_Database] = None) -> bool:
+        self._require_write()
+        return self._conn.execute(f'DELETE FROM "{self._table(db)}" WHERE key = ?', (key,)).rowcount > 0
+
+    def drop(self, db: _Database, delete: bool = True) -> None:
+        self._require_write()
+        self._conn.execute(f'{"DROP TABLE" if delete else "DELETE FROM"} "{db.table}"')
+
+    def stat(self, db: _Database) -> dict:
+        return {"entries": self._conn.execute(f'SELECT COUNT(*) FROM "{db.table}"').fetchone()[0]}
+
+    def id(self) -> int:
+        return self._id
+
+    def cursor(self, db: Optional[_Database] = None) -> Cursor:
+        return Cursor(self, db if db is not None else self._db)
+
+    def commit(self) -> None:
+        if self._completed:
+            return
+        self._completed = True
+        if self._write and self._conn.total_changes != self._changes:
+            self._conn.execute("UPDATE meta SET value = ? WHERE name = 'last_txnid'", (self._id,))
+        self._finish("COMMIT")
+
+    def abort(self) -> None:
+        if self._completed:
+            return
+        self._completed = True
+        self._finish("ROLLBACK")
+
+
+class Environment:
+    """One SQLite database file; connections are pooled so threads and nested transactions each get their own."""
+
+    def __init__(
+        self,
+        path: str,
+        map_size: int = 0,
+        subdir: bool = True,
+        readonly: bool = False,
+        max_dbs: int = 1,
+        max_readers: int = 126,
+        max_spare_txns: int = 1,
+        lock: bool = True,
+        readahead: bool = True,
+        writemap: bool = False,
+    ) -> None:
+        base = Path(path).resolve()
+        if subdir and not readonly:
+            base.mkdir(parents=True, exist_ok=True)
+        self._path = base / SQLITE_FILE if subdir else base
+        if readonly and not self._path.exists():
+            if subdir and (base / LEGACY_STUB_FILE).exists():
+                raise Error(f"{path} was written by an older release; open it writable once to convert it")
+            raise Error(f"{path}: No such file or directory")
+        self._readonly = readonly
+        self._map_size = map_size
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        if not readonly:
+            self._initialise(base / LEGACY_STUB_FILE if subdir else None)
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = self._path.as_uri() + ("?mode=ro" if self._readonly else "")
+        conn = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False, timeout=_BUSY_TIMEOUT)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._idle.append(conn)
+
+    def _initialise(self, legacy: Optional[Path]) -> None:
+        conn = self._acquire()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(
+                f"""
+                BEGIN IMMEDIATE;
+                CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID;
+                INSERT OR IGNORE INTO meta VALUES ('last_txnid', 0);
+                CREATE TABLE IF NOT EXISTS {_MAIN_TABLE} (key BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID;
+                COMMIT;
+                """
+            )
+        finally:
+            self._release(conn)
+        if legacy is not None and legacy.exists():
+            self._convert_legacy(legacy)
+
+    def _convert_legacy(self, legacy: Path) -> None:
+        """Copy a store written by the old in-memory shim into SQLite, then remove its pickle."""
+        import pickle
+
+        with legacy.open("rb") as handle:
+            state = pickle.load(handle)
+        if isinstance(state, dict) and "databases" in state:
+            databases, last_txnid = state["databases"], state.get("last_txnid", 0)
+        else:
+            if isinstance(state, tuple):
+                state, last_txnid = state
+            else:
+                last_txnid = 0
+            databases = {None: state}
+        for name in databases:
+            if name is not None:
+                self.open_db(name)
+        with self.begin(write=True) as txn:
+            for name, records in databases.items():
+                txn.cursor(_Database(name)).putmulti((bytes(k), bytes(v)) for k, v in records.items())
+            txn._id = max(txn._id, last_txnid)
+            txn._changes = -1  # Record the ID even for an empty store.
+        legacy.unlink()
+
+    def open_db(self, key: Optional[bytes] = None, txn: Optional[Transaction] = None, create: bool = True) -> _Database:
+        db = _Database(key)
+        conn = txn._conn if txn is not None else self._acquire()
+        try:
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (db.table,)).fetchone()
+            if not exists:
+                if not create:
+                    raise NotFoundError(f"No such database: {key!r}")
+                if self._readonly:
+                    raise ReadonlyError("Environment is read-only")
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{db.table}" (key BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID'
+                )
+        finally:
+            if txn is None:
+                self._release(conn)
+        return db
+
+    def begin(self, db: Optional[_Database] = None, write: bool = False, buffers: Optional[bool] = None) -> Transaction:
+        return Transaction(self, write, db)
+
+    def info(self) -> dict:
+        with self.begin() as txn:
+            return {"map_size": self._map_size, "last_txnid": txn.id()}
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+def open(
+    path: str,
+    map_size: int = 0,
+    subdir: bool = True,
+    readonly: bool = False,
+    max_dbs: int = 1,
+    max_readers: int = 126,
+    max_spare_txns: int = 1,
+    lock: bool = True,
+    readahead: bool = True,
+    writemap: bool = False,
+) -> Environment:
+    return Environment(
+        path,
+        map_size=map_size,
+        subdir=subdir,
+        readonly=readonly,
+        max_dbs=max_dbs,
+        max_readers=max_readers,
+        max_spare_txns=max_spare_txns,
+        lock=lock,
+        readahead=readahead,
+        writemap=writemap,
+    )
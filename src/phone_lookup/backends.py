@@ -0,0 +1,64 @@
+"""Storage backends behind :class:`~phone_lookup.store.PhoneLookupStore`.
+
+A backend is a module exposing the subset of py-lmdb's API the store uses:
+``open()``, ``Environment``/``Transaction``/``Cursor`` and the ``Error``,
+``NotFoundError`` and ``ReadonlyError`` exceptions.  ``lmdb`` is the py-lmdb package itself;
+``sqlite`` (:mod:`phone_lookup._sqlite_backend`) needs only the standard
+library, for hosts where lmdb cannot be installed.
+
+Existing stores are opened with the backend whose files they contain.  New
+ones use ``PHONE_LOOKUP_BACKEND`` when set, otherwise lmdb when it is
+importable and sqlite when it is not.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+BACKENDS = ("lmdb", "sqlite")
+
+# Files that mark an environment directory as belonging to a backend.  The
+# sqlite backend also converts stores written by the pickle shim it replaced.
+_DATA_FILES = {"lmdb": ("data.mdb",), "sqlite": ("data.sqlite", "stub-lmdb.pickle")}
+
+
+def lmdb_available() -> bool:
+    import importlib.util
+
+    return importlib.util.find_spec("lmdb") is not None
+
+
+def default_backend() -> str:
+    """Backend for new stores: ``PHONE_LOOKUP_BACKEND``, else lmdb if installed, else sqlite."""
+    name = os.getenv("PHONE_LOOKUP_BACKEND")
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown storage backend in PHONE_LOOKUP_BACKEND: {name}")
+        return name
+    return "lmdb" if lmdb_available() else "sqlite"
+
+
+def detect_backend(path: Path) -> Optional[str]:
+    """Backend whose data file exists in the environment directory ``path``, if any."""
+    for name, filenames in _DATA_FILES.items():
+        if any((Path(path) / filename).exists() for filename in filenames):
+            return name
+    return None
+
+
+def load_backend(name: Optional[str] = None) -> ModuleType:
+    """Import and return the backend module ``name`` (default: :func:`default_backend`)."""
+    name = name or default_backend()
+    if name == "lmdb":
+        try:
+            import lmdb  # type: ignore[import]
+        except ImportError as exc:
+            raise RuntimeError("The lmdb backend requires the lmdb package (pip install lmdb)") from exc
+        return lmdb
+    if name == "sqlite":
+        from . import _sqlite_backend
+
+        return _sqlite_backend
+    raise ValueError(f"Unknown storage backend: {name}")
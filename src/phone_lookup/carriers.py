@@ -0,0 +1,108 @@
+"""Carrier name resolution and the in-process OCN cache."""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+DEFAULT_CARRIER_CACHE_SIZE = int(os.getenv("PHONE_LOOKUP_CARRIER_CACHE_SIZE", "8192"))
+CARRIER_NAME_FIELDS = ("CommonName", "DBA", "COMPANY")
+
+
+def carrier_name(mapping: Dict[str, str]) -> str:
+    """Pick the display name for an OCN record, or ``""`` when none is set."""
+    return mapping.get("CommonName") or mapping.get("DBA") or mapping.get("COMPANY") or ""
+
+
+class CarrierCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @classmethod
+    def combine(cls, stats: Iterable["CarrierCacheStats"]) -> "CarrierCacheStats":
+        """Sum the counters of several caches, e.g. one per worker process."""
+        totals = [0, 0, 0, 0, 0]
+        for item in stats:
+            for idx, value in enumerate((item.hits, item.misses, item.evictions, item.size, item.maxsize)):
+                totals[idx] += value
+        return cls(*totals)
+
+
+class CarrierCache:
+    """Bounded LRU mapping of OCN codes to resolved carrier names.
+
+    Misses are cached too (as ``""``), so unknown OCNs do not hit the store
+    repeatedly.  Names are kept for the read transaction ``txn_id`` they were
+    read in: the owning store calls :meth:`sync` with the ID of every reader's
+    transaction, so a write by this or any other process clears the cache.
+    A lock keeps the LRU order consistent when reader threads share the cache.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CARRIER_CACHE_SIZE):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # ID of the transaction the cached names were read in.
+        self.txn_id: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, ocn: str) -> Optional[str]:
+        with self._lock:
+            try:
+                name = self._entries[ocn]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(ocn)
+            self.hits += 1
+            return name
+
+    def put(self, ocn: str, name: str, txn_id: Optional[int] = None) -> None:
+        """Cache ``name``; with ``txn_id``, only if it is still the transaction the cache is kept for."""
+        with self._lock:
+            if txn_id is not None and txn_id != self.txn_id:
+                return
+            self._entries[ocn] = name
+            self._entries.move_to_end(ocn)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def update(self, items: Iterable[Tuple[str, str]]) -> None:
+        for ocn, name in items:
+            self.put(ocn, name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.txn_id = None
+
+    def sync(self, txn_id: int) -> None:
+        """Keep the cache for transaction ``txn_id``, clearing it if the names were read in another."""
+        if txn_id != self.txn_id:
+            with self._lock:
+                if txn_id != self.txn_id:
+                    self._entries.clear()
+                    self.txn_id = txn_id
+
+    def stats(self) -> CarrierCacheStats:
+        return CarrierCacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.maxsize)
@@ -1,72 +1,82 @@
-"""Command-line interface for phone lookup utilities."""
+"""Command-line interface for phone lookup utilities.
+
+Only what every subcommand needs is imported at module level; handlers import
+their own dependencies (the importer, asyncio services, worker pools, color
+libraries) so a short ``lookup`` starts close to bare interpreter speed.
+"""
 from __future__ import annotations
 
 import argparse
 import os
 import sys
 import time
-from dataclasses import dataclass
+from contextlib import ExitStack
+from functools import lru_cache
+from itertools import chain, repeat
 from pathlib import Path
-from typing import Any, Iterable, Iterator, Optional
-
-try:  # Optional dependency that enables ANSI colors on Windows terminals.
-    import colorama
-except ImportError:  # pragma: no cover - only happens when colorama is absent.
-    colorama = None  # type: ignore[assignment]
-else:
-    colorama.init()
-
-from termcolor import colored
-
-from .importer import ensure_paths_exist, import_all
+from typing import Any, Callable, Coroutine, Iterable, Mapping, Optional, Union
+
+from .carriers import DEFAULT_CARRIER_CACHE_SIZE, CarrierCacheStats
+from .defaults import DEFAULT_BATCH_BYTES, DEFAULT_HOST, DEFAULT_PORT, DEFAULT_THREADS
+from .engines import DEFAULT_ENGINE, ENGINES, STORELESS_ENGINES, create_engine
+from .formats import (
+    DEFAULT_FORMAT,
+    OUTPUT_FORMATS,
+    Formatter,
+    create_formatter,
+    open_result_output,
+    parquet_available,
+    parse_fields,
+)
+from .generations import DEFAULT_KEEP_GENERATIONS
+from .instrumentation import FORMAT, RESOLVE, STATS_FORMATS, WRITE, StageStats
+from .lookup import (
+    DEFAULT_CHUNK_SIZE,
+    LookupEngine,
+    LookupResult,
+    format_line_type,
+    run_deduplicated,
+    run_lookup,
+    run_record_lookup,
+)
+from .memo import DEFAULT_MEMO_SIZE, LookupMemo
+from .overrides import OverrideStats
+from .progress import PROGRESS_MODES, Progress, create_progress
 from .store import DEFAULT_MAP_SIZE, PhoneLookupStore
+from .streams import count_numbers, is_stdio, iter_numbers, open_input
 
 DEFAULT_DB_PATH = Path(os.getenv("PHONE_LOOKUP_DB_PATH", "data/store"))
 
 WINDOWS = os.name == "nt"
-ENABLE_COLOR = (
-    os.getenv("NO_COLOR") is None
-    and (bool(os.getenv("FORCE_COLOR")) or sys.stdout.isatty())
-    and (not WINDOWS or colorama is not None)
-)
-
-LINE_TYPE_LABELS = {
-    "S": "LANDLINE",
-    "C": "WIRELESS",
-    "P": "PAGING",
-    "M": "MIXED",
-    "V": "VOIP",
-}
 
 
-def colorize(text: str, *args: Any, **kwargs: Any) -> str:
-    if ENABLE_COLOR:
-        return colored(text, *args, **kwargs)
-    return text
-
+@lru_cache(maxsize=None)
+def color_enabled() -> bool:
+    """Whether to emit ANSI colors; decided once, and color libraries load only if so."""
+    if os.getenv("NO_COLOR") is not None:
+        return False
+    if not (os.getenv("FORCE_COLOR") or sys.stdout.isatty()):
+        return False
+    if WINDOWS:
+        try:  # Optional dependency that enables ANSI colors on Windows terminals.
+            import colorama
+        except ImportError:  # pragma: no cover - only happens when colorama is absent.
+            return False
+        colorama.init()
+    return True
 
-def format_line_type(ltype: str) -> str:
-    label = LINE_TYPE_LABELS.get(ltype.upper()) if ltype else None
-    return label if label else ltype
 
-@dataclass(frozen=True)
-class LookupResult:
-    """Container for lookup responses."""
-
-    original: str
-    normalized: Optional[str]
-    ltype: str
-    common_name: str
-    found: bool
+def colorize(text: str, *args: Any, **kwargs: Any) -> str:
+    if not color_enabled():
+        return text
+    from termcolor import colored
 
-    def as_output_line(self) -> str:
-        number = self.normalized or self.original
-        return f"{number}:{format_line_type(self.ltype)}:{self.common_name}"
+    return colored(text, *args, **kwargs)
 
 
-def format_lookup_output(idx: int, total: int, result: LookupResult) -> str:
+def format_lookup_output(idx: int, total: Optional[int], result: LookupResult) -> str:
     number_display = result.normalized or result.original
-    progress = colorize(f"{idx}/{total}", "cyan")
+    progress = colorize(f"{idx}/{total if total is not None else '?'}", "cyan")
     if result.found:
         number = colorize(number_display, "green", attrs=["bold"])
         ltype = colorize(format_line_type(result.ltype), "green")
@@ -82,58 +92,11 @@ def format_lookup_output(idx: int, total: int, result: LookupResult) -> str:
     return f"{progress} {number} {ltype} {common_name}"
 
 
-def normalize_number(raw: str) -> Optional[str]:
-    digits = "".join(ch for ch in raw if ch.isdigit())
-    if len(digits) == 11 and digits.startswith("1"):
-        digits = digits[1:]
-    if len(digits) != 10:
-        return None
-    return digits
-
-
-def load_numbers(path: Path) -> list[str]:
-    with path.open("r", encoding="utf-8") as handle:
-        numbers = [line.strip() for line in handle if line.strip()]
-    return numbers
-
-
-def lookup_number(store: PhoneLookupStore, digits: str) -> tuple[bool, str, str]:
-    npa = digits[:3]
-    nxx = digits[3:6]
-    block = digits[6]
-    candidates = (block, "A") if block != "A" else ("A",)
-    for candidate in candidates:
-        key = f"npanxx:{npa}{nxx}:{candidate}"
-        data = store.get_mapping(key)
-        if not data:
-            continue
-        ltype = data.get("LTYPE") or "UNKNOWN"
-        ocn = data.get("OCN") or ""
-        common_name = ""
-        if ocn:
-            ocn_key = f"ocn:{ocn}"
-            ocn_data = store.get_mapping(ocn_key)
-            if ocn_data:
-                common_name = (
-                    ocn_data.get("CommonName")
-                    or ocn_data.get("DBA")
-                    or ocn_data.get("COMPANY")
-                    or ""
-                )
-        if not common_name:
-            common_name = "UNKNOWN"
-        return True, ltype or "UNKNOWN", common_name
-    return False, "UNKNOWN", "UNKNOWN"
-
-
-def run_lookup(store: PhoneLookupStore, numbers: Iterable[str]) -> Iterator[LookupResult]:
-    for number in numbers:
-        normalized = normalize_number(number)
-        if not normalized:
-            yield LookupResult(number, None, "INVALID", "UNKNOWN", False)
-            continue
-        found, ltype, common_name = lookup_number(store, normalized)
-        yield LookupResult(number, normalized, ltype, common_name, found)
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
 
 
 def add_store_arguments(parser: argparse.ArgumentParser) -> None:
@@ -145,51 +108,614 @@ def add_store_arguments(parser: argparse.ArgumentParser) -> None:
     )
 
 
-def open_store(parser: argparse.ArgumentParser, *, path: Path) -> PhoneLookupStore:
+def add_service_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=DEFAULT_ENGINE,
+        help=(
+            "Lookup engine: read LMDB per number, resolve from an in-memory prefix index, "
+            "or binary-search a memory-mapped snapshot (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--index-snapshot",
+        type=Path,
+        default=None,
+        help="Memory index snapshot written by 'build-index'; built from the store when omitted",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        default=None,
+        help="Snapshot written by 'export-snapshot', required by --engine mmap; the store is then never opened",
+    )
+    parser.add_argument(
+        "--carrier-cache-size",
+        type=positive_int,
+        default=DEFAULT_CARRIER_CACHE_SIZE,
+        help="Maximum number of OCN carrier names kept in memory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--preload-carriers",
+        action="store_true",
+        help="Load every OCN carrier name into the cache before the first lookup",
+    )
+
+
+def add_instrumentation_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="table",
+        choices=STATS_FORMATS,
+        default=None,
+        help="Time every stage and print a summary as a table (default) or JSON",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        help="Run under cProfile and write the stats to this file ('.txt' for a text report, else pstats data)",
+    )
+
+
+def open_store(
+    parser: argparse.ArgumentParser,
+    *,
+    path: Path,
+    carrier_cache_size: int = DEFAULT_CARRIER_CACHE_SIZE,
+    readonly: bool = False,
+) -> PhoneLookupStore:
     try:
-        return PhoneLookupStore.open(path, map_size=DEFAULT_MAP_SIZE)
+        return PhoneLookupStore.open(
+            path,
+            map_size=DEFAULT_MAP_SIZE,
+            carrier_cache_size=carrier_cache_size,
+            readonly=readonly,
+        )
     except Exception as exc:  # pragma: no cover - defensive
-        parser.error(f"Could not open LMDB database at {path}: {exc}")
+        parser.error(f"Could not open database at {path}: {exc}")
+        raise
+
+
+def open_engine(
+    parser: argparse.ArgumentParser, args: argparse.Namespace, store: Optional[PhoneLookupStore]
+) -> Union[PhoneLookupStore, LookupEngine]:
+    if args.engine in STORELESS_ENGINES and args.snapshot is None:
+        parser.error(f"--engine {args.engine} requires --snapshot (written by 'export-snapshot')")
+    try:
+        return create_engine(args.engine, store, index_snapshot=args.index_snapshot, snapshot=args.snapshot)
+    except (OSError, ValueError) as exc:
+        parser.error(f"Could not open the {args.engine} engine: {exc}")
         raise
 
 
+def progress_mode(args: argparse.Namespace) -> str:
+    if args.quiet:
+        return "none"
+    if args.verbose:
+        return "lines"
+    return args.progress
+
+
+def write_results_timed(
+    handle: Any,
+    rows: Iterable[tuple[LookupResult, Mapping[str, str]]],
+    format_row: Formatter,
+    progress: Progress,
+    stats: StageStats,
+) -> None:
+    """The ``handle_lookup`` output loop, charging formatting and writing to ``stats``."""
+    clock = time.perf_counter
+    formatting = writing = 0.0
+    count = 0
+    for result, record in rows:
+        start = clock()
+        line = format_row(result, record)
+        formatted = clock()
+        handle.write(line)
+        written = clock()
+        formatting += formatted - start
+        writing += written - formatted
+        count += 1
+        progress.advance(result)
+    stats.add(FORMAT, formatting, count)
+    stats.add(WRITE, writing, count)
+
+
 def handle_lookup(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
-    numbers = load_numbers(args.file)
-    if not numbers:
-        parser.error("Input file did not contain any phone numbers")
-    total = len(numbers)
+    if args.vectorized:
+        from .vectorized import DEFAULT_VECTOR_CHUNK_SIZE, available
+
+        if args.engine != "memory" or args.workers > 1:
+            parser.error("--vectorized requires --engine memory and a single worker")
+        if not available():
+            parser.error("--vectorized requires numpy; install it with: pip install 'phone-lookup[fast]'")
+    if args.chunk_size is None:
+        args.chunk_size = DEFAULT_VECTOR_CHUNK_SIZE if args.vectorized else DEFAULT_CHUNK_SIZE
+    if args.numbers and args.file is not None:
+        parser.error("Pass numbers as arguments or with --file, not both")
+    if not args.numbers and args.file is None:
+        if sys.stdin.isatty():
+            parser.error("Pass numbers as arguments, with --file, or on stdin")
+        args.file = Path("-")
+    try:
+        selection = parse_fields(args.fields)
+    except ValueError as exc:
+        parser.error(f"--fields: {exc}")
+    if args.dedup and args.workers > 1:
+        parser.error("--dedup requires a single worker")
+    if selection.needs_records and (args.engine != "lmdb" or args.workers > 1):
+        parser.error("--fields with stored NPANXX/OCN fields requires --engine lmdb and a single worker")
+    if args.sort_keys and (args.engine != "lmdb" or selection.needs_records):
+        parser.error("--sort-keys requires --engine lmdb and no stored NPANXX/OCN fields")
+    if args.format == "parquet":
+        if is_stdio(args.output) or args.output.suffix == ".gz":
+            parser.error("--format parquet needs a regular --output file")
+        if not parquet_available():
+            parser.error("--format parquet requires pyarrow; install it with: pip install 'phone-lookup[parquet]'")
+    format_row = create_formatter(args.format, selection, explicit=args.fields is not None)
+    # The memory engine's dense index is already cheaper than a dict lookup; only LMDB reads are memoized.
+    memoize_prefixes = args.engine == "lmdb" and not args.no_memo
+    memo: Optional[LookupMemo] = LookupMemo(exact=args.dedup) if args.dedup or memoize_prefixes else None
+    prefix_memo = memo if memoize_prefixes else None
+    stats = StageStats() if args.stats else None
+    if args.numbers:
+        total: Optional[int] = len(args.numbers)
+    else:
+        total = None if args.no_count else count_numbers(args.file)
+    # Progress lines must not interleave with results piped to stdout.
+    progress_stream = sys.stderr if is_stdio(args.output) else sys.stdout
     start = time.monotonic()
-    with open_store(parser, path=args.database_path) as store:
-        with args.output.open("w", encoding="utf-8") as handle:
-            for idx, result in enumerate(run_lookup(store, numbers), start=1):
-                print(format_lookup_output(idx, total, result), flush=True)
-                handle.write(result.as_output_line() + "\n")
+    with ExitStack() as stack:
+        if args.numbers:
+            numbers: Iterable[str] = iter(args.numbers)
+        else:
+            numbers = iter_numbers(stack.enter_context(open_input(args.file)))
+            first = next(numbers, None)
+            if first is None:
+                parser.error("Input file did not contain any phone numbers")
+            numbers = chain((first,), numbers)
+        if args.workers > 1:
+            from .parallel import ParallelLookup
+
+            # Validate the environment up front; workers open their own handles.
+            if args.index_snapshot is not None and args.engine == "memory" and not args.index_snapshot.is_file():
+                parser.error(f"--index-snapshot {args.index_snapshot} does not exist (write it with 'build-index')")
+            if args.engine in STORELESS_ENGINES:
+                open_engine(parser, args, None).close()
+            else:
+                open_store(parser, path=args.database_path, readonly=True).close()
+            parallel = ParallelLookup(
+                args.database_path,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                carrier_cache_size=args.carrier_cache_size,
+                preload_carriers=args.preload_carriers,
+                engine=args.engine,
+                index_snapshot=args.index_snapshot,
+                snapshot=args.snapshot,
+                memo_size=DEFAULT_MEMO_SIZE if memoize_prefixes else None,
+                sort_keys=args.sort_keys,
+                stats=stats,
+            )
+            rows: Iterable[tuple[LookupResult, Mapping[str, str]]] = zip(parallel.run(numbers), repeat({}))
+            carrier_stats = parallel.carrier_stats
+            memo_stats = parallel.memo_stats
+            override_stats = parallel.override_stats
+        else:
+            store: Optional[PhoneLookupStore] = None
+            if args.engine not in STORELESS_ENGINES:
+                store = stack.enter_context(
+                    open_store(parser, path=args.database_path, carrier_cache_size=args.carrier_cache_size, readonly=True)
+                )
+                if args.preload_carriers:
+                    store.preload_carriers()
+            source = open_engine(parser, args, store)
+            if isinstance(source, LookupEngine):
+                stack.enter_context(source)
+
+            def lookup_rows(batch: Iterable[str]) -> Iterable[tuple[LookupResult, Mapping[str, str]]]:
+                if selection.needs_records:
+                    return run_record_lookup(
+                        store,  # type: ignore[arg-type]
+                        batch,
+                        npanxx_fields=selection.npanxx,
+                        ocn_fields=selection.ocn,
+                        chunk_size=args.chunk_size,
+                        memo=prefix_memo,
+                    )
+                if args.vectorized:
+                    from .vectorized import run_vectorized_lookup
+
+                    results = run_vectorized_lookup(source, batch, chunk_size=args.chunk_size)  # type: ignore[arg-type]
+                    return zip(results, repeat({}))
+                results = run_lookup(
+                    source, batch, chunk_size=args.chunk_size, stats=stats, memo=prefix_memo, sort_keys=args.sort_keys
+                )
+                return zip(results, repeat({}))
+
+            if args.dedup:
+                rows = run_deduplicated(lookup_rows, numbers, memo=memo, chunk_size=args.chunk_size)
+            else:
+                rows = lookup_rows(numbers)
+            if stats is not None and (selection.needs_records or args.vectorized):
+                rows = stats.timed(RESOLVE, rows)
+            carrier_stats = store.carriers.stats if store is not None else lambda: CarrierCacheStats.combine(())
+            memo_stats = memo.stats if memo is not None else lambda: None
+            override_stats = store.override_counts.stats if store is not None else lambda: OverrideStats.combine(())
+        handle = stack.enter_context(open_result_output(args.format, args.output, selection))
+        progress = create_progress(
+            progress_mode(args),
+            stream=progress_stream,
+            total=total,
+            render=format_lookup_output,
+        )
+        if stats is None:
+            for result, record in rows:
+                handle.write(format_row(result, record))
+                progress.advance(result)
+        else:
+            write_results_timed(handle, rows, format_row, progress, stats)
+        progress.finish()
+        cache_stats = carrier_stats()
+        saved_stats = memo_stats()
+        overrides = override_stats()
     elapsed = time.monotonic() - start
     completion_line = colorize(
-        f"Completed {total} lookups in {elapsed:.2f} seconds.",
+        f"Completed {progress.count} lookups in {elapsed:.2f} seconds ({progress.found} found).",
         "green",
         attrs=["bold"],
     )
-    print(f"\n{completion_line}\n", flush=True)
+    print(f"\n{completion_line}", file=progress_stream, flush=True)
+    if cache_stats.lookups:
+        print(
+            colorize(
+                f"Carrier cache: {cache_stats.hits} hits, {cache_stats.misses} misses "
+                f"({cache_stats.hit_rate:.1%} hit rate, {cache_stats.size} cached)",
+                "cyan",
+            ),
+            file=progress_stream,
+            flush=True,
+        )
+    if overrides.lookups:
+        print(
+            colorize(
+                f"Overrides: {overrides.hits} hits ({overrides.hit_rate:.1%} of numbers), "
+                f"{overrides.false_positives} filter false positives ({overrides.false_positive_rate:.2%}), "
+                f"{overrides.skipped} reads skipped",
+                "cyan",
+            ),
+            file=progress_stream,
+            flush=True,
+        )
+    if saved_stats is not None and saved_stats.lookups:
+        print(
+            colorize(
+                f"Lookup memo: {saved_stats.saved} of {saved_stats.lookups} lookups saved "
+                f"({saved_stats.prefix_hits} repeated prefixes, {saved_stats.exact_hits} repeated numbers)",
+                "cyan",
+            ),
+            file=progress_stream,
+            flush=True,
+        )
+    if stats is not None:
+        print(stats.render(args.stats, elapsed), file=progress_stream, flush=True)
+    print(file=progress_stream, flush=True)
     return 0
 
 
+def print_stage_stats(stats: Optional[StageStats], fmt: Optional[str]) -> None:
+    if stats is not None and fmt is not None:
+        print(stats.render(fmt), flush=True)
+
+
 def handle_import(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
-    ensure_paths_exist((args.npanxx_path, args.ocn_path))
-    with open_store(parser, path=args.database_path) as store:
-        import_all(store, args.npanxx_path, args.ocn_path)
+    if args.incremental and (args.fast or args.in_place):
+        parser.error("--incremental cannot be combined with --fast or --in-place")
+    from .importer import ensure_paths_exist, fast_import_all, import_all, import_generation
+
+    ensure_paths_exist((args.npanxx_path, args.ocn_path, *filter(None, (args.override_path,))))
+    stage_stats = StageStats() if args.stats else None
+    if args.incremental:
+        from .delta import delta_import
+
+        with open_store(parser, path=args.database_path) as store:
+            deltas = delta_import(
+                store,
+                args.npanxx_path,
+                args.ocn_path,
+                workers=args.workers,
+                batch_bytes=args.batch_bytes,
+                stats=stage_stats,
+                override_path=args.override_path,
+            )
+        for delta in deltas:
+            print(
+                colorize(f"{delta.table}:", "cyan")
+                + f" {delta.added} added, {delta.changed} changed,"
+                + f" {delta.removed} removed, {delta.unchanged} unchanged"
+            )
+        print_stage_stats(stage_stats, args.stats)
+        print(colorize("Import complete.", "green", attrs=["bold"]))
+        return 0
+    if args.in_place:
+        with open_store(parser, path=args.database_path) as store:
+            if args.fast:
+                stats = fast_import_all(
+                    store,
+                    args.npanxx_path,
+                    args.ocn_path,
+                    workers=args.workers,
+                    batch_bytes=args.batch_bytes,
+                    stats=stage_stats,
+                    override_path=args.override_path,
+                )
+            else:
+                import_all(store, args.npanxx_path, args.ocn_path, stats=stage_stats, override_path=args.override_path)
+                stats = []
+        published = None
+    else:
+        try:
+            published = import_generation(
+                args.database_path,
+                args.npanxx_path,
+                args.ocn_path,
+                fast=args.fast,
+                workers=args.workers,
+                batch_bytes=args.batch_bytes,
+                keep=args.keep_generations,
+                stats=stage_stats,
+                override_path=args.override_path,
+            )
+        except ValueError as exc:
+            parser.error(f"Import verification failed: {exc}")
+        stats = published.stats
+    for table in stats:
+        print(
+            colorize(f"{table.table}: {table.rows} rows", "cyan")
+            + f" | parse {table.parse_seconds:.2f}s ({table.parse_rate:,.0f} rows/s)"
+            + f" | sort {table.sort_seconds:.2f}s ({table.sort_rate:,.0f} rows/s)"
+            + f" | write {table.write_seconds:.2f}s ({table.write_rate:,.0f} rows/s)"
+        )
+    if published is not None:
+        counts = ", ".join(f"{count} {table}" for table, count in published.counts.items())
+        print(f"Published generation {published.generation} ({counts} records).")
+        if published.pruned:
+            print(f"Removed old generations: {', '.join(published.pruned)}")
+    print_stage_stats(stage_stats, args.stats)
     print(colorize("Import complete.", "green", attrs=["bold"]))
     return 0
 
 
+def handle_migrate(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    if args.database_path.exists():
+        moved, dropped = PhoneLookupStore.upgrade_layout(args.database_path, map_size=DEFAULT_MAP_SIZE)
+        if moved or dropped:
+            print(f"Moved {moved} records into per-table databases ({dropped} malformed keys dropped).")
+    with open_store(parser, path=args.database_path) as store:
+        migrated = store.migrate_encoding()
+        store.rebuild_resolved()
+    print(colorize(f"Migrated {migrated} records to the binary format.", "green", attrs=["bold"]))
+    return 0
+
+
+def handle_build_index(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    from .memory_index import MemoryIndex
+
+    start = time.monotonic()
+    with open_store(parser, path=args.database_path, readonly=True) as store:
+        index = MemoryIndex.build(store)
+    index.save(args.output)
+    elapsed = time.monotonic() - start
+    print(
+        colorize(
+            f"Wrote memory index with {len(index.entries) - 1} distinct results to {args.output} in {elapsed:.2f} seconds.",
+            "green",
+            attrs=["bold"],
+        )
+    )
+    return 0
+
+
+def handle_export_snapshot(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    from .snapshot import write_snapshot
+
+    start = time.monotonic()
+    with open_store(parser, path=args.database_path, readonly=True) as store:
+        records, entries = write_snapshot(store, args.output)
+    elapsed = time.monotonic() - start
+    print(
+        colorize(
+            f"Wrote snapshot of {records} NPA-NXX-blocks ({entries} distinct results) to {args.output} in {elapsed:.2f} seconds.",
+            "green",
+            attrs=["bold"],
+        )
+    )
+    return 0
+
+
+def open_service_source(
+    parser: argparse.ArgumentParser, args: argparse.Namespace, stack: ExitStack
+) -> tuple[Optional[PhoneLookupStore], Union[PhoneLookupStore, LookupEngine]]:
+    """Open the read-only store and lookup engine a long-running service answers from.
+
+    Storeless engines get no store; the service reloads their snapshot when it is re-exported.
+    """
+    if args.engine in STORELESS_ENGINES:
+        source = stack.enter_context(open_engine(parser, args, None))
+        return None, source
+    store = stack.enter_context(
+        open_store(
+            parser,
+            path=args.database_path,
+            carrier_cache_size=args.carrier_cache_size,
+            readonly=True,
+        )
+    )
+    if args.preload_carriers:
+        store.preload_carriers()
+    source = open_engine(parser, args, store)
+    if isinstance(source, LookupEngine):
+        stack.enter_context(source)
+    return store, source
+
+
+def run_until_stopped(main: Coroutine[Any, Any, None]) -> None:
+    """Run a service coroutine until SIGINT/SIGTERM cancels it."""
+    import asyncio
+    import signal
+
+    async def supervise() -> None:
+        task = asyncio.ensure_future(main)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, task.cancel)
+            except (NotImplementedError, RuntimeError):  # pragma: no cover - Windows
+                pass
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(supervise())
+    except KeyboardInterrupt:  # pragma: no cover - signal handlers cover POSIX
+        pass
+
+
+def handle_serve(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    from .server import LookupService, serve
+
+    with ExitStack() as stack:
+        store, source = open_service_source(parser, args, stack)
+        service = LookupService(
+            store,
+            source,
+            threads=args.threads,
+            max_batch=args.max_batch,
+            window=args.batch_window_ms / 1000,
+        )
+
+        def ready(host: str, port: int) -> None:
+            print(colorize(f"Serving lookups on http://{host}:{port}", "green", attrs=["bold"]), flush=True)
+
+        try:
+            run_until_stopped(serve(service, args.host, args.port, ready=ready))
+        except OSError as exc:
+            parser.error(f"Could not listen on {args.host}:{args.port}: {exc}")
+    print("Server stopped.", flush=True)
+    return 0
+
+
+def handle_daemon(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        parser.error("daemon requires Unix domain socket support")
+    from .daemon import LookupDaemon, serve
+
+    with ExitStack() as stack:
+        store, source = open_service_source(parser, args, stack)
+        daemon = LookupDaemon(store, source, max_batch=args.max_batch, threads=args.threads)
+
+        def ready(path: Path) -> None:
+            print(colorize(f"Serving lookups on {path}", "green", attrs=["bold"]), flush=True)
+
+        try:
+            run_until_stopped(serve(daemon, args.socket, ready=ready))
+        except OSError as exc:
+            parser.error(f"Could not listen on {args.socket}: {exc}")
+    print("Daemon stopped.", flush=True)
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Phone lookup tooling")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
-    lookup_parser = subparsers.add_parser("lookup", help="Perform bulk phone number lookups")
+    lookup_parser = subparsers.add_parser("lookup", help="Look up phone numbers from arguments, a file or stdin")
     add_store_arguments(lookup_parser)
-    lookup_parser.add_argument("--file", required=True, type=Path, help="Path to input file containing phone numbers")
-    lookup_parser.add_argument("--output", required=True, type=Path, help="File to write lookup results")
+    lookup_parser.add_argument("numbers", nargs="*", metavar="NUMBER", help="Phone numbers to look up")
+    lookup_parser.add_argument(
+        "--file",
+        type=Path,
+        default=None,
+        help="Input file containing phone numbers ('-' for stdin, the default without NUMBER arguments; "
+        "'.gz' files are decompressed)",
+    )
+    lookup_parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("-"),
+        help="File to write lookup results ('-' for stdout, the default; '.gz' files are compressed)",
+    )
+    lookup_parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default=DEFAULT_FORMAT,
+        help="Output format; parquet requires pyarrow and an --output file (default: %(default)s)",
+    )
+    lookup_parser.add_argument(
+        "--fields",
+        default=None,
+        help="Comma-separated columns to write: number, normalized, ltype, line_type, carrier, found and any "
+        "stored NPANXX/OCN field such as STATE, RC, LATA, SMS or Rural (default: number:line_type:carrier "
+        "for line output, all result columns otherwise)",
+    )
+    verbosity = lookup_parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "--progress",
+        choices=PROGRESS_MODES,
+        default="auto",
+        help=(
+            "Progress display: a rate-limited bar, one line per number, periodic rate reports or nothing "
+            "(default: %(default)s, a bar on a TTY and rate reports otherwise)"
+        ),
+    )
+    verbosity.add_argument("-q", "--quiet", action="store_true", help="Do not report per-number progress")
+    verbosity.add_argument("-v", "--verbose", action="store_true", help="Print every lookup result as it completes")
+    lookup_parser.add_argument(
+        "--no-count",
+        action="store_true",
+        help="Skip the line-count pre-pass used to show total progress",
+    )
+    lookup_parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=None,
+        help=f"Numbers resolved per read transaction or batch (default: {DEFAULT_CHUNK_SIZE}, 100000 with --vectorized)",
+    )
+    lookup_parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="Worker processes resolving chunks in parallel, each with its own read-only store (default: %(default)s)",
+    )
+    add_service_arguments(lookup_parser)
+    lookup_parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="Normalize and resolve numbers in NumPy batches (requires --engine memory and numpy)",
+    )
+    lookup_parser.add_argument(
+        "--no-memo",
+        action="store_true",
+        help="Read LMDB for every number instead of once per distinct NPA-NXX-block prefix per job",
+    )
+    lookup_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Resolve and format each distinct input number once, repeating its result in input order",
+    )
+    lookup_parser.add_argument(
+        "--sort-keys",
+        action="store_true",
+        help="Read each chunk's LMDB keys in ascending order with a forward cursor scan (faster on cold, large stores)",
+    )
+    add_instrumentation_arguments(lookup_parser)
 
     import_parser = subparsers.add_parser("import", help="Import NPANXX/OCN data into the LMDB store")
     add_store_arguments(import_parser)
@@ -205,18 +731,145 @@ def build_parser() -> argparse.ArgumentParser:
         default=Path("data/raw/ocn.csv"),
         help="Path to OCN CSV file",
     )
+    import_parser.add_argument(
+        "--override-path",
+        type=Path,
+        default=None,
+        help="CSV of exact-number overrides (NUMBER, OCN, LTYPE columns), e.g. ported numbers",
+    )
+    import_parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Parse in worker processes and write each table as one sorted transaction",
+    )
+    import_parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=os.cpu_count() or 1,
+        help="Parser processes used with --fast or --incremental (default: %(default)s)",
+    )
+    import_parser.add_argument(
+        "--batch-bytes",
+        type=positive_int,
+        default=DEFAULT_BATCH_BYTES,
+        help="Approximate CSV bytes handed to a parser process at a time (default: %(default)s)",
+    )
+    import_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Apply only added, changed and removed rows to the live data in one transaction",
+    )
+    import_parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="Write into the live environment instead of publishing a new generation",
+    )
+    import_parser.add_argument(
+        "--keep-generations",
+        type=positive_int,
+        default=DEFAULT_KEEP_GENERATIONS,
+        help="Generations to keep on disk after publishing, including the new one (default: %(default)s)",
+    )
+    add_instrumentation_arguments(import_parser)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve lookups over HTTP/JSON from one open store")
+    add_store_arguments(serve_parser)
+    serve_parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on (default: %(default)s)")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on (default: %(default)s)")
+    serve_parser.add_argument(
+        "--threads",
+        type=positive_int,
+        default=DEFAULT_THREADS,
+        help="Threads resolving micro-batches, each in its own read transaction (default: %(default)s)",
+    )
+    serve_parser.add_argument(
+        "--max-batch",
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Most numbers coalesced into one micro-batch (default: %(default)s)",
+    )
+    serve_parser.add_argument(
+        "--batch-window-ms",
+        type=float,
+        default=0.0,
+        help="Extra milliseconds to wait for more requests before starting a batch (default: %(default)s)",
+    )
+    add_service_arguments(serve_parser)
+
+    daemon_parser = subparsers.add_parser("daemon", help="Serve lookups over a Unix socket line protocol")
+    add_store_arguments(daemon_parser)
+    daemon_parser.add_argument("--socket", required=True, type=Path, help="Unix socket path to listen on")
+    daemon_parser.add_argument(
+        "--threads",
+        type=positive_int,
+        default=DEFAULT_THREADS,
+        help="Threads resolving pipelined lines, each in its own read transaction (default: %(default)s)",
+    )
+    daemon_parser.add_argument(
+        "--max-batch",
+        type=positive_int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Most pipelined numbers resolved in one read transaction (default: %(default)s)",
+    )
+    add_service_arguments(daemon_parser)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Convert legacy stores to per-table databases and binary records")
+    add_store_arguments(migrate_parser)
+
+    index_parser = subparsers.add_parser("build-index", help="Write a memory index snapshot for --engine memory")
+    add_store_arguments(index_parser)
+    index_parser.add_argument("--output", required=True, type=Path, help="Snapshot file to write")
+
+    export_parser = subparsers.add_parser(
+        "export-snapshot", help="Write an immutable memory-mapped lookup snapshot for --engine mmap"
+    )
+    add_store_arguments(export_parser)
+    export_parser.add_argument("--output", required=True, type=Path, help="Snapshot file to write")
 
     return parser
 
 
+def run_profiled(path: Path, handler: Callable[[], int]) -> int:
+    """Run ``handler`` under cProfile and save the profile to ``path``."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(handler)
+    finally:
+        if path.suffix == ".txt":
+            with path.open("w", encoding="utf-8") as handle:
+                pstats.Stats(profiler, stream=handle).sort_stats("cumulative").print_stats()
+        else:
+            profiler.dump_stats(str(path))
+        print(f"Wrote profile to {path}", file=sys.stderr, flush=True)
+
+
 def run(argv: Optional[list[str]] = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    profile = getattr(args, "profile", None)
+    if profile is not None:
+        return run_profiled(profile, lambda: run_command(parser, args))
+    return run_command(parser, args)
+
 
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
     if args.command == "lookup":
         return handle_lookup(parser, args)
     if args.command == "import":
         return handle_import(parser, args)
+    if args.command == "serve":
+        return handle_serve(parser, args)
+    if args.command == "daemon":
+        return handle_daemon(parser, args)
+    if args.command == "migrate":
+        return handle_migrate(parser, args)
+    if args.command == "build-index":
+        return handle_build_index(parser, args)
+    if args.command == "export-snapshot":
+        return handle_export_snapshot(parser, args)
     parser.error("A command is required")
     return 2
 
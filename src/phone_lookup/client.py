@@ -0,0 +1,73 @@
+"""Client for the ``phone-lookup daemon`` Unix socket protocol.
+
+Only the standard library is needed: callers get lookups from the daemon's
+warm store without importing lmdb or opening the environment themselves::
+
+    with LookupClient("/run/phone-lookup.sock") as client:
+        client.lookup("415-555-1234")
+        client.lookup_many(numbers)
+"""
+from __future__ import annotations
+
+import socket
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+from .lookup import LookupResult
+
+# Numbers written before reading their answers; small enough that neither side's socket buffer fills up.
+DEFAULT_WINDOW = 512
+
+
+class DaemonError(RuntimeError):
+    """The daemon rejected a request or closed the connection."""
+
+
+class LookupClient:
+    def __init__(self, path: Union[str, Path], *, timeout: Optional[float] = None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(str(path))
+        except OSError:
+            self._socket.close()
+            raise
+        self._reader = self._socket.makefile("rb")
+
+    def lookup(self, number: str) -> LookupResult:
+        return self.lookup_many((number,))[0]
+
+    def lookup_many(self, numbers: Iterable[str], *, window: int = DEFAULT_WINDOW) -> List[LookupResult]:
+        """Resolve ``numbers`` in order, pipelining ``window`` requests per round trip."""
+        if window <= 0:
+            raise ValueError("window must be positive")
+        batch = list(numbers)
+        results: List[LookupResult] = []
+        for start in range(0, len(batch), window):
+            part = batch[start : start + window]
+            for number in part:
+                if "\n" in number or "\r" in number:
+                    raise ValueError(f"Numbers must not contain line breaks: {number!r}")
+            self._socket.sendall("".join(f"{number}\n" for number in part).encode("utf-8"))
+            results.extend(self._read_result(number) for number in part)
+        return results
+
+    def _read_result(self, original: str) -> LookupResult:
+        line = self._reader.readline()
+        if not line:
+            raise DaemonError("Daemon closed the connection")
+        fields = line.decode("utf-8").rstrip("\n").split("\t")
+        if len(fields) != 5:
+            raise DaemonError(f"Unexpected response: {line!r}")
+        _, normalized, ltype, common_name, found = fields
+        return LookupResult(original, normalized or None, ltype, common_name, found == "1")
+
+    def close(self) -> None:
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self) -> "LookupClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        self.close()
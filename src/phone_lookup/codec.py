@@ -0,0 +1,203 @@
+"""Compact, schema-driven binary encoding for stored records.
+
+Records are written as::
+
+    version:u8  schema:u8  flags:u8  present:u16  lengths[n]  data
+
+``present`` is a bitmask over the schema's fields, ``lengths`` holds one
+``u8`` (or ``u16`` when the ``WIDE`` flag is set) per present field and
+``data`` is the concatenated UTF-8 values in schema order.  Because values are
+stored by position, readers can decode just the fields they need.
+
+Legacy JSON values (which always start with ``{``) are still decoded, and
+mappings that do not fit a schema fall back to JSON as well.
+"""
+from __future__ import annotations
+
+import struct
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+FORMAT_VERSION = 1
+FLAG_WIDE = 0x01
+
+_HEADER = struct.Struct("<BBBH")
+_VERSION_BYTE = bytes((FORMAT_VERSION,))
+
+NPANXX_FIELDS: Tuple[str, ...] = (
+    "OCN",
+    "LTYPE",
+    "NXXTYPE",
+    "RC",
+    "RCLONG",
+    "STATE",
+    "COUNTRY",
+    "LATA",
+    "SWITCH",
+    "TBP_IND",
+    "ADATE",
+    "EFFDATE",
+)
+
+OCN_FIELDS: Tuple[str, ...] = ("COMPANY", "DBA", "CommonName", "TYPE", "SMS", "Rural")
+# Final line type and carrier name per NPA-NXX-block, derived at import time.
+RESOLVED_FIELDS: Tuple[str, ...] = ("LTYPE", "CommonName")
+# Carrier and line type of a single number that overrides its block.
+OVERRIDE_FIELDS: Tuple[str, ...] = ("OCN", "LTYPE")
+
+
+class Schema:
+    """Ordered field layout shared by every record of one table."""
+
+    __slots__ = ("schema_id", "name", "fields", "positions", "full_mask")
+
+    def __init__(self, schema_id: int, name: str, fields: Tuple[str, ...]) -> None:
+        if len(fields) > 16:
+            raise ValueError("schemas support at most 16 fields")
+        self.schema_id = schema_id
+        self.name = name
+        self.fields = tuple(fields)
+        self.positions: Dict[str, int] = {field: idx for idx, field in enumerate(self.fields)}
+        self.full_mask = (1 << len(self.fields)) - 1
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Schema):
+            return NotImplemented
+        return (self.schema_id, self.name, self.fields) == (other.schema_id, other.name, other.fields)
+
+    def __hash__(self) -> int:
+        return hash((self.schema_id, self.name, self.fields))
+
+    def __repr__(self) -> str:
+        return f"Schema(schema_id={self.schema_id!r}, name={self.name!r}, fields={self.fields!r})"
+
+
+NPANXX_SCHEMA = Schema(1, "npanxx", NPANXX_FIELDS)
+OCN_SCHEMA = Schema(2, "ocn", OCN_FIELDS)
+RESOLVED_SCHEMA = Schema(3, "resolved", RESOLVED_FIELDS)
+OVERRIDE_SCHEMA = Schema(4, "override", OVERRIDE_FIELDS)
+
+_ALL_SCHEMAS = (NPANXX_SCHEMA, OCN_SCHEMA, RESOLVED_SCHEMA, OVERRIDE_SCHEMA)
+SCHEMAS: Dict[int, Schema] = {schema.schema_id: schema for schema in _ALL_SCHEMAS}
+TABLE_SCHEMAS: Dict[str, Schema] = {schema.name: schema for schema in _ALL_SCHEMAS}
+KEY_PREFIX_SCHEMAS: Dict[str, Schema] = {f"{name}:": schema for name, schema in TABLE_SCHEMAS.items()}
+
+_LENGTH_STRUCTS: Dict[Tuple[bool, int], struct.Struct] = {}
+
+
+def _lengths_struct(wide: bool, count: int) -> struct.Struct:
+    packer = _LENGTH_STRUCTS.get((wide, count))
+    if packer is None:
+        packer = struct.Struct(f"<{count}{'H' if wide else 'B'}")
+        _LENGTH_STRUCTS[(wide, count)] = packer
+    return packer
+
+
+def schema_for_key(key: str) -> Optional[Schema]:
+    for prefix, schema in KEY_PREFIX_SCHEMAS.items():
+        if key.startswith(prefix):
+            return schema
+    return None
+
+
+def is_binary(raw: bytes) -> bool:
+    return raw[:1] == _VERSION_BYTE
+
+
+def encode_json(mapping: Dict[str, str]) -> bytes:
+    import json
+
+    return json.dumps(mapping, ensure_ascii=False).encode("utf-8")
+
+
+def encode_record(mapping: Dict[str, str], schema: Optional[Schema]) -> bytes:
+    """Encode ``mapping`` with ``schema``, falling back to JSON when it does not fit."""
+    if schema is None:
+        return encode_json(mapping)
+    if tuple(mapping) == schema.fields:
+        # Fast path for complete records built in schema order (the importers).
+        present = schema.full_mask
+        values: Iterable[str] = mapping.values()
+    else:
+        positions = schema.positions
+        try:
+            names = sorted(mapping, key=positions.__getitem__)
+        except KeyError:
+            return encode_json(mapping)
+        present = sum(1 << positions[name] for name in names)
+        values = [mapping[name] for name in names]
+    try:
+        parts = [value.encode("utf-8") for value in values]
+    except AttributeError:
+        return encode_json(mapping)
+    lengths = [len(part) for part in parts]
+    longest = max(lengths, default=0)
+    if longest > 0xFFFF:
+        return encode_json(mapping)
+    wide = longest > 0xFF
+    header = _HEADER.pack(FORMAT_VERSION, schema.schema_id, FLAG_WIDE if wide else 0, present)
+    return header + _lengths_struct(wide, len(parts)).pack(*lengths) + b"".join(parts)
+
+
+class _Layout(NamedTuple):
+    """Decoding plan for one (schema, flags, present) header, cached by header bytes."""
+
+    names: Tuple[str, ...]
+    ranks: Dict[str, int]
+    lengths: struct.Struct
+    data_start: int
+
+
+_LAYOUTS: Dict[bytes, _Layout] = {}
+
+
+def _layout(header: bytes) -> _Layout:
+    layout = _LAYOUTS.get(header)
+    if layout is None:
+        version, schema_id, flags, present = _HEADER.unpack(header)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported record format version: {version}")
+        schema = SCHEMAS[schema_id]
+        names = tuple(name for idx, name in enumerate(schema.fields) if present >> idx & 1)
+        lengths = _lengths_struct(bool(flags & FLAG_WIDE), len(names))
+        layout = _Layout(names, {name: rank for rank, name in enumerate(names)}, lengths, _HEADER.size + lengths.size)
+        _LAYOUTS[header] = layout
+    return layout
+
+
+def _decode_binary(raw: bytes, wanted: Optional[Iterable[str]]) -> Dict[str, str]:
+    layout = _layout(raw[: _HEADER.size])
+    lengths = layout.lengths.unpack_from(raw, _HEADER.size)
+    if wanted is None:
+        mapping: Dict[str, str] = {}
+        start = layout.data_start
+        for name, length in zip(layout.names, lengths):
+            end = start + length
+            mapping[name] = raw[start:end].decode("utf-8")
+            start = end
+        return mapping
+    result: Dict[str, str] = {}
+    ranks = layout.ranks
+    for name in wanted:
+        rank = ranks.get(name)
+        if rank is None:
+            continue
+        start = layout.data_start + sum(lengths[:rank])
+        result[name] = raw[start : start + lengths[rank]].decode("utf-8")
+    return result
+
+
+def decode_record(raw: bytes | None, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+    """Decode a stored value; ``fields`` restricts the result to those names."""
+    if not raw:
+        return {}
+    try:
+        if is_binary(raw):
+            return _decode_binary(raw, fields)
+        import json  # only legacy JSON records need it
+
+        mapping = json.loads(raw.decode("utf-8"))
+    except (ValueError, KeyError, struct.error):
+        return {}
+    if fields is None:
+        return mapping
+    return {name: mapping[name] for name in fields if name in mapping}
@@ -0,0 +1,261 @@
+"""Line-protocol lookup daemon served over a Unix domain socket.
+
+Protocol: clients send one phone number per ``\\n``-terminated line and may
+send any number of lines before reading.  The daemon answers every line, in
+order, with one tab-separated line of :class:`~phone_lookup.lookup.LookupResult`
+fields::
+
+    <original>\\t<normalized>\\t<ltype>\\t<common_name>\\t<found: 1|0>
+
+``normalized`` is empty for invalid numbers; tabs and line breaks inside
+fields are replaced by spaces.  A line longer than :data:`MAX_LINE_BYTES` is
+answered with ``ERR line too long`` and the connection is closed.
+
+The lines a connection has pipelined are resolved in batches of up to
+``max_batch`` numbers on a thread pool through the HTTP server's
+:class:`~phone_lookup.server.MicroBatcher`, so a slow read (a cold page, the
+SQLite backend) never stalls the event loop and the other clients.  A
+connection with :data:`MAX_QUEUED_BATCHES` batches waiting is not read from
+until they are answered.  See :mod:`phone_lookup.client` for the Python client.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import stat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, List, Optional, Set, Union
+
+from .defaults import DEFAULT_THREADS
+from .lookup import DEFAULT_CHUNK_SIZE, LookupEngine, LookupResult, run_lookup
+from .server import REFRESH_INTERVAL, MicroBatcher, report_error
+from .store import PhoneLookupStore
+
+MAX_LINE_BYTES = 1024
+MAX_QUEUED_BATCHES = 4
+SHUTDOWN_TIMEOUT = 5.0
+_FIELD_BREAKS = str.maketrans({"\t": " ", "\n": " ", "\r": " "})
+
+
+def format_result_line(result: LookupResult) -> bytes:
+    fields = (result.original, result.normalized or "", result.ltype, result.common_name)
+    line = "\t".join(field.translate(_FIELD_BREAKS) for field in fields)
+    return f"{line}\t{int(result.found)}\n".encode("utf-8")
+
+
+@dataclass
+class DaemonStats:
+    connections: int = 0
+    batches: int = 0
+    numbers: int = 0
+
+
+class _LookupProtocol(asyncio.Protocol):
+    """One client connection; complete lines are queued and answered in order."""
+
+    def __init__(self, daemon: "LookupDaemon"):
+        self._daemon = daemon
+        self._pending = b""
+        self._transport: Optional[asyncio.Transport] = None
+        # Batches of numbers waiting for an answer; ``None`` answers an overlong line and ends the connection.
+        self._batches: Deque[Optional[List[str]]] = deque()
+        self._answering: Optional[asyncio.Task[None]] = None
+        self._writing_paused = False
+        self._reading = True
+        self._closing = False
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self._transport = transport  # type: ignore[assignment]
+        self._daemon._connections.add(self)
+        self._daemon.stats.connections += 1
+
+    def data_received(self, data: bytes) -> None:
+        if self._closing:
+            return
+        lines = (self._pending + data).split(b"\n")
+        self._pending = lines.pop()
+        max_batch = self._daemon.max_batch
+        for start in range(0, len(lines), max_batch):
+            self._batches.append([line.decode("utf-8", "replace").rstrip("\r") for line in lines[start : start + max_batch]])
+        if len(self._pending) > MAX_LINE_BYTES:
+            self._batches.append(None)
+            self._closing = True
+        if self._batches and self._answering is None:
+            self._answering = asyncio.get_running_loop().create_task(self._answer())
+        self._update_reading()
+
+    async def _answer(self) -> None:
+        transport = self._transport
+        assert transport is not None
+        daemon = self._daemon
+        try:
+            while self._batches and not transport.is_closing():
+                numbers = self._batches[0]
+                if numbers is None:
+                    transport.write(b"ERR line too long\n")
+                    break
+                results = await daemon.batcher.submit(numbers)  # type: ignore[union-attr]
+                self._batches.popleft()
+                daemon.stats.batches += 1
+                daemon.stats.numbers += len(numbers)
+                if not transport.is_closing():
+                    transport.write(b"".join(format_result_line(result) for result in results))
+                self._update_reading()
+        except Exception as exc:  # pragma: no cover - surfaced to the loop's exception handler
+            report_error("Lookup failed", exc)
+            transport.abort()
+        finally:
+            self._answering = None
+            if self._closing:
+                transport.close()
+
+    def _update_reading(self) -> None:
+        # Stop reading from clients that do not read their answers or queue lines faster than they are answered.
+        reading = not (self._closing or self._writing_paused or len(self._batches) >= MAX_QUEUED_BATCHES)
+        if self._transport is not None and reading != self._reading and not self._transport.is_closing():
+            self._reading = reading
+            if reading:
+                self._transport.resume_reading()
+            else:
+                self._transport.pause_reading()
+
+    def pause_writing(self) -> None:
+        self._writing_paused = True
+        self._update_reading()
+
+    def resume_writing(self) -> None:
+        self._writing_paused = False
+        self._update_reading()
+
+    def close(self) -> None:
+        """Stop reading and close once every line received so far has been answered."""
+        self._closing = True
+        self._update_reading()
+        if self._answering is None and self._transport is not None:
+            self._transport.close()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self._daemon._connections.discard(self)
+        self._batches.clear()
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+
+class LookupDaemon:
+    """Serve lookups from one warm store to any number of local connections.
+
+    ``store`` may be ``None`` for engines that answer without one (``mmap``).
+    """
+
+    def __init__(
+        self,
+        store: Optional[PhoneLookupStore],
+        source: Union[PhoneLookupStore, LookupEngine, None] = None,
+        *,
+        max_batch: int = DEFAULT_CHUNK_SIZE,
+        threads: int = DEFAULT_THREADS,
+    ):
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self.store = store
+        self.source = source if source is not None else store
+        self.max_batch = max_batch
+        self.stats = DaemonStats()
+        self.path: Optional[Path] = None
+        self.batcher: Optional[MicroBatcher] = None
+        self._threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._refresher: Optional[asyncio.Task[None]] = None
+        self._connections: Set[_LookupProtocol] = set()
+
+    def resolve(self, numbers: List[str]) -> List[LookupResult]:
+        # Refreshing is coordinated by the daemon so no thread reopens the store under another.
+        return list(run_lookup(self.source, numbers, chunk_size=len(numbers), refresh=False))
+
+    async def start(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        _remove_stale_socket(path)
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self._threads, thread_name_prefix="phone-lookup")
+        self.batcher = MicroBatcher(self.resolve, self._executor, threads=self._threads, max_batch=self.max_batch)
+        self.batcher.start()
+        self._server = await loop.create_unix_server(lambda: _LookupProtocol(self), path=str(path))
+        self.path = path
+        self._refresher = loop.create_task(self._refresh_periodically())
+        return path
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None, "call start() first"
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting, flush the answers to every line received so far, then disconnect."""
+        if self._server is not None:
+            self._server.close()
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+        connections = list(self._connections)
+        for connection in connections:
+            connection.close()
+        if connections:
+            await asyncio.wait([connection.closed for connection in connections], timeout=SHUTDOWN_TIMEOUT)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        if self.batcher is not None:
+            await self.batcher.close()
+            self.batcher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.path is not None:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    async def _refresh_periodically(self) -> None:
+        assert self.batcher is not None
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            try:
+                await self.batcher.exclusive(self.source.refresh)
+            except Exception as exc:
+                report_error("Refreshing the lookup source failed", exc)
+
+
+def _remove_stale_socket(path: Path) -> None:
+    """Unlink a socket left behind by a daemon that died; refuse to replace anything else."""
+    try:
+        mode = path.stat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.unlink(path)
+    else:
+        raise FileExistsError(f"Another daemon is listening on {path}")
+    finally:
+        probe.close()
+
+
+async def serve(daemon: LookupDaemon, path: Union[str, Path], *, ready: Callable[[Path], None]) -> None:
+    """Run ``daemon`` until cancelled, then shut it down gracefully."""
+    bound = await daemon.start(path)
+    ready(bound)
+    try:
+        await daemon.serve_forever()
+    finally:
+        await daemon.close()
@@ -0,0 +1,14 @@
+"""Defaults of optional subsystems, importable without loading them.
+
+The CLI builds every subcommand's arguments up front; keeping these here
+means ``phone-lookup lookup`` never imports the importer or asyncio just to
+show their defaults in ``--help``.
+"""
+
+# Importer: approximate CSV bytes handed to a parser process at a time.
+DEFAULT_BATCH_BYTES = 4 << 20
+
+# HTTP service.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_THREADS = 1
@@ -0,0 +1,208 @@
+"""Incremental imports that write only the rows that changed.
+
+Every stored record is fingerprinted with an 8-byte BLAKE2b digest of its
+encoded value.  The digests are kept in a ``row-hashes`` sidecar next to the
+LMDB environment, stamped with the ID of the write transaction that produced
+them.  When the stamp no longer matches the store (another writer ran, or the
+sidecar is missing), the digests are recomputed from the stored values, so a
+stale sidecar costs a scan but never a wrong diff.
+
+Additions, updates and removals for all tables are applied in a single write
+transaction, so readers see the previous or the new data and nothing between.
+The derived ``resolved`` table is then updated for the exchanges whose NPANXX
+rows changed, or rebuilt when OCN rows changed; any change to the tables also
+rebuilds the override Bloom filter stored in it.  Until that finishes, readers
+see it as stale and resolve from the source tables.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .defaults import DEFAULT_BATCH_BYTES
+from .importer import TABLES, encode_table
+from .instrumentation import DERIVE, DIFF, HASHES, PARSE, WRITE, StageStats
+from .keys import NPANXX_TABLE, OCN_TABLE, OVERRIDE_TABLE, unpack_npanxx
+from .store import EncodedItem, PhoneLookupStore
+
+SIDECAR_NAME = "row-hashes"
+SIDECAR_MAGIC = b"PLRH"
+SIDECAR_VERSION = 2
+DIGEST_SIZE = 8
+_SIDECAR_HEADER = struct.Struct("<4sBQI")
+_KEY_LENGTH = struct.Struct("<H")
+
+RowHashes = Dict[bytes, bytes]
+
+
+@dataclass(frozen=True)
+class DeltaStats:
+    """Per-table outcome of :func:`delta_import`."""
+
+    table: str
+    added: int
+    changed: int
+    removed: int
+    unchanged: int
+
+    @property
+    def written(self) -> int:
+        return self.added + self.changed + self.removed
+
+
+def row_hash(value: bytes) -> bytes:
+    return hashlib.blake2b(value, digest_size=DIGEST_SIZE).digest()
+
+
+def read_sidecar(path: Path) -> Tuple[int, RowHashes] | None:
+    """Return ``(transaction id, hashes)`` from ``path``; ``None`` if missing or unreadable."""
+    try:
+        data = Path(path).read_bytes()
+    except FileNotFoundError:
+        return None
+    try:
+        magic, version, txn_id, count = _SIDECAR_HEADER.unpack_from(data)
+    except struct.error:
+        return None
+    if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+        return None
+    hashes: RowHashes = {}
+    offset = _SIDECAR_HEADER.size
+    try:
+        for _ in range(count):
+            (length,) = _KEY_LENGTH.unpack_from(data, offset)
+            offset += _KEY_LENGTH.size
+            key = data[offset : offset + length]
+            offset += length
+            hashes[key] = data[offset : offset + DIGEST_SIZE]
+            offset += DIGEST_SIZE
+    except struct.error:
+        return None
+    if offset != len(data):
+        return None
+    return txn_id, hashes
+
+
+def write_sidecar(path: Path, txn_id: int, hashes: RowHashes) -> None:
+    """Atomically replace ``path`` with ``hashes`` stamped with ``txn_id``."""
+    path = Path(path)
+    parts = [_SIDECAR_HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, txn_id, len(hashes))]
+    for key, digest in hashes.items():
+        parts.append(_KEY_LENGTH.pack(len(key)))
+        parts.append(key)
+        parts.append(digest)
+    staging = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    staging.write_bytes(b"".join(parts))
+    os.replace(staging, path)
+
+
+def _hash_prefix(table: str) -> bytes:
+    """Sidecar keys are the table name, ``:`` and the packed table key."""
+    return f"{table}:".encode("utf-8")
+
+
+def _sidecar_path(store: PhoneLookupStore) -> Optional[Path]:
+    return store.path / SIDECAR_NAME if store.path is not None else None
+
+
+def stored_hashes(store: PhoneLookupStore) -> RowHashes:
+    """Digests of the stored records of every table, from the sidecar when it is current."""
+    sidecar = _sidecar_path(store)
+    loaded = read_sidecar(sidecar) if sidecar is not None else None
+    if loaded is not None and loaded[0] == store.last_transaction_id():
+        return loaded[1]
+    hashes: RowHashes = {}
+    for table in TABLES:
+        prefix = _hash_prefix(table)
+        for key, value in store.iterate_encoded(table):
+            hashes[prefix + key] = row_hash(value)
+    return hashes
+
+
+def delta_import(
+    store: PhoneLookupStore,
+    npanxx_path: Path,
+    ocn_path: Path,
+    *,
+    workers: int = 1,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+    stats: Optional[StageStats] = None,
+    override_path: Optional[Path] = None,
+) -> List[DeltaStats]:
+    """Bring ``store`` in line with the CSVs by writing only the rows that differ.
+
+    Each feed is treated as the complete table: keys absent from it are deleted.
+    Without ``override_path`` the stored overrides are left as they are.
+    """
+    clock = time.perf_counter
+    start = clock()
+    resolved = store.resolved_is_current()
+    previous = stored_hashes(store)
+    if stats is not None:
+        stats.add(HASHES, clock() - start, len(previous))
+    current: RowHashes = {}
+    puts: Dict[str, List[EncodedItem]] = {}
+    deletes: Dict[str, List[bytes]] = {}
+    results: List[DeltaStats] = []
+    feeds = [(NPANXX_TABLE, npanxx_path), (OCN_TABLE, ocn_path)]
+    if override_path is not None:
+        feeds.append((OVERRIDE_TABLE, override_path))
+    else:
+        prefix = _hash_prefix(OVERRIDE_TABLE)
+        current.update((key, digest) for key, digest in previous.items() if key.startswith(prefix))
+    for table, path in feeds:
+        start = clock()
+        # dict() keeps the last value for duplicate keys, like the full imports.
+        rows = dict(encode_table(table, path, workers=workers, batch_bytes=batch_bytes))
+        parsed = clock()
+        prefix = _hash_prefix(table)
+        changes: List[EncodedItem] = []
+        added = changed = unchanged = 0
+        for key, value in rows.items():
+            digest = row_hash(value)
+            current[prefix + key] = digest
+            before = previous.get(prefix + key)
+            if before == digest:
+                unchanged += 1
+                continue
+            if before is None:
+                added += 1
+            else:
+                changed += 1
+            changes.append((key, value))
+        changes.sort()
+        puts[table] = changes
+        deletes[table] = [
+            key[len(prefix) :] for key in previous if key.startswith(prefix) and key[len(prefix) :] not in rows
+        ]
+        results.append(DeltaStats(table, added, changed, len(deletes[table]), unchanged))
+        if stats is not None:
+            stats.add(PARSE, parsed - start, len(rows))
+            stats.add(DIFF, clock() - parsed, len(rows))
+
+    start = clock()
+    if any(puts.values()) or any(deletes.values()):
+        store.apply_changes(puts, deletes)
+    written = clock()
+    if not resolved or puts[OCN_TABLE] or deletes[OCN_TABLE]:
+        derived = store.rebuild_resolved()
+    elif any(puts.values()) or any(deletes.values()):
+        # Only the changed exchanges; with override changes alone that is none, but the filter is rebuilt.
+        keys = [key for key, _ in puts[NPANXX_TABLE]] + deletes[NPANXX_TABLE]
+        derived = store.rebuild_resolved(unpack_npanxx(key)[0] for key in keys)
+    else:
+        derived = 0
+    # Stamped after the resolved table, which only changes derived data.
+    txn_id = store.last_transaction_id()
+    sidecar = _sidecar_path(store)
+    if sidecar is not None:
+        write_sidecar(sidecar, txn_id, current)
+    if stats is not None:
+        stats.add(WRITE, written - start, sum(result.written for result in results))
+        stats.add(DERIVE, clock() - written, derived)
+    return results
@@ -0,0 +1,48 @@
+"""Selection of the lookup engine used by the CLI and worker processes."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Union
+
+from .keys import OVERRIDE_TABLE
+from .lookup import LookupEngine, OverriddenEngine
+from .store import PhoneLookupStore
+
+ENGINES = ("lmdb", "memory", "mmap")
+DEFAULT_ENGINE = "lmdb"
+# Engines that answer from a file alone and never open the store.
+STORELESS_ENGINES = ("mmap",)
+
+
+def create_engine(
+    name: str,
+    store: Optional[PhoneLookupStore],
+    *,
+    index_snapshot: Optional[Path] = None,
+    snapshot: Optional[Path] = None,
+) -> Union[PhoneLookupStore, LookupEngine]:
+    """Return what :func:`~phone_lookup.lookup.run_lookup` should resolve against.
+
+    ``lmdb`` reads the store directly.  ``memory`` loads ``index_snapshot`` when
+    one is given and otherwise builds the in-memory index from ``store``; it is
+    wrapped in an :class:`~phone_lookup.lookup.OverriddenEngine` when the store
+    has overrides.  ``mmap`` maps ``snapshot`` (written by ``export-snapshot``,
+    overrides included) and needs no store.
+    """
+    if name == "mmap":
+        from .snapshot import SnapshotIndex
+
+        if snapshot is None:
+            raise ValueError("The mmap engine needs a snapshot file")
+        return SnapshotIndex(snapshot)
+    if name not in ENGINES:
+        raise ValueError(f"Unknown lookup engine: {name}")
+    if store is None:
+        raise ValueError(f"The {name} engine needs an open store")
+    if name == "lmdb":
+        return store
+    from .memory_index import MemoryIndex
+
+    # A missing snapshot raises FileNotFoundError rather than silently rebuilding the index.
+    index = MemoryIndex.load(index_snapshot) if index_snapshot is not None else MemoryIndex.build(store)
+    return OverriddenEngine(index, store) if store.count(OVERRIDE_TABLE) else index
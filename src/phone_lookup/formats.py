@@ -0,0 +1,189 @@
+"""Output formats and column selection for ``phone-lookup lookup``.
+
+Result columns come straight from :class:`~phone_lookup.lookup.LookupResult`
+and use the names of the HTTP service's JSON.  Every stored NPANXX and OCN
+field can be selected too; those are decoded only when requested (see
+:func:`~phone_lookup.lookup.run_record_lookup`).
+
+A formatter turns one ``(result, record)`` pair into what the output accepts:
+a text line for ``line``, ``csv`` and ``jsonl``, or a row of values for the
+``parquet`` sink.  ``parquet`` needs the optional ``pyarrow`` dependency
+(``pip install 'phone-lookup[parquet]'``).
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from .codec import NPANXX_FIELDS, OCN_FIELDS
+from .lookup import LookupResult, format_line_type
+from .streams import open_output
+
+OUTPUT_FORMATS = ("line", "csv", "jsonl", "parquet")
+DEFAULT_FORMAT = "line"
+
+RESULT_FIELDS = ("number", "normalized", "ltype", "line_type", "carrier", "found")
+RECORD_FIELDS = NPANXX_FIELDS + OCN_FIELDS
+
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+Record = Mapping[str, str]
+Getter = Callable[[LookupResult, Record], Any]
+Formatter = Callable[[LookupResult, Record], Any]
+
+_RESULT_GETTERS: Dict[str, Getter] = {
+    "number": lambda result, record: result.original,
+    "normalized": lambda result, record: result.normalized,
+    "ltype": lambda result, record: result.ltype,
+    "line_type": lambda result, record: format_line_type(result.ltype),
+    "carrier": lambda result, record: result.common_name,
+    "found": lambda result, record: result.found,
+}
+
+
+class FieldSelection(NamedTuple):
+    """Output columns, plus the stored NPANXX and OCN fields they need."""
+
+    columns: Tuple[str, ...]
+    npanxx: Tuple[str, ...] = ()
+    ocn: Tuple[str, ...] = ()
+
+    @property
+    def needs_records(self) -> bool:
+        return bool(self.npanxx or self.ocn)
+
+
+DEFAULT_SELECTION = FieldSelection(RESULT_FIELDS)
+
+
+def parse_fields(spec: Optional[str]) -> FieldSelection:
+    """Parse a comma-separated ``--fields`` value; ``None`` selects the result columns."""
+    if spec is None:
+        return DEFAULT_SELECTION
+    columns = tuple(name.strip() for name in spec.split(",") if name.strip())
+    if not columns:
+        raise ValueError("no fields selected")
+    unknown = [name for name in columns if name not in _RESULT_GETTERS and name not in RECORD_FIELDS]
+    if unknown:
+        choices = ", ".join((*RESULT_FIELDS, *RECORD_FIELDS))
+        raise ValueError(f"unknown field(s) {', '.join(unknown)}; choose from {choices}")
+    duplicates = sorted({name for name in columns if columns.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate field(s) {', '.join(duplicates)}")
+    npanxx = tuple(name for name in columns if name in NPANXX_FIELDS)
+    ocn = tuple(name for name in columns if name in OCN_FIELDS)
+    return FieldSelection(columns, npanxx, ocn)
+
+
+def _getters(columns: Sequence[str]) -> List[Getter]:
+    getters = []
+    for name in columns:
+        getter = _RESULT_GETTERS.get(name)
+        if getter is None:
+            getter = lambda result, record, name=name: record.get(name, "")  # noqa: E731
+        getters.append(getter)
+    return getters
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if value is True:
+        return "1"
+    if value is False:
+        return "0"
+    return value
+
+
+def _csv_field(value: str) -> str:
+    # RFC 4180 minimal quoting; avoids loading the csv module on every lookup.
+    if '"' in value or "," in value or "\n" in value or "\r" in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def csv_line(values: Sequence[str]) -> str:
+    return ",".join(_csv_field(value) for value in values) + "\n"
+
+
+def create_formatter(fmt: str, selection: FieldSelection, *, explicit: bool = True) -> Formatter:
+    """Return the per-result formatter for ``fmt``.
+
+    Without ``explicit`` field selection, ``line`` keeps its historical
+    ``number:LTYPE:CommonName`` layout.
+    """
+    if fmt == "line" and not explicit:
+        return lambda result, record: result.as_output_line() + "\n"
+    getters = _getters(selection.columns)
+    if fmt == "line":
+        return lambda result, record: ":".join([_text(get(result, record)) for get in getters]) + "\n"
+    if fmt == "csv":
+        return lambda result, record: csv_line([_text(get(result, record)) for get in getters])
+    if fmt == "jsonl":
+        import json
+
+        columns = selection.columns
+        dumps = json.JSONEncoder(ensure_ascii=False).encode
+        return lambda result, record: dumps(dict(zip(columns, [get(result, record) for get in getters]))) + "\n"
+    if fmt == "parquet":
+        return lambda result, record: [get(result, record) for get in getters]
+    raise ValueError(f"Unknown output format: {fmt}")
+
+
+def parquet_available() -> bool:
+    import importlib.util
+
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+class ParquetSink:
+    """Buffers rows and writes them to a Parquet file one row group at a time."""
+
+    def __init__(self, path: Path, columns: Sequence[str], *, row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        if not parquet_available():
+            raise RuntimeError("Parquet output requires pyarrow (pip install 'phone-lookup[parquet]')")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.columns = tuple(columns)
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([(name, pa.bool_() if name == "found" else pa.string()) for name in self.columns])
+        self._writer = pq.ParquetWriter(str(path), self.schema)
+        self._rows: List[Sequence[Any]] = []
+
+    def write(self, row: Sequence[Any]) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        arrays = [self._pa.array(values, type=field.type) for values, field in zip(zip(*self._rows), self.schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self.schema))
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+
+@contextmanager
+def open_result_output(fmt: str, path: Path, selection: FieldSelection) -> Iterator[Any]:
+    """Open ``path`` for ``fmt`` output and yield an object with a ``write`` method.
+
+    CSV output starts with a header row.  Parquet needs a regular file path.
+    """
+    if fmt == "parquet":
+        sink = ParquetSink(path, selection.columns)
+        try:
+            yield sink
+        finally:
+            sink.close()
+        return
+    with open_output(path) as handle:
+        if fmt == "csv":
+            handle.write(csv_line(selection.columns))
+        yield handle
@@ -0,0 +1,115 @@
+"""Versioned store directories published through an atomic ``CURRENT`` pointer.
+
+A generational database root looks like::
+
+    data/store/
+        CURRENT                     # name of the live generation
+        generations/
+            20261017T120000123456Z/ # one complete LMDB environment each
+            20261018T120000654321Z/
+
+Imports build a new generation beside the live one and publish it by
+replacing ``CURRENT`` with :func:`os.replace`, which is atomic on POSIX and
+Windows alike.  Roots without a ``CURRENT`` file are plain LMDB environments
+(the layout used before generations existed) and keep working unchanged.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+CURRENT_FILE = "CURRENT"
+GENERATIONS_DIR = "generations"
+DEFAULT_KEEP_GENERATIONS = 2
+
+
+def generations_dir(root: Path) -> Path:
+    return Path(root) / GENERATIONS_DIR
+
+
+def current_generation(root: Path) -> Optional[str]:
+    """Name of the published generation under ``root``; ``None`` for legacy roots."""
+    try:
+        name = (Path(root) / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+
+def generation_path(root: Path, generation: Optional[str]) -> Path:
+    """Directory of ``generation``, or ``root`` itself when there is none."""
+    if generation is None:
+        return Path(root)
+    return generations_dir(root) / generation
+
+
+def new_generation(root: Path) -> Path:
+    """Create and return an empty directory for the next generation."""
+    from datetime import datetime, timezone
+
+    parent = generations_dir(root)
+    parent.mkdir(parents=True, exist_ok=True)
+    name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    for attempt in range(100):
+        path = parent / (name if attempt == 0 else f"{name}-{attempt}")
+        try:
+            path.mkdir()
+        except FileExistsError:
+            continue
+        return path
+    raise FileExistsError(f"Could not allocate a generation directory under {parent}")
+
+
+def list_generations(root: Path) -> List[str]:
+    """Generation names under ``root``, oldest first."""
+    parent = generations_dir(root)
+    if not parent.is_dir():
+        return []
+    return sorted(entry.name for entry in parent.iterdir() if entry.is_dir())
+
+
+def publish_generation(root: Path, generation: str) -> None:
+    """Atomically point ``root``'s ``CURRENT`` file at ``generation``."""
+    root = Path(root)
+    if not generation_path(root, generation).is_dir():
+        raise FileNotFoundError(f"Generation does not exist: {generation}")
+    staging = root / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+    with staging.open("w", encoding="utf-8") as handle:
+        handle.write(f"{generation}\n")
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(staging, root / CURRENT_FILE)
+    _fsync_directory(root)
+
+
+def prune_generations(root: Path, *, keep: int = DEFAULT_KEEP_GENERATIONS) -> List[str]:
+    """Remove all but the newest ``keep`` generations, never the published one.
+
+    Readers still mapping a removed generation keep working on POSIX until they
+    reopen; on platforms that refuse to delete open files the directory is left
+    for the next prune.  Returns the names that were removed.
+    """
+    import shutil
+
+    if keep <= 0:
+        raise ValueError("keep must be positive")
+    current = current_generation(root)
+    removed: List[str] = []
+    for name in list_generations(root)[:-keep]:
+        if name == current:
+            continue
+        shutil.rmtree(generation_path(root, name), ignore_errors=True)
+        if not generation_path(root, name).exists():
+            removed.append(name)
+    return removed
+
+
+def _fsync_directory(path: Path) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -2,61 +2,357 @@
 from __future__ import annotations
 
 import csv
+import shutil
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import IO, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence
 
-from .store import PhoneLookupStore
+from .codec import NPANXX_FIELDS, OCN_FIELDS, OVERRIDE_FIELDS
+from .defaults import DEFAULT_BATCH_BYTES
+from .generations import DEFAULT_KEEP_GENERATIONS, new_generation, prune_generations, publish_generation
+from .instrumentation import DERIVE, PARSE, PUBLISH, SORT, VERIFY, WRITE, StageStats
+from .keys import NPANXX_TABLE, OCN_TABLE, OVERRIDE_TABLE, join_key, pack_npanxx, pack_number, pack_ocn
+from .lookup import normalize_number
+from .store import EncodedItem, PhoneLookupStore, encode_value
 
 
-def load_npanxx(store: PhoneLookupStore, path: Path, batch: int = 10_000) -> None:
+def npanxx_key(row: Dict[str, str]) -> bytes:
+    """Packed key of an NPANXX row; ``ValueError`` if NPA, NXX or block are malformed."""
+    return pack_npanxx(f"{row['NPA']}{row['NXX']}", row["BLOCK_ID"])
+
+
+def ocn_key(row: Dict[str, str]) -> bytes:
+    return pack_ocn(row["OCN"])
+
+
+def override_key(row: Dict[str, str]) -> bytes:
+    """Packed key of an override row; its ``NUMBER`` may use any format :func:`normalize_number` accepts."""
+    digits = normalize_number(row.get("NUMBER") or "")
+    if digits is None:
+        raise ValueError(f"Invalid number: {row.get('NUMBER')!r}")
+    return pack_number(digits)
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    name: str
+    key: Callable[[Dict[str, str]], bytes]
+    fields: Sequence[str]
+
+
+TABLES: Dict[str, TableSpec] = {
+    NPANXX_TABLE: TableSpec(NPANXX_TABLE, npanxx_key, NPANXX_FIELDS),
+    OCN_TABLE: TableSpec(OCN_TABLE, ocn_key, OCN_FIELDS),
+    OVERRIDE_TABLE: TableSpec(OVERRIDE_TABLE, override_key, OVERRIDE_FIELDS),
+}
+# Every import needs these; the override feed is optional.
+REQUIRED_TABLES = (NPANXX_TABLE, OCN_TABLE)
+
+
+@dataclass(frozen=True)
+class ImportStats:
+    """Row counts and per-phase timings of one fast import."""
+
+    table: str
+    rows: int
+    written: int
+    parse_seconds: float
+    sort_seconds: float
+    write_seconds: float
+
+    @staticmethod
+    def _rate(rows: int, seconds: float) -> float:
+        return rows / seconds if seconds > 0 else float("inf")
+
+    @property
+    def parse_rate(self) -> float:
+        return self._rate(self.rows, self.parse_seconds)
+
+    @property
+    def sort_rate(self) -> float:
+        return self._rate(self.rows, self.sort_seconds)
+
+    @property
+    def write_rate(self) -> float:
+        return self._rate(self.written, self.write_seconds)
+
+
+def _read_rows(path: Path, spec: TableSpec) -> Iterator[tuple[str, dict[str, str]]]:
+    """Yield ``(table:key, mapping)`` for every row of ``path``, skipping rows without a valid key."""
+    with path.open(newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            try:
+                key = spec.key(row)
+            except ValueError:
+                continue
+            yield join_key(spec.name, key), {field: row.get(field) or "" for field in spec.fields}
+
+
+def _load_table(
+    store: PhoneLookupStore, table: str, path: Path, batch: int, stats: Optional[StageStats]
+) -> None:
+    rows = _read_rows(path, TABLES[table])
+    if stats is None:
+        store.bulk_put(rows, batch_size=batch)
+        return
+    start = time.perf_counter()
+    parsed, parsed_rows = stats.seconds(PARSE), stats.items(PARSE)
+    store.bulk_put(stats.timed(PARSE, rows), batch_size=batch)
+    # bulk_put pulls rows as it goes; whatever was not parsing was encoding and writing.
+    stats.add(WRITE, time.perf_counter() - start - (stats.seconds(PARSE) - parsed), stats.items(PARSE) - parsed_rows)
+
+
+def load_npanxx(store: PhoneLookupStore, path: Path, batch: int = 10_000, stats: Optional[StageStats] = None) -> None:
     """Load NPANXX data into LMDB records."""
+    _load_table(store, NPANXX_TABLE, path, batch, stats)
 
-    def rows() -> Iterable[tuple[str, dict[str, str]]]:
-        with path.open(newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                key = f"npanxx:{row['NPA']}{row['NXX']}:{row['BLOCK_ID']}"
-                yield key, {
-                    "OCN": row.get("OCN", ""),
-                    "LTYPE": row.get("LTYPE", ""),
-                    "NXXTYPE": row.get("NXXTYPE", ""),
-                    "RC": row.get("RC", ""),
-                    "RCLONG": row.get("RCLONG", ""),
-                    "STATE": row.get("STATE", ""),
-                    "COUNTRY": row.get("COUNTRY", ""),
-                    "LATA": row.get("LATA", ""),
-                    "SWITCH": row.get("SWITCH", ""),
-                    "TBP_IND": row.get("TBP_IND", ""),
-                    "ADATE": row.get("ADATE", ""),
-                    "EFFDATE": row.get("EFFDATE", ""),
-                }
-
-    store.bulk_put(rows(), batch_size=batch)
-
-
-def load_ocn(store: PhoneLookupStore, path: Path, batch: int = 5_000) -> None:
+
+def load_ocn(store: PhoneLookupStore, path: Path, batch: int = 5_000, stats: Optional[StageStats] = None) -> None:
     """Load OCN data into LMDB records."""
+    _load_table(store, OCN_TABLE, path, batch, stats)
+
+
+def load_overrides(store: PhoneLookupStore, path: Path, batch: int = 10_000, stats: Optional[StageStats] = None) -> None:
+    """Load exact-number overrides (``NUMBER``, ``OCN``, ``LTYPE`` columns) into LMDB records."""
+    _load_table(store, OVERRIDE_TABLE, path, batch, stats)
+
+
+def _complete_records(handle: IO[str], lines: List[str]) -> List[str]:
+    """Extend ``lines`` until they end outside a quoted field, i.e. on a record boundary."""
+    quotes = sum(line.count('"') for line in lines)
+    while quotes % 2:
+        line = handle.readline()
+        if not line:
+            break
+        lines.append(line)
+        quotes += line.count('"')
+    return lines
+
+
+def _read_batches(path: Path, batch_bytes: int) -> Iterator[tuple[List[str], List[str]]]:
+    """Yield ``(header, lines)`` blocks of roughly ``batch_bytes`` whole CSV records each.
+
+    Blocks only end on a line break outside quotes, so quoted fields may span lines.
+    """
+    with path.open(newline="", encoding="utf-8") as handle:
+        header = _complete_records(handle, [handle.readline()])
+        while True:
+            lines = handle.readlines(batch_bytes)
+            if not lines:
+                return
+            yield header, _complete_records(handle, lines)
+
+
+def _encode_batch(table: str, header: List[str], lines: List[str]) -> List[EncodedItem]:
+    """Parse one block of CSV records and encode its rows (runs in worker processes)."""
+    spec = TABLES[table]
+    columns = next(csv.reader(header), [])
+    fields = spec.fields
+    items: List[EncodedItem] = []
+    for values in csv.reader(lines):
+        row = dict(zip(columns, values))
+        try:
+            key = spec.key(row)
+        except ValueError:
+            continue
+        items.append((key, encode_value(table, {field: row.get(field) or "" for field in fields})))
+    return items
+
+
+def encode_table(
+    table: str,
+    path: Path,
+    *,
+    workers: int = 1,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+) -> List[EncodedItem]:
+    """Parse and encode every row of ``path`` in file order, using ``workers`` processes.
+
+    At most ``workers * 4`` blocks are in flight at once, so the file is read
+    no faster than it is encoded.
+    """
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    if batch_bytes <= 0:
+        raise ValueError("batch_bytes must be positive")
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table}")
+
+    items: List[EncodedItem] = []
+    batches = _read_batches(Path(path), batch_bytes)
+    if workers == 1:
+        for header, lines in batches:
+            items.extend(_encode_batch(table, header, lines))
+    else:
+        max_pending = workers * 4
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Future[List[EncodedItem]]] = deque()
+            for header, lines in batches:
+                pending.append(pool.submit(_encode_batch, table, header, lines))
+                if len(pending) >= max_pending:
+                    items.extend(pending.popleft().result())
+            while pending:
+                items.extend(pending.popleft().result())
+    return items
+
+
+def fast_import(
+    store: PhoneLookupStore,
+    table: str,
+    path: Path,
+    *,
+    workers: int = 1,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+    stats: Optional[StageStats] = None,
+) -> ImportStats:
+    """Import ``path`` into ``table`` with parallel parsing and one sorted write.
+
+    CSV blocks of about ``batch_bytes`` are parsed and encoded by ``workers``
+    processes; the encoded rows are then sorted by key (the last duplicate
+    wins) and written in a single transaction, using LMDB's append mode when
+    the keys sort after everything already stored.  Blocks are split on
+    record boundaries, so quoted fields may contain newlines.
+    """
+    start = time.perf_counter()
+    items = encode_table(table, path, workers=workers, batch_bytes=batch_bytes)
+    parsed = time.perf_counter()
+
+    rows = len(items)
+    # dict() keeps the last value for duplicate keys, matching bulk_put's overwrite order.
+    ordered = sorted(dict(items).items())
+    sorted_at = time.perf_counter()
+
+    written = store.put_sorted(table, ordered)
+    finished = time.perf_counter()
+    result = ImportStats(table, rows, written, parsed - start, sorted_at - parsed, finished - sorted_at)
+    if stats is not None:
+        stats.add(PARSE, result.parse_seconds, rows)
+        stats.add(SORT, result.sort_seconds, rows)
+        stats.add(WRITE, result.write_seconds, written)
+    return result
+
+
+def build_resolved(store: PhoneLookupStore, stats: Optional[StageStats] = None) -> int:
+    """Rebuild the store's derived ``resolved`` table after its source tables changed."""
+    start = time.perf_counter()
+    written = store.rebuild_resolved()
+    if stats is not None:
+        stats.add(DERIVE, time.perf_counter() - start, written)
+    return written
+
+
+def fast_import_all(
+    store: PhoneLookupStore,
+    npanxx_path: Path,
+    ocn_path: Path,
+    *,
+    workers: int = 1,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+    stats: Optional[StageStats] = None,
+    override_path: Optional[Path] = None,
+) -> List[ImportStats]:
+    results = [
+        fast_import(store, "npanxx", npanxx_path, workers=workers, batch_bytes=batch_bytes, stats=stats),
+        fast_import(store, "ocn", ocn_path, workers=workers, batch_bytes=batch_bytes, stats=stats),
+    ]
+    if override_path is not None:
+        results.append(
+            fast_import(store, OVERRIDE_TABLE, override_path, workers=workers, batch_bytes=batch_bytes, stats=stats)
+        )
+    build_resolved(store, stats)
+    return results
+
+
+def import_all(
+    store: PhoneLookupStore,
+    npanxx_path: Path,
+    ocn_path: Path,
+    stats: Optional[StageStats] = None,
+    override_path: Optional[Path] = None,
+) -> None:
+    load_npanxx(store, npanxx_path, stats=stats)
+    load_ocn(store, ocn_path, stats=stats)
+    if override_path is not None:
+        load_overrides(store, override_path, stats=stats)
+    build_resolved(store, stats)
+
+
+@dataclass(frozen=True)
+class GenerationImport:
+    """Outcome of :func:`import_generation`."""
+
+    generation: str
+    path: Path
+    counts: Dict[str, int]
+    stats: List[ImportStats]
+    pruned: List[str]
+
+
+def verify_store(store: PhoneLookupStore) -> Dict[str, int]:
+    """Count the records of every table, raising ``ValueError`` if a required one is empty or the resolved table is stale.
+
+    Optional tables are only counted when they hold records.
+    """
+    counts = {name: store.count(name) for name in TABLES}
+    empty = [name for name in REQUIRED_TABLES if counts[name] == 0]
+    counts = {name: count for name, count in counts.items() if count or name in REQUIRED_TABLES}
+    if empty:
+        raise ValueError(f"Imported store has no records for: {', '.join(empty)}")
+    if not store.resolved_is_current():
+        raise ValueError("Imported store has no current resolved table")
+    return counts
+
+
+def import_generation(
+    root: Path,
+    npanxx_path: Path,
+    ocn_path: Path,
+    *,
+    fast: bool = False,
+    workers: int = 1,
+    batch_bytes: int = DEFAULT_BATCH_BYTES,
+    keep: int = DEFAULT_KEEP_GENERATIONS,
+    stats: Optional[StageStats] = None,
+    override_path: Optional[Path] = None,
+) -> GenerationImport:
+    """Import into a fresh generation under ``root``, verify it and publish it atomically.
 
-    def rows() -> Iterable[tuple[str, dict[str, str]]]:
-        with path.open(newline="", encoding="utf-8") as handle:
-            reader = csv.DictReader(handle)
-            for row in reader:
-                key = f"ocn:{row['OCN']}"
-                yield key, {
-                    "COMPANY": row.get("COMPANY", ""),
-                    "DBA": row.get("DBA", ""),
-                    "CommonName": row.get("CommonName", ""),
-                    "TYPE": row.get("TYPE", ""),
-                    "SMS": row.get("SMS", ""),
-                    "Rural": row.get("Rural", ""),
-                }
-
-    store.bulk_put(rows(), batch_size=batch)
-
-
-def import_all(store: PhoneLookupStore, npanxx_path: Path, ocn_path: Path) -> None:
-    load_npanxx(store, npanxx_path)
-    load_ocn(store, ocn_path)
+    Readers keep using the previous generation until the ``CURRENT`` pointer is
+    swapped; a failed or empty import leaves the live data untouched.
+    """
+    path = new_generation(root)
+    table_stats: List[ImportStats] = []
+    try:
+        with PhoneLookupStore.open(path) as store:
+            if fast:
+                table_stats = fast_import_all(
+                    store,
+                    npanxx_path,
+                    ocn_path,
+                    workers=workers,
+                    batch_bytes=batch_bytes,
+                    stats=stats,
+                    override_path=override_path,
+                )
+            else:
+                import_all(store, npanxx_path, ocn_path, stats=stats, override_path=override_path)
+        start = time.perf_counter()
+        with PhoneLookupStore.open(path, readonly=True) as store:
+            counts = verify_store(store)
+        verified = time.perf_counter()
+        publish_generation(root, path.name)
+        if stats is not None:
+            stats.add(VERIFY, verified - start, sum(counts.values()))
+            stats.add(PUBLISH, time.perf_counter() - verified)
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    pruned = prune_generations(root, keep=keep)
+    return GenerationImport(path.name, path, counts, table_stats, pruned)
 
 
 def ensure_paths_exist(paths: Iterable[Path]) -> None:
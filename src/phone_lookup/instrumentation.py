@@ -0,0 +1,122 @@
+"""Opt-in per-stage timing for lookups and imports.
+
+Code paths take an optional :class:`StageStats`; when it is ``None`` they run
+their normal loop untouched, so leaving instrumentation support in costs a
+single ``is None`` check per call.  When enabled, stages are timed with
+:func:`time.perf_counter` per chunk where possible and per item only where a
+stage cannot be separated otherwise (store reads, output formatting).
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+
+# Lookup stages.
+INPUT = "input"
+NORMALIZE = "normalize"
+LMDB_GET = "lmdb_get"
+DECODE = "decode"
+CARRIER = "carrier"
+RESOLVE = "resolve"
+FORMAT = "format"
+WRITE = "write"
+# Import stages.
+PARSE = "parse"
+SORT = "sort"
+HASHES = "hashes"
+DIFF = "diff"
+DERIVE = "derive"
+VERIFY = "verify"
+PUBLISH = "publish"
+
+STATS_FORMATS = ("table", "json")
+
+T = TypeVar("T")
+
+
+class StageStats:
+    """Wall time and item counts accumulated per named stage, in first-seen order."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._seconds: Dict[str, float] = {}
+        self._items: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float, items: int = 0) -> None:
+        self._seconds[stage] = self._seconds.get(stage, 0.0) + seconds
+        self._items[stage] = self._items.get(stage, 0) + items
+
+    def seconds(self, stage: str) -> float:
+        return self._seconds.get(stage, 0.0)
+
+    def items(self, stage: str) -> int:
+        return self._items.get(stage, 0)
+
+    @property
+    def stages(self) -> list[str]:
+        return list(self._seconds)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @contextmanager
+    def time(self, stage: str, items: int = 0) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, items)
+
+    def timed(self, stage: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from ``iterable``, charging the time spent producing each item to ``stage``."""
+        clock = time.perf_counter
+        iterator = iter(iterable)
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, clock() - start)
+                return
+            self.add(stage, clock() - start, 1)
+            yield item
+
+    def merge(self, other: "StageStats") -> None:
+        for stage in other.stages:
+            self.add(stage, other.seconds(stage), other.items(stage))
+
+    def as_dict(self, elapsed: Optional[float] = None) -> Dict[str, object]:
+        elapsed = self.elapsed if elapsed is None else elapsed
+        return {
+            "elapsed": round(elapsed, 6),
+            "stages": [
+                {
+                    "stage": stage,
+                    "seconds": round(seconds, 6),
+                    "items": self._items[stage],
+                    "share": round(seconds / elapsed, 4) if elapsed > 0 else 0.0,
+                    "us_per_item": round(seconds / self._items[stage] * 1e6, 3) if self._items[stage] else None,
+                }
+                for stage, seconds in self._seconds.items()
+            ],
+        }
+
+    def format_table(self, elapsed: Optional[float] = None) -> str:
+        data = self.as_dict(elapsed)
+        lines = [f"{'stage':<10} {'seconds':>10} {'share':>7} {'items':>12} {'us/item':>10}"]
+        for row in data["stages"]:  # type: ignore[union-attr]
+            per_item = "" if row["us_per_item"] is None else f"{row['us_per_item']:.3f}"
+            lines.append(
+                f"{row['stage']:<10} {row['seconds']:>10.4f} {row['share']:>7.1%} {row['items']:>12} {per_item:>10}"
+            )
+        lines.append(f"{'elapsed':<10} {data['elapsed']:>10.4f}")
+        return "\n".join(lines)
+
+    def render(self, fmt: str, elapsed: Optional[float] = None) -> str:
+        if fmt == "json":
+            import json
+
+            return json.dumps(self.as_dict(elapsed))
+        return self.format_table(elapsed)
@@ -0,0 +1,120 @@
+"""Table names and compact binary keys for the named LMDB databases.
+
+NPANXX keys are a big-endian ``u32`` of ``(NPA * 1000 + NXX) * 11 + block``
+where blocks ``0``-``9`` map to themselves and ``A`` to 10, so byte order,
+numeric order and the order of the textual ``NPANXX:BLOCK`` form all agree.
+OCN keys are the UTF-8 OCN code.  Keys of the derived ``resolved`` table
+are a big-endian ``u32`` of the 7-digit NPA-NXX-block prefix, and keys of the
+``override`` table a big-endian ``u64`` of the whole 10-digit number.
+
+The textual keys used by the public API (``npanxx:415555:1``, ``ocn:1234``)
+are split into ``(table, packed key)`` pairs here.
+"""
+from __future__ import annotations
+
+import struct
+from typing import Tuple
+
+NPANXX_TABLE = "npanxx"
+OCN_TABLE = "ocn"
+TABLE_NAMES: Tuple[str, ...] = (NPANXX_TABLE, OCN_TABLE)
+# Derived from both source tables at import time; not part of TABLE_NAMES.
+RESOLVED_TABLE = "resolved"
+# Exact-number overrides (e.g. ported numbers); optional, so not part of TABLE_NAMES either.
+OVERRIDE_TABLE = "override"
+
+BLOCKS = "0123456789A"
+_BLOCK_INDEX = {block: index for index, block in enumerate(BLOCKS)}
+_NPANXX_KEY = struct.Struct(">I")
+_NUMBER_KEY = struct.Struct(">Q")
+
+
+def pack_npanxx(npanxx: str, block: str) -> bytes:
+    """Pack a 6-digit NPA-NXX and its block into the 4-byte NPANXX key."""
+    if len(npanxx) != 6 or not npanxx.isdigit() or not npanxx.isascii():
+        raise ValueError(f"Invalid NPA-NXX: {npanxx!r}")
+    index = _BLOCK_INDEX.get(block)
+    if index is None:
+        raise ValueError(f"Invalid block: {block!r}")
+    return _NPANXX_KEY.pack(int(npanxx) * 11 + index)
+
+
+def npanxx_candidates(digits: str) -> Tuple[bytes, bytes]:
+    """Packed keys for the block of a normalized 10-digit number and its ``A`` fallback.
+
+    ``digits`` must already be validated (see :func:`~phone_lookup.lookup.normalize_number`).
+    """
+    base = int(digits[:6]) * 11
+    return _NPANXX_KEY.pack(base + ord(digits[6]) - 48), _NPANXX_KEY.pack(base + 10)
+
+
+def pack_prefix(digits: str) -> bytes:
+    """Packed ``resolved`` key of a normalized number (its first seven digits)."""
+    return _NPANXX_KEY.pack(int(digits[:7]))
+
+
+def unpack_prefix(key: bytes) -> str:
+    return f"{_NPANXX_KEY.unpack(key)[0]:07d}"
+
+
+def pack_number(digits: str) -> bytes:
+    """Packed ``override`` key of a normalized 10-digit number."""
+    return _NUMBER_KEY.pack(int(digits))
+
+
+def unpack_number(key: bytes) -> str:
+    return f"{_NUMBER_KEY.unpack(key)[0]:010d}"
+
+
+def unpack_npanxx(key: bytes) -> Tuple[int, str]:
+    """Return ``(NPA-NXX as an int, block)`` for a packed NPANXX key."""
+    prefix, index = divmod(_NPANXX_KEY.unpack(key)[0], 11)
+    return prefix, BLOCKS[index]
+
+
+def pack_ocn(ocn: str) -> bytes:
+    if not ocn:
+        raise ValueError("OCN must not be empty")
+    return ocn.encode("utf-8")
+
+
+def unpack_ocn(key: bytes) -> str:
+    return bytes(key).decode("utf-8")
+
+
+def pack_key(table: str, local: str) -> bytes:
+    """Pack a table-local textual key (``415555:1`` or ``1234``)."""
+    if table == NPANXX_TABLE:
+        npanxx, _, block = local.partition(":")
+        return pack_npanxx(npanxx, block)
+    if table == OCN_TABLE:
+        return pack_ocn(local)
+    if table == OVERRIDE_TABLE:
+        if len(local) != 10 or not local.isdigit() or not local.isascii():
+            raise ValueError(f"Invalid number: {local!r}")
+        return pack_number(local)
+    raise ValueError(f"Unknown table: {table}")
+
+
+def unpack_key(table: str, key: bytes) -> str:
+    if table == NPANXX_TABLE:
+        prefix, block = unpack_npanxx(key)
+        return f"{prefix:06d}:{block}"
+    if table == OCN_TABLE:
+        return unpack_ocn(key)
+    if table == OVERRIDE_TABLE:
+        return unpack_number(key)
+    raise ValueError(f"Unknown table: {table}")
+
+
+def split_key(key: str) -> Tuple[str, bytes]:
+    """Turn ``table:local`` into ``(table, packed key)``; ``ValueError`` if it does not fit."""
+    table, separator, local = key.partition(":")
+    if not separator or (table not in TABLE_NAMES and table != OVERRIDE_TABLE):
+        raise ValueError(f"Key does not belong to a table: {key!r}")
+    return table, pack_key(table, local)
+
+
+def join_key(table: str, key: bytes) -> str:
+    """Inverse of :func:`split_key`."""
+    return f"{table}:{unpack_key(table, key)}"
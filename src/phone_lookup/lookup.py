@@ -0,0 +1,526 @@
+"""Core phone number lookup logic shared by the CLI and worker processes."""
+from __future__ import annotations
+
+import time
+from itertools import islice
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .instrumentation import CARRIER, DECODE, INPUT, LMDB_GET, NORMALIZE, RESOLVE, StageStats
+from .keys import NPANXX_TABLE, OCN_TABLE, npanxx_candidates, pack_ocn
+from .memo import PREFIX_DIGITS, LookupMemo
+
+if TYPE_CHECKING:  # Keeps lmdb out of processes that only need LookupResult (e.g. daemon clients).
+    from .store import PhoneLookupStore, StoreReader
+
+DEFAULT_CHUNK_SIZE = 1_000
+LOOKUP_FIELDS = ("LTYPE", "OCN")
+
+Resolution = tuple[bool, str, str]
+NOT_FOUND: Resolution = (False, "UNKNOWN", "UNKNOWN")
+
+T = TypeVar("T")
+
+LINE_TYPE_LABELS = {
+    "S": "LANDLINE",
+    "C": "WIRELESS",
+    "P": "PAGING",
+    "M": "MIXED",
+    "V": "VOIP",
+}
+
+
+def format_line_type(ltype: str) -> str:
+    label = LINE_TYPE_LABELS.get(ltype.upper()) if ltype else None
+    return label if label else ltype
+
+
+class LookupResult(NamedTuple):
+    """Container for lookup responses."""
+
+    original: str
+    normalized: Optional[str]
+    ltype: str
+    common_name: str
+    found: bool
+
+    def as_output_line(self) -> str:
+        number = self.normalized or self.original
+        return f"{number}:{format_line_type(self.ltype)}:{self.common_name}"
+
+
+def normalize_number(raw: str) -> Optional[str]:
+    # ASCII digits only: str.isdigit() also accepts "²" or "４", which no key can be built from.
+    digits = "".join(ch for ch in raw if "0" <= ch <= "9")
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    if len(digits) != 10:
+        return None
+    return digits
+
+
+class LookupEngine:
+    """Alternative resolver for normalized numbers, used in place of a store.
+
+    Engines answer :meth:`lookup_many` with the same ``(found, ltype,
+    common_name)`` triples as :func:`lookup_number`.  Engines that know
+    exact-number overrides also answer :meth:`overrides` and
+    :meth:`lookup_blocks`, so a prefix memo only ever sees block answers.
+    """
+
+    def lookup_many(self, numbers: Sequence[str]) -> list[Resolution]:
+        raise NotImplementedError
+
+    def overrides(self, numbers: Sequence[str]) -> Dict[int, Resolution]:
+        """Answers of the overridden ``numbers``, by position."""
+        return {}
+
+    def lookup_blocks(self, numbers: Sequence[str]) -> list[Resolution]:
+        """:meth:`lookup_many` ignoring overrides."""
+        return self.lookup_many(numbers)
+
+    def refresh(self) -> bool:
+        """Pick up newer data if the engine can; returns whether it did."""
+        return False
+
+    def close(self) -> None:
+        return None
+
+    def __enter__(self) -> "LookupEngine":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
+        self.close()
+
+
+def lookup_number(store: Union[PhoneLookupStore, StoreReader], digits: str) -> Resolution:
+    # The exact block first, then the NPA-NXX wide "A" record.
+    for key in npanxx_candidates(digits):
+        data = store.get_packed(NPANXX_TABLE, key, LOOKUP_FIELDS)
+        if not data:
+            continue
+        ltype = data.get("LTYPE") or "UNKNOWN"
+        ocn = data.get("OCN") or ""
+        common_name = store.resolve_carrier(ocn) if ocn else ""
+        if not common_name:
+            common_name = "UNKNOWN"
+        return True, ltype or "UNKNOWN", common_name
+    return NOT_FOUND
+
+
+def lookup_sorted(reader: StoreReader, numbers: Sequence[str]) -> list[Resolution]:
+    """:func:`lookup_number` for a batch, visiting NPANXX keys in ascending order.
+
+    Each distinct 7-digit prefix is resolved once by moving one cursor forward
+    (see :meth:`~phone_lookup.store.StoreReader.seek`): the block key and its
+    ``A`` fallback are neighbours, so a miss usually lands on the fallback
+    directly.  With a current resolved table, its keys are read in order
+    instead.  Results are returned in input order.
+    """
+    resolutions: Dict[str, Resolution] = {}
+    prefixes = sorted({digits[:PREFIX_DIGITS] for digits in numbers})
+    if reader.resolved:
+        for prefix in prefixes:
+            resolutions[prefix] = reader.get_resolved(prefix) or NOT_FOUND
+        return [resolutions[digits[:PREFIX_DIGITS]] for digits in numbers]
+    for prefix in prefixes:
+        block, fallback = npanxx_candidates(prefix)
+        found = reader.seek(NPANXX_TABLE, block)
+        data = reader.current(NPANXX_TABLE, LOOKUP_FIELDS) if found == block else None
+        if not data and found is not None and found <= fallback:
+            if found != fallback:
+                found = reader.seek(NPANXX_TABLE, fallback)
+            data = reader.current(NPANXX_TABLE, LOOKUP_FIELDS) if found == fallback else None
+        if data:
+            ocn = data.get("OCN") or ""
+            common_name = (reader.resolve_carrier(ocn) if ocn else "") or "UNKNOWN"
+            resolutions[prefix] = (True, data.get("LTYPE") or "UNKNOWN", common_name)
+        else:
+            resolutions[prefix] = NOT_FOUND
+    return [resolutions[digits[:PREFIX_DIGITS]] for digits in numbers]
+
+
+def lookup_record(
+    reader: StoreReader,
+    digits: str,
+    npanxx_fields: Sequence[str],
+    ocn_fields: Sequence[str],
+    ocn_records: Dict[str, Dict[str, str]],
+) -> tuple[Resolution, Dict[str, str]]:
+    """:func:`lookup_number` plus the requested fields of the matching NPANXX and OCN records.
+
+    ``npanxx_fields`` must start with :data:`LOOKUP_FIELDS` so the record is
+    decoded once.  ``ocn_records`` memoizes OCN projections between calls.
+    """
+    for key in npanxx_candidates(digits):
+        data = reader.get_packed(NPANXX_TABLE, key, npanxx_fields)
+        if not data:
+            continue
+        ltype = data.get("LTYPE") or "UNKNOWN"
+        ocn = data.get("OCN") or ""
+        common_name = (reader.resolve_carrier(ocn) if ocn else "") or "UNKNOWN"
+        if ocn_fields:
+            data = {**data, **_carrier_record(reader, ocn, ocn_fields, ocn_records)}
+        return (True, ltype, common_name), data
+    return NOT_FOUND, {}
+
+
+def _carrier_record(
+    reader: StoreReader, ocn: str, ocn_fields: Sequence[str], ocn_records: Dict[str, Dict[str, str]]
+) -> Dict[str, str]:
+    carrier = ocn_records.get(ocn)
+    if carrier is None:
+        carrier = reader.get_packed(OCN_TABLE, pack_ocn(ocn), ocn_fields) if ocn else {}
+        ocn_records[ocn] = carrier
+    return carrier
+
+
+def find_overrides(reader: StoreReader, numbers: Sequence[str]) -> Dict[int, Dict[str, str]]:
+    """Override records of normalized ``numbers``, by position.
+
+    Only the numbers the reader's Bloom filter may contain are read from the
+    override table.  The checks are added to the store's override counters.
+    """
+    overrides = reader.overrides
+    if overrides is None:
+        return {}
+    found: Dict[int, Dict[str, str]] = {}
+    candidates = 0
+    for index, digits in enumerate(numbers):
+        if int(digits) in overrides:
+            candidates += 1
+            data = reader.get_override(digits)
+            if data:
+                found[index] = data
+    reader.override_counts.add(len(numbers), candidates, len(found))
+    return found
+
+
+def override_resolution(reader: Union[StoreReader, PhoneLookupStore], data: Mapping[str, str]) -> Resolution:
+    """The ``(found, ltype, common_name)`` triple of an override record."""
+    ocn = data.get("OCN") or ""
+    return True, data.get("LTYPE") or "UNKNOWN", (reader.resolve_carrier(ocn) if ocn else "") or "UNKNOWN"
+
+
+def merge_overrides(
+    overrides: Mapping[int, T], numbers: Sequence[str], resolve: Callable[[list[str]], Sequence[T]]
+) -> Sequence[T]:
+    """``resolve`` the numbers without an entry in ``overrides`` and merge both back into input order."""
+    if not overrides:
+        return resolve(list(numbers))
+    rest = iter(resolve([digits for index, digits in enumerate(numbers) if index not in overrides]))
+    return [overrides[index] if index in overrides else next(rest) for index in range(len(numbers))]
+
+
+def _resolve_overridden(
+    store: PhoneLookupStore,
+    resolve: Callable[[list[str]], Sequence[Resolution]],
+    numbers: Sequence[str],
+    stats: Optional[StageStats] = None,
+) -> Sequence[Resolution]:
+    """Answer overridden numbers first, so ``resolve`` (e.g. a prefix memo) only sees the others."""
+    return merge_overrides(_override_resolutions(store, numbers, stats), numbers, resolve)
+
+
+def _override_resolutions(
+    store: PhoneLookupStore, numbers: Sequence[str], stats: Optional[StageStats] = None
+) -> Dict[int, Resolution]:
+    with store.reader(stats) as reader:
+        return {index: override_resolution(reader, data) for index, data in find_overrides(reader, numbers).items()}
+
+
+class OverriddenEngine(LookupEngine):
+    """A block-level ``engine`` with the exact-number overrides of ``store`` applied on top.
+
+    :func:`~phone_lookup.engines.create_engine` wraps engines in this when
+    their store has overrides, so every engine answers ported numbers alike.
+    """
+
+    def __init__(self, engine: LookupEngine, store: PhoneLookupStore):
+        self.engine = engine
+        self.store = store
+
+    def lookup_many(self, numbers: Sequence[str]) -> list[Resolution]:
+        return list(_resolve_overridden(self.store, self.engine.lookup_many, numbers))
+
+    def overrides(self, numbers: Sequence[str]) -> Dict[int, Resolution]:
+        return _override_resolutions(self.store, numbers)
+
+    def lookup_blocks(self, numbers: Sequence[str]) -> list[Resolution]:
+        return self.engine.lookup_many(numbers)
+
+    def apply(self, results: list[LookupResult]) -> list[LookupResult]:
+        """Replace the results of overridden numbers in ``results`` (resolved by :attr:`engine`)."""
+        rows = [row for row, result in enumerate(results) if result.normalized]
+        overrides = self.overrides([results[row].normalized for row in rows])  # type: ignore[misc]
+        for index, (found, ltype, common_name) in overrides.items():
+            row = rows[index]
+            results[row] = results[row]._replace(ltype=ltype, common_name=common_name, found=found)
+        return results
+
+    def close(self) -> None:
+        self.engine.close()
+
+
+def lookup_many(
+    store: PhoneLookupStore,
+    numbers: Sequence[str],
+    stats: Optional[StageStats] = None,
+    *,
+    sort_keys: bool = False,
+    overrides: bool = True,
+) -> list[Resolution]:
+    """Resolve normalized numbers inside a single read transaction.
+
+    Numbers in the store's override table are answered from it (see
+    :func:`find_overrides`); pass ``overrides=False`` to resolve by block only.
+    When the store's resolved table is current, every other number is one read
+    of it; otherwise the NPANXX and OCN tables are read as in
+    :func:`lookup_number`.  With ``sort_keys`` the blocks are resolved by
+    :func:`lookup_sorted`.
+    """
+    with store.reader(stats) as reader:
+        found = find_overrides(reader, numbers) if overrides else {}
+        if found:
+            resolutions = {index: override_resolution(reader, data) for index, data in found.items()}
+            return list(merge_overrides(resolutions, numbers, partial(_lookup_blocks, reader, sort_keys=sort_keys)))
+        return _lookup_blocks(reader, numbers, sort_keys=sort_keys)
+
+
+def _lookup_blocks(reader: StoreReader, numbers: Sequence[str], *, sort_keys: bool) -> list[Resolution]:
+    if sort_keys:
+        return lookup_sorted(reader, numbers)
+    if reader.resolved:
+        get_resolved = reader.get_resolved
+        return [get_resolved(digits) or NOT_FOUND for digits in numbers]
+    return [lookup_number(reader, digits) for digits in numbers]
+
+
+def chunked(items: Iterable[str], size: int) -> Iterator[list[str]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_lookup(
+    store: Union[PhoneLookupStore, LookupEngine],
+    numbers: Iterable[str],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    refresh: bool = True,
+    stats: Optional[StageStats] = None,
+    memo: Optional[LookupMemo[Resolution]] = None,
+    sort_keys: bool = False,
+) -> Iterator[LookupResult]:
+    """Resolve raw numbers chunk by chunk against a store or a :class:`LookupEngine`.
+
+    Stores are refreshed before every chunk, so long-running jobs switch to a
+    newly imported generation without restarting.  Pass ``refresh=False`` when
+    other threads may be reading the same store; the caller then refreshes it.
+    With ``stats``, every stage of every chunk is timed into it.  With
+    ``memo``, each distinct NPA-NXX-block prefix is resolved once for as long
+    as the memo lives; it is cleared whenever a new generation is picked up.
+    With ``sort_keys``, stores resolve every chunk in NPANXX key order (see
+    :func:`lookup_sorted`) and results still come out in input order.
+    Exact-number overrides are applied to stores and to engines wrapped in
+    :class:`OverriddenEngine`, and numbers they answer bypass the memo.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if stats is not None:
+        return _run_lookup_timed(store, numbers, chunk_size, refresh, stats, memo, sort_keys)
+    return _run_lookup(store, numbers, chunk_size, refresh, memo, sort_keys)
+
+
+def _resolver(
+    store: Union[PhoneLookupStore, LookupEngine],
+    memo: Optional[LookupMemo[Resolution]],
+    sort_keys: bool,
+    stats: Optional[StageStats] = None,
+) -> Callable[[list[str]], Sequence[Resolution]]:
+    """The function :func:`run_lookup` resolves every chunk with; overridden numbers bypass ``memo``."""
+    if isinstance(store, LookupEngine):
+        if memo is None:
+            return store.lookup_many
+        return partial(_resolve_engine, store, partial(memo.resolve, resolve=store.lookup_blocks))
+    if memo is None:
+        return partial(lookup_many, store, stats=stats, sort_keys=sort_keys)
+    resolve = partial(memo.resolve, resolve=partial(lookup_many, store, stats=stats, sort_keys=sort_keys, overrides=False))
+    return partial(_resolve_overridden, store, resolve, stats=stats)
+
+
+def _resolve_engine(
+    engine: LookupEngine, resolve: Callable[[list[str]], Sequence[Resolution]], numbers: Sequence[str]
+) -> Sequence[Resolution]:
+    return merge_overrides(engine.overrides(numbers), numbers, resolve)
+
+
+def _run_lookup(
+    store: Union[PhoneLookupStore, LookupEngine],
+    numbers: Iterable[str],
+    chunk_size: int,
+    refresh: bool,
+    memo: Optional[LookupMemo[Resolution]],
+    sort_keys: bool,
+) -> Iterator[LookupResult]:
+    engine = isinstance(store, LookupEngine)
+    resolve = _resolver(store, memo, sort_keys)
+    for chunk in chunked(numbers, chunk_size):
+        # Pick up a newly published generation between chunks, never mid-chunk.
+        if refresh and not engine and store.refresh() and memo is not None:  # type: ignore[union-attr]
+            memo.clear()
+        normalized = [normalize_number(number) for number in chunk]
+        valid = [digits for digits in normalized if digits]
+        resolved = iter(resolve(valid) if valid else ())
+        for number, digits in zip(chunk, normalized):
+            if not digits:
+                yield LookupResult(number, None, "INVALID", "UNKNOWN", False)
+                continue
+            found, ltype, common_name = next(resolved)
+            yield LookupResult(number, digits, ltype, common_name, found)
+
+
+def _run_lookup_timed(
+    store: Union[PhoneLookupStore, LookupEngine],
+    numbers: Iterable[str],
+    chunk_size: int,
+    refresh: bool,
+    stats: StageStats,
+    memo: Optional[LookupMemo[Resolution]],
+    sort_keys: bool,
+) -> Iterator[LookupResult]:
+    """:func:`_run_lookup` with per-chunk timing of input, normalization and resolution."""
+    clock = time.perf_counter
+    engine = isinstance(store, LookupEngine)
+    resolve = _resolver(store, memo, sort_keys, stats)
+    nested = (LMDB_GET, DECODE, CARRIER)
+    iterator = iter(numbers)
+    while True:
+        start = clock()
+        chunk = list(islice(iterator, chunk_size))
+        stats.add(INPUT, clock() - start, len(chunk))
+        if not chunk:
+            return
+        if refresh and not engine and store.refresh() and memo is not None:  # type: ignore[union-attr]
+            memo.clear()
+        start = clock()
+        normalized = [normalize_number(number) for number in chunk]
+        valid = [digits for digits in normalized if digits]
+        stats.add(NORMALIZE, clock() - start, len(chunk))
+        before = sum(stats.seconds(stage) for stage in nested)
+        start = clock()
+        resolutions = resolve(valid) if valid else []
+        # Reads, decoding and carriers are reported separately; "resolve" is the remainder.
+        inner = sum(stats.seconds(stage) for stage in nested) - before
+        stats.add(RESOLVE, clock() - start - inner, len(valid))
+        resolved = iter(resolutions)
+        for number, digits in zip(chunk, normalized):
+            if not digits:
+                yield LookupResult(number, None, "INVALID", "UNKNOWN", False)
+                continue
+            found, ltype, common_name = next(resolved)
+            yield LookupResult(number, digits, ltype, common_name, found)
+
+
+def run_record_lookup(
+    store: PhoneLookupStore,
+    numbers: Iterable[str],
+    *,
+    npanxx_fields: Sequence[str] = (),
+    ocn_fields: Sequence[str] = (),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    refresh: bool = True,
+    memo: Optional[LookupMemo[tuple[Resolution, Dict[str, str]]]] = None,
+) -> Iterator[Tuple[LookupResult, Dict[str, str]]]:
+    """:func:`run_lookup` that also yields the requested stored fields of every match.
+
+    Only the named NPANXX and OCN fields are decoded.  Records of invalid or
+    unmatched numbers are empty; missing fields are left out.  An overridden
+    number keeps the fields of its block record but takes ``OCN``, ``LTYPE``
+    and the OCN fields from its override.  ``memo`` works as for
+    :func:`run_lookup` and must not be shared with it.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    wanted = tuple(dict.fromkeys((*LOOKUP_FIELDS, *npanxx_fields)))
+    ocn_wanted = tuple(ocn_fields)
+    ocn_records: Dict[str, Dict[str, str]] = {}
+    for chunk in chunked(numbers, chunk_size):
+        if refresh and store.refresh():
+            ocn_records.clear()
+            if memo is not None:
+                memo.clear()
+        normalized = [normalize_number(number) for number in chunk]
+        valid = [digits for digits in normalized if digits]
+        with store.reader() as reader:
+
+            def resolve(batch: Sequence[str]) -> list[tuple[Resolution, Dict[str, str]]]:
+                return [lookup_record(reader, digits, wanted, ocn_wanted, ocn_records) for digits in batch]
+
+            resolved = resolve(valid) if memo is None else memo.resolve(valid, resolve)
+            for index, data in find_overrides(reader, valid).items():
+                record = {name: value for name, value in resolved[index][1].items() if name not in ocn_wanted}
+                record.update((name, value) for name, value in data.items() if name in wanted)
+                if ocn_wanted:
+                    record.update(_carrier_record(reader, data.get("OCN") or "", ocn_wanted, ocn_records))
+                resolved[index] = (override_resolution(reader, data), record)
+        matches = iter(resolved)
+        for number, digits in zip(chunk, normalized):
+            if not digits:
+                yield LookupResult(number, None, "INVALID", "UNKNOWN", False), {}
+                continue
+            (found, ltype, common_name), record = next(matches)
+            yield LookupResult(number, digits, ltype, common_name, found), record
+
+
+def run_deduplicated(
+    run: Callable[[list[str]], Iterable[T]],
+    numbers: Iterable[str],
+    *,
+    memo: LookupMemo,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[T]:
+    """Resolve each distinct input number once with ``run`` and expand the results back into input order.
+
+    ``run`` maps a list of raw numbers to one result each, in order, e.g.
+    ``lambda batch: run_lookup(store, batch, memo=memo)``.  Numbers already
+    answered earlier in the job come from the exact-number map of ``memo``.
+    When ``run`` clears the memo because it picked up a new generation, the
+    chunk's repeats are resolved again, so one chunk never mixes generations.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    known = memo.numbers
+    if known is None:
+        raise ValueError("run_deduplicated needs LookupMemo(exact=True)")
+    for chunk in chunked(numbers, chunk_size):
+        unique = dict.fromkeys(chunk)
+        answers = {number: known[number] for number in unique if number in known}
+        fresh = [number for number in unique if number not in answers]
+        epoch = memo.epoch
+        results = list(run(fresh)) if fresh else []
+        saved = len(chunk) - len(fresh)
+        if answers and memo.epoch != epoch:
+            repeats = list(answers)
+            answers = dict(zip(repeats, run(repeats)))
+            saved -= len(repeats)
+        answers.update(zip(fresh, results))
+        memo.remember(fresh, results)
+        memo.exact_hits += saved
+        yield from map(answers.__getitem__, chunk)  # type: ignore[misc]
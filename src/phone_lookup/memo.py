@@ -0,0 +1,111 @@
+"""Job-level memoization of lookups by NPA-NXX-block prefix and by exact number.
+
+A lookup only depends on the first seven digits of a normalized number, so a
+:class:`LookupMemo` resolves every distinct prefix once per job.  In exact
+mode it also remembers whole results by input string, so a repeated number
+skips normalization and resolution altogether (see
+:func:`~phone_lookup.lookup.run_deduplicated`).
+
+Both maps are bounded by ``maxsize``; a map that would grow past it is
+cleared and refilled (with at most ``maxsize`` entries of a chunk that alone
+exceeds it), which keeps memory flat on jobs with huge prefix
+ranges without costing the hit path an LRU update.  The owner clears the
+memo whenever the store switches to a new generation.
+"""
+from __future__ import annotations
+
+import os
+from itertools import islice
+from typing import Callable, Dict, Generic, Iterable, List, NamedTuple, Optional, Sequence, TypeVar
+
+DEFAULT_MEMO_SIZE = int(os.getenv("PHONE_LOOKUP_MEMO_SIZE", "1000000"))
+PREFIX_DIGITS = 7
+
+V = TypeVar("V")
+
+
+class LookupMemoStats(NamedTuple):
+    resolved: int
+    prefix_hits: int
+    exact_hits: int
+
+    @property
+    def saved(self) -> int:
+        return self.prefix_hits + self.exact_hits
+
+    @property
+    def lookups(self) -> int:
+        return self.resolved + self.saved
+
+    @classmethod
+    def combine(cls, stats: Iterable["LookupMemoStats"]) -> "LookupMemoStats":
+        """Sum the counters of several memos, e.g. one per worker process."""
+        totals = [0, 0, 0]
+        for item in stats:
+            for idx, value in enumerate(item):
+                totals[idx] += value
+        return cls(*totals)
+
+
+class LookupMemo(Generic[V]):
+    """Resolutions keyed by 7-digit prefix and, with ``exact``, results keyed by input number."""
+
+    def __init__(self, maxsize: int = DEFAULT_MEMO_SIZE, *, exact: bool = False):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.prefixes: Dict[str, V] = {}
+        self.numbers: Optional[Dict[str, object]] = {} if exact else None
+        self.resolved = 0
+        self.prefix_hits = 0
+        self.exact_hits = 0
+        # Bumped by clear(), so callers can tell that results were invalidated.
+        self.epoch = 0
+
+    @property
+    def exact(self) -> bool:
+        return self.numbers is not None
+
+    def clear(self) -> None:
+        self.prefixes.clear()
+        if self.numbers is not None:
+            self.numbers.clear()
+        self.epoch += 1
+
+    def stats(self) -> LookupMemoStats:
+        return LookupMemoStats(self.resolved, self.prefix_hits, self.exact_hits)
+
+    def resolve(self, digits: Sequence[str], resolve: Callable[[List[str]], Sequence[V]]) -> List[V]:
+        """Resolve normalized ``digits`` through the memo; ``resolve`` only sees one number per new prefix."""
+        prefixes = self.prefixes
+        pending: Dict[str, str] = {}
+        for number in digits:
+            prefix = number[:PREFIX_DIGITS]
+            if prefix not in prefixes and prefix not in pending:
+                pending[prefix] = number
+        if pending:
+            if len(prefixes) + len(pending) > self.maxsize:
+                prefixes.clear()
+                pending = {}
+                for number in digits:
+                    pending.setdefault(number[:PREFIX_DIGITS], number)
+            resolved = dict(zip(pending, resolve(list(pending.values()))))
+            self.resolved += len(pending)
+            self.prefix_hits += len(digits) - len(pending)
+            if len(resolved) > self.maxsize:
+                # Only after a clear: every prefix of this chunk is in ``resolved``.
+                prefixes.update(islice(resolved.items(), self.maxsize))
+                return [resolved[number[:PREFIX_DIGITS]] for number in digits]
+            prefixes.update(resolved)
+        else:
+            self.prefix_hits += len(digits)
+        return [prefixes[number[:PREFIX_DIGITS]] for number in digits]
+
+    def remember(self, numbers: Sequence[str], results: Sequence[object]) -> None:
+        known = self.numbers
+        if known is None:
+            raise ValueError("exact-number results need LookupMemo(exact=True)")
+        if len(known) + len(numbers) > self.maxsize:
+            known.clear()
+        known.update(islice(zip(numbers, results), self.maxsize))
+
@@ -0,0 +1,105 @@
+"""Fully in-memory lookup engine backed by a dense NPA-NXX-block array.
+
+Every 7-digit prefix ``NPA NXX X`` maps to slot ``int(digits[:7])`` of a flat
+array whose values index a small interned table of ``(LTYPE, carrier name)``
+pairs.  The block-to-``A`` fallback is applied while building, so a lookup is
+a single array index.  Slot value ``0`` means "not found".
+"""
+from __future__ import annotations
+
+import json
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from .keys import NPANXX_TABLE
+from .lookup import LOOKUP_FIELDS, NOT_FOUND, LookupEngine, Resolution
+from .store import PhoneLookupStore, resolve_blocks
+
+SLOT_COUNT = 10_000_000
+SNAPSHOT_MAGIC = b"PLMI"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sBcII")
+
+
+class MemoryIndex(LookupEngine):
+    """Answer lookups from an in-memory array without touching LMDB."""
+
+    def __init__(self, slots: array, entries: Sequence[Tuple[str, str]]):
+        if len(slots) != SLOT_COUNT:
+            raise ValueError(f"expected {SLOT_COUNT} slots, got {len(slots)}")
+        self._slots = slots
+        self.entries: List[Tuple[str, str]] = list(entries)
+        # Slot 0 is the "not found" sentinel; pre-build the tuples returned to callers.
+        self._resolutions: List[Resolution] = [NOT_FOUND] + [(True, ltype, name) for ltype, name in self.entries[1:]]
+
+    @staticmethod
+    def _empty_slots(entry_count: int) -> array:
+        slots = array("H" if entry_count <= 0xFFFF else "I")
+        slots.frombytes(bytes(SLOT_COUNT * slots.itemsize))
+        return slots
+
+    @classmethod
+    def build(cls, store: PhoneLookupStore) -> "MemoryIndex":
+        """Scan every NPANXX record of ``store`` and resolve carriers once per OCN."""
+        interned: Dict[Tuple[str, str], int] = {("", ""): 0}
+        prefixes = array("I")
+        entry_ids = array("I")
+        for prefix, entry in resolve_blocks(store.iterate_table(NPANXX_TABLE, LOOKUP_FIELDS), store.resolve_carrier):
+            prefixes.append(prefix)
+            entry_ids.append(interned.setdefault(entry, len(interned)))
+
+        slots = cls._empty_slots(len(interned))
+        for prefix, entry_id in zip(prefixes, entry_ids):
+            slots[prefix] = entry_id
+        entries = sorted(interned, key=interned.__getitem__)
+        return cls(slots, entries)
+
+    @classmethod
+    def load(cls, path: Path) -> "MemoryIndex":
+        with Path(path).open("rb") as handle:
+            header = handle.read(_SNAPSHOT_HEADER.size)
+            try:
+                magic, version, typecode, entry_count, table_size = _SNAPSHOT_HEADER.unpack(header)
+            except struct.error as exc:
+                raise ValueError(f"Not a memory index snapshot: {path}") from exc
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported memory index snapshot: {path}")
+            entries = [tuple(entry) for entry in json.loads(handle.read(table_size).decode("utf-8"))]
+            if len(entries) != entry_count:
+                raise ValueError(f"Corrupt memory index snapshot: {path}")
+            slots = array(typecode.decode("ascii"))
+            slots.fromfile(handle, SLOT_COUNT)
+        return cls(slots, entries)  # type: ignore[arg-type]
+
+    def save(self, path: Path) -> None:
+        table = json.dumps(self.entries, ensure_ascii=False).encode("utf-8")
+        header = _SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC,
+            SNAPSHOT_VERSION,
+            self._slots.typecode.encode("ascii"),
+            len(self.entries),
+            len(table),
+        )
+        with Path(path).open("wb") as handle:
+            handle.write(header)
+            handle.write(table)
+            self._slots.tofile(handle)
+
+    @property
+    def slots(self) -> array:
+        """The dense slot array; values index :attr:`resolutions`."""
+        return self._slots
+
+    @property
+    def resolutions(self) -> List[Resolution]:
+        return self._resolutions
+
+    def lookup(self, digits: str) -> Resolution:
+        return self._resolutions[self._slots[int(digits[:7])]]
+
+    def lookup_many(self, numbers: Sequence[str]) -> list[Resolution]:
+        slots = self._slots
+        resolutions = self._resolutions
+        return [resolutions[slots[int(digits[:7])]] for digits in numbers]
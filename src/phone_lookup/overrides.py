@@ -0,0 +1,156 @@
+"""Bloom filter and counters for the exact-number ``override`` table.
+
+Most numbers are not overridden, so lookups first ask a Bloom filter of the
+overridden numbers and only read the table for the numbers it may contain.
+The filter is derived with the ``resolved`` table and stored in it (see
+:meth:`~phone_lookup.store.PhoneLookupStore.rebuild_resolved`).
+
+Probe positions come from two multiplicative hashes of the number (double
+hashing over the top bits), so a check is a few integer operations and
+usually ends at the first probe.
+"""
+from __future__ import annotations
+
+import struct
+import threading
+from typing import Iterable, NamedTuple, Union
+
+DEFAULT_BITS_PER_ITEM = 16
+DEFAULT_PROBES = 3
+FILTER_MAGIC = b"PLBF"
+FILTER_VERSION = 1
+_HEADER = struct.Struct("<4sBBB")
+_MASK = (1 << 64) - 1
+_MULTIPLIER = 0x9E3779B97F4A7C15
+_STEP_MULTIPLIER = 0xC2B2AE3D27D4EB4F
+_MIN_LOG_BITS = 6
+
+
+class BloomFilter:
+    """Set of integers that may report false positives but never false negatives."""
+
+    __slots__ = ("_bits", "probes", "_log_bits", "_shift", "_mask")
+
+    def __init__(self, bits: Union[bytes, bytearray], probes: int = DEFAULT_PROBES):
+        log_bits = (len(bits) * 8).bit_length() - 1
+        if log_bits < _MIN_LOG_BITS or len(bits) * 8 != 1 << log_bits:
+            raise ValueError("the bit array must hold a power of two of at least 64 bits")
+        if not 1 <= probes <= 255:
+            raise ValueError("probes must be between 1 and 255")
+        self._bits = bits
+        self.probes = probes
+        self._log_bits = log_bits
+        self._shift = 64 - log_bits
+        self._mask = (1 << log_bits) - 1
+
+    @classmethod
+    def for_capacity(
+        cls, items: int, *, bits_per_item: int = DEFAULT_BITS_PER_ITEM, probes: int = DEFAULT_PROBES
+    ) -> "BloomFilter":
+        """An empty filter sized for ``items`` numbers (rounded up to a power of two of bits)."""
+        log_bits = max(_MIN_LOG_BITS, (max(items, 1) * bits_per_item - 1).bit_length())
+        return cls(bytearray(1 << (log_bits - 3)), probes)
+
+    @classmethod
+    def build(cls, values: Iterable[int], items: int, **options: int) -> "BloomFilter":
+        bloom = cls.for_capacity(items, **options)
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    @property
+    def size(self) -> int:
+        """Number of bits."""
+        return 1 << self._log_bits
+
+    def add(self, value: int) -> None:
+        if not isinstance(self._bits, bytearray):
+            raise TypeError("this filter was loaded read-only")
+        bits = self._bits
+        position = ((value * _MULTIPLIER) & _MASK) >> self._shift
+        step = (((value * _STEP_MULTIPLIER) & _MASK) >> self._shift) | 1
+        for _ in range(self.probes):
+            bits[position >> 3] |= 1 << (position & 7)
+            position = (position + step) & self._mask
+
+    def __contains__(self, value: int) -> bool:
+        bits = self._bits
+        position = ((value * _MULTIPLIER) & _MASK) >> self._shift
+        if not bits[position >> 3] >> (position & 7) & 1:
+            return False
+        step = (((value * _STEP_MULTIPLIER) & _MASK) >> self._shift) | 1
+        for _ in range(self.probes - 1):
+            position = (position + step) & self._mask
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def to_bytes(self) -> bytes:
+        return _HEADER.pack(FILTER_MAGIC, FILTER_VERSION, self.probes, self._log_bits) + bytes(self._bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        try:
+            magic, version, probes, log_bits = _HEADER.unpack_from(data)
+        except struct.error as exc:
+            raise ValueError("Not a Bloom filter") from exc
+        if magic != FILTER_MAGIC or version != FILTER_VERSION:
+            raise ValueError("Unsupported Bloom filter")
+        bits = data[_HEADER.size :]
+        if len(bits) * 8 != 1 << log_bits:
+            raise ValueError("Corrupt Bloom filter")
+        return cls(bytes(bits), probes)
+
+
+class OverrideStats(NamedTuple):
+    lookups: int
+    candidates: int
+    hits: int
+
+    @property
+    def false_positives(self) -> int:
+        """Candidates the filter let through that had no override."""
+        return self.candidates - self.hits
+
+    @property
+    def skipped(self) -> int:
+        """Lookups that never read the override table."""
+        return self.lookups - self.candidates
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Share of numbers without an override that the filter still let through."""
+        misses = self.lookups - self.hits
+        return self.false_positives / misses if misses else 0.0
+
+    @classmethod
+    def combine(cls, stats: Iterable["OverrideStats"]) -> "OverrideStats":
+        """Sum the counters of several stores, e.g. one per worker process."""
+        totals = [0, 0, 0]
+        for item in stats:
+            for idx, value in enumerate(item):
+                totals[idx] += value
+        return cls(*totals)
+
+
+class OverrideCounter:
+    """Running :class:`OverrideStats` of one store, updated by every reader thread."""
+
+    def __init__(self) -> None:
+        self._totals = [0, 0, 0]
+        self._lock = threading.Lock()
+
+    def add(self, lookups: int, candidates: int, hits: int) -> None:
+        with self._lock:
+            totals = self._totals
+            totals[0] += lookups
+            totals[1] += candidates
+            totals[2] += hits
+
+    def stats(self) -> OverrideStats:
+        with self._lock:
+            return OverrideStats(*self._totals)
@@ -0,0 +1,165 @@
+"""Multi-process bulk lookups where every worker owns a read-only store."""
+from __future__ import annotations
+
+import atexit
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, Optional, Union
+
+from .carriers import DEFAULT_CARRIER_CACHE_SIZE, CarrierCacheStats
+from .engines import DEFAULT_ENGINE, STORELESS_ENGINES, create_engine
+from .instrumentation import StageStats
+from .lookup import DEFAULT_CHUNK_SIZE, LookupEngine, LookupResult, Resolution, chunked, run_lookup
+from .memo import LookupMemo, LookupMemoStats
+from .overrides import OverrideStats
+from .store import PhoneLookupStore
+
+ChunkResult = tuple[
+    int, list[LookupResult], CarrierCacheStats, OverrideStats, Optional[LookupMemoStats], Optional[StageStats]
+]
+
+_worker_store: Optional[PhoneLookupStore] = None
+_worker_source: Optional[Union[PhoneLookupStore, LookupEngine]] = None
+_worker_memo: Optional[LookupMemo[Resolution]] = None
+_worker_sort_keys = False
+
+
+def _init_worker(
+    path: Path,
+    carrier_cache_size: int,
+    preload_carriers: bool,
+    engine: str,
+    index_snapshot: Optional[Path],
+    snapshot: Optional[Path],
+    memo_size: Optional[int],
+    sort_keys: bool,
+) -> None:
+    global _worker_store, _worker_source, _worker_memo, _worker_sort_keys
+    if engine not in STORELESS_ENGINES:
+        _worker_store = PhoneLookupStore.open(path, carrier_cache_size=carrier_cache_size, readonly=True)
+        if preload_carriers:
+            _worker_store.preload_carriers()
+        atexit.register(_worker_store.close)
+    _worker_source = create_engine(engine, _worker_store, index_snapshot=index_snapshot, snapshot=snapshot)
+    _worker_memo = LookupMemo(memo_size) if memo_size is not None else None
+    _worker_sort_keys = sort_keys
+
+
+def _resolve_chunk(numbers: list[str], timed: bool = False) -> ChunkResult:
+    assert _worker_source is not None, "worker was not initialised"
+    stats = StageStats() if timed else None
+    results = list(
+        run_lookup(
+            _worker_source,
+            numbers,
+            chunk_size=len(numbers),
+            stats=stats,
+            memo=_worker_memo,
+            sort_keys=_worker_sort_keys,
+        )
+    )
+    memo_stats = _worker_memo.stats() if _worker_memo is not None else None
+    if _worker_store is None:
+        return os.getpid(), results, CarrierCacheStats.combine(()), OverrideStats.combine(()), memo_stats, stats
+    carrier_stats = _worker_store.carriers.stats()
+    return os.getpid(), results, carrier_stats, _worker_store.override_counts.stats(), memo_stats, stats
+
+
+class ParallelLookup:
+    """Resolve numbers on a process pool while yielding results in input order.
+
+    Input is split into ``chunk_size`` chunks; at most ``workers * 4`` chunks
+    are in flight at once so memory stays bounded for arbitrarily long inputs.
+    With the ``memory`` engine each worker loads ``index_snapshot`` (or builds
+    its own index when no snapshot is given); with the ``mmap`` engine every
+    worker maps ``snapshot`` and never opens the store, so all of them share
+    one copy of it in the page cache.  With ``memo_size``, every
+    worker keeps its own prefix :class:`~phone_lookup.memo.LookupMemo`.
+    ``sort_keys`` is passed on to :func:`~phone_lookup.lookup.run_lookup`.  With
+    ``stats``, workers time their stages and the totals are merged into it as
+    chunks complete.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        workers: int,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        carrier_cache_size: int = DEFAULT_CARRIER_CACHE_SIZE,
+        preload_carriers: bool = False,
+        engine: str = DEFAULT_ENGINE,
+        index_snapshot: Optional[Path] = None,
+        snapshot: Optional[Path] = None,
+        memo_size: Optional[int] = None,
+        sort_keys: bool = False,
+        stats: Optional[StageStats] = None,
+    ):
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.path = Path(path)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.carrier_cache_size = carrier_cache_size
+        self.preload_carriers = preload_carriers
+        self.engine = engine
+        self.index_snapshot = index_snapshot
+        self.snapshot = snapshot
+        self.memo_size = memo_size
+        self.sort_keys = sort_keys
+        self.stats = stats
+        self._worker_stats: Dict[int, CarrierCacheStats] = {}
+        self._worker_override_stats: Dict[int, OverrideStats] = {}
+        self._worker_memo_stats: Dict[int, LookupMemoStats] = {}
+
+    def run(self, numbers: Iterable[str]) -> Iterator[LookupResult]:
+        max_pending = self.workers * 4
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(
+                self.path,
+                self.carrier_cache_size,
+                self.preload_carriers,
+                self.engine,
+                self.index_snapshot,
+                self.snapshot,
+                self.memo_size,
+                self.sort_keys,
+            ),
+        ) as pool:
+            pending: Deque[Future[ChunkResult]] = deque()
+            for chunk in chunked(numbers, self.chunk_size):
+                pending.append(pool.submit(_resolve_chunk, chunk, self.stats is not None))
+                if len(pending) >= max_pending:
+                    yield from self._collect(pending.popleft())
+            while pending:
+                yield from self._collect(pending.popleft())
+
+    def _collect(self, future: Future[ChunkResult]) -> list[LookupResult]:
+        pid, results, carrier_stats, override_stats, memo_stats, stage_stats = future.result()
+        self._worker_stats[pid] = carrier_stats
+        self._worker_override_stats[pid] = override_stats
+        if memo_stats is not None:
+            self._worker_memo_stats[pid] = memo_stats
+        if self.stats is not None and stage_stats is not None:
+            self.stats.merge(stage_stats)
+        return results
+
+    def carrier_stats(self) -> CarrierCacheStats:
+        """Carrier cache counters summed over the latest snapshot of every worker."""
+        return CarrierCacheStats.combine(self._worker_stats.values())
+
+    def override_stats(self) -> OverrideStats:
+        """Override filter counters summed over the latest snapshot of every worker."""
+        return OverrideStats.combine(self._worker_override_stats.values())
+
+    def memo_stats(self) -> Optional[LookupMemoStats]:
+        """Prefix memo counters summed over every worker, or ``None`` without ``memo_size``."""
+        if self.memo_size is None:
+            return None
+        return LookupMemoStats.combine(self._worker_memo_stats.values())
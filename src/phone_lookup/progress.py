@@ -0,0 +1,162 @@
+"""Progress reporting for bulk lookups.
+
+Reporters receive every :class:`~phone_lookup.lookup.LookupResult` through
+:meth:`Progress.advance`, but only the ``lines`` mode formats individual
+results; the other modes keep counters and render at most every
+``interval`` seconds so terminal I/O never dominates a run.
+"""
+from __future__ import annotations
+
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional, TextIO
+
+from .lookup import LookupResult
+
+PROGRESS_MODES = ("auto", "bar", "lines", "rate", "none")
+BAR_INTERVAL = 0.1
+RATE_INTERVAL = 10.0
+BAR_WIDTH = 30
+# Only consult the clock every N results; cheap enough to keep rendering live.
+CLOCK_STRIDE = 256
+
+LineRenderer = Callable[[int, Optional[int], LookupResult], str]
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class Progress:
+    """Counts results without producing any output (``none`` mode)."""
+
+    def __init__(self, stream: TextIO, total: Optional[int]):
+        self.stream = stream
+        self.total = total
+        self.count = 0
+        self.found = 0
+        self.started = time.monotonic()
+
+    def advance(self, result: LookupResult) -> None:
+        self.count += 1
+        if result.found:
+            self.found += 1
+
+    def finish(self) -> None:
+        return None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        rate = self.rate
+        if self.total is None or rate <= 0:
+            return None
+        return max(self.total - self.count, 0) / rate
+
+
+class LineProgress(Progress):
+    """Print one formatted line per result (``lines`` / ``--verbose`` mode)."""
+
+    def __init__(self, stream: TextIO, total: Optional[int], render: LineRenderer):
+        super().__init__(stream, total)
+        self._render = render
+
+    def advance(self, result: LookupResult) -> None:
+        super().advance(result)
+        print(self._render(self.count, self.total, result), file=self.stream, flush=True)
+
+
+class _ThrottledProgress(Progress, ABC):
+    """Counts results and calls :meth:`render` at most every ``interval`` seconds."""
+
+    interval = BAR_INTERVAL
+
+    def __init__(self, stream: TextIO, total: Optional[int]):
+        super().__init__(stream, total)
+        self._next_render = self.started + self.interval
+
+    def advance(self, result: LookupResult) -> None:
+        self.count += 1
+        if result.found:
+            self.found += 1
+        if self.count % CLOCK_STRIDE == 0:
+            now = time.monotonic()
+            if now >= self._next_render:
+                self._next_render = now + self.interval
+                self.render()
+
+    @abstractmethod
+    def render(self) -> None:
+        """Write the current state to ``stream``."""
+
+    def finish(self) -> None:
+        self.render()
+
+
+class BarProgress(_ThrottledProgress):
+    """Single, rate-limited progress bar rewritten in place (TTY default)."""
+
+    def render(self) -> None:
+        if self.total:
+            fraction = min(self.count / self.total, 1.0)
+            filled = int(BAR_WIDTH * fraction)
+            bar = f"[{'#' * filled}{'.' * (BAR_WIDTH - filled)}] {fraction:6.1%} "
+        else:
+            bar = ""
+        eta = self.eta
+        eta_text = f" ETA {format_duration(eta)}" if eta is not None else ""
+        total = self.total if self.total is not None else "?"
+        line = f"\r{bar}{self.count}/{total} {self.rate:,.0f}/s{eta_text}"
+        self.stream.write(line.ljust(79))
+        self.stream.flush()
+
+    def finish(self) -> None:
+        super().finish()
+        self.stream.write("\n")
+        self.stream.flush()
+
+
+class RateProgress(_ThrottledProgress):
+    """Periodic throughput report suited to non-TTY logs."""
+
+    interval = RATE_INTERVAL
+
+    def render(self) -> None:
+        found_pct = self.found / self.count if self.count else 0.0
+        if self.total:
+            position = f"{self.count}/{self.total} ({self.count / self.total:.1%})"
+        else:
+            position = str(self.count)
+        eta = self.eta
+        eta_text = f", ETA {format_duration(eta)}" if eta is not None else ""
+        print(
+            f"Processed {position} numbers, {self.rate:,.0f}/s, found {found_pct:.1%}{eta_text}",
+            file=self.stream,
+            flush=True,
+        )
+
+
+def create_progress(mode: str, *, stream: TextIO, total: Optional[int], render: LineRenderer) -> Progress:
+    """Build the reporter for ``mode``; ``auto`` picks a bar on a TTY and rate logs otherwise."""
+    if mode == "auto":
+        mode = "bar" if stream.isatty() else "rate"
+    if mode == "bar":
+        return BarProgress(stream, total)
+    if mode == "lines":
+        return LineProgress(stream, total, render)
+    if mode == "rate":
+        return RateProgress(stream, total)
+    if mode == "none":
+        return Progress(stream, total)
+    raise ValueError(f"Unknown progress mode: {mode}")
@@ -0,0 +1,372 @@
+"""Long-running asyncio HTTP/JSON lookup service with request micro-batching.
+
+One :class:`~phone_lookup.store.PhoneLookupStore` stays open for the life of
+the process.  Concurrent requests are queued and coalesced into micro-batches
+of up to ``max_batch`` numbers; each batch is resolved by
+:func:`~phone_lookup.lookup.run_lookup` inside one read transaction on a small
+thread pool, so the event loop never blocks on LMDB.
+
+Endpoints::
+
+    GET  /lookup?number=4155551234         -> {"number": ..., "found": ..., ...}
+    POST /lookup  {"numbers": ["...", ...]} -> {"results": [...]}
+    GET  /health                            -> {"status": "ok", ...}
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from .defaults import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_THREADS
+from .lookup import DEFAULT_CHUNK_SIZE, LookupEngine, LookupResult, format_line_type, run_lookup
+from .store import PhoneLookupStore
+
+MAX_BODY_BYTES = 1 << 20
+MAX_REQUEST_NUMBERS = 10_000
+# How often the service checks for a newly published store generation.
+REFRESH_INTERVAL = 1.0
+
+Resolver = Callable[[List[str]], List[LookupResult]]
+_Pending = Tuple[Sequence[str], "asyncio.Future[List[LookupResult]]"]
+
+
+def result_to_json(result: LookupResult) -> Dict[str, Any]:
+    return {
+        "number": result.original,
+        "normalized": result.normalized,
+        "ltype": result.ltype,
+        "line_type": format_line_type(result.ltype),
+        "carrier": result.common_name,
+        "found": result.found,
+    }
+
+
+def report_error(message: str, exc: BaseException) -> None:
+    """Hand an error the service recovered from to the event loop's exception handler."""
+    asyncio.get_running_loop().call_exception_handler({"message": message, "exception": exc})
+
+
+@dataclass
+class BatchStats:
+    requests: int = 0
+    batches: int = 0
+    numbers: int = 0
+
+
+class MicroBatcher:
+    """Coalesce concurrent :meth:`submit` calls into batches resolved on ``executor``.
+
+    A batch is started as soon as a thread is free; everything queued by then
+    (up to ``max_batch`` numbers) joins it.  ``window`` seconds of extra
+    waiting can be added to trade latency for larger batches under light load.
+    """
+
+    def __init__(
+        self,
+        resolve: Resolver,
+        executor: ThreadPoolExecutor,
+        *,
+        threads: int,
+        max_batch: int = DEFAULT_CHUNK_SIZE,
+        window: float = 0.0,
+    ):
+        if threads <= 0:
+            raise ValueError("threads must be positive")
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self._resolve = resolve
+        self._executor = executor
+        self._threads = threads
+        self._max_batch = max_batch
+        self._window = window
+        self._queue: "asyncio.Queue[_Pending]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(threads)
+        self._dispatcher: Optional[asyncio.Task[None]] = None
+        self._running: set[asyncio.Task[None]] = set()
+        self.stats = BatchStats()
+
+    def start(self) -> None:
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def submit(self, numbers: Sequence[str]) -> List[LookupResult]:
+        if not numbers:
+            return []
+        future: asyncio.Future[List[LookupResult]] = asyncio.get_running_loop().create_future()
+        self.stats.requests += 1
+        self._queue.put_nowait((numbers, future))
+        return await future
+
+    async def exclusive(self, action: Callable[[], Any]) -> Any:
+        """Run ``action`` on the executor once no batch is in flight, holding new ones back."""
+        for _ in range(self._threads):
+            await self._slots.acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, action)
+        finally:
+            for _ in range(self._threads):
+                self._slots.release()
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            if self._window > 0:
+                await asyncio.sleep(self._window)
+            await self._slots.acquire()
+            while size < self._max_batch and not self._queue.empty():
+                pending = self._queue.get_nowait()
+                batch.append(pending)
+                size += len(pending[0])
+            task = loop.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[_Pending]) -> None:
+        try:
+            numbers = [number for request, _ in batch for number in request]
+            self.stats.batches += 1
+            self.stats.numbers += len(numbers)
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self._executor, self._resolve, numbers)
+            except Exception as exc:
+                if len(batch) == 1:
+                    _settle(batch[0][1], exc)
+                else:
+                    # Resolve each request on its own, so one bad request does not fail those sharing its batch.
+                    await self._run_separately(batch)
+                return
+            start = 0
+            for request, future in batch:
+                end = start + len(request)
+                if not future.done():
+                    future.set_result(results[start:end])
+                start = end
+        finally:
+            self._slots.release()
+
+    async def _run_separately(self, batch: List[_Pending]) -> None:
+        loop = asyncio.get_running_loop()
+        for request, future in batch:
+            try:
+                results = await loop.run_in_executor(self._executor, self._resolve, list(request))
+            except Exception as exc:
+                _settle(future, exc)
+            else:
+                _settle(future, results)
+
+
+def _settle(future: "asyncio.Future[List[LookupResult]]", outcome: Union[List[LookupResult], Exception]) -> None:
+    if future.done():
+        return
+    if isinstance(outcome, Exception):
+        future.set_exception(outcome)
+    else:
+        future.set_result(outcome)
+
+
+class LookupService:
+    """HTTP front end plus micro-batcher around one open store or lookup engine.
+
+    ``store`` may be ``None`` for engines that answer without one (``mmap``).
+    """
+
+    def __init__(
+        self,
+        store: Optional[PhoneLookupStore],
+        source: Union[PhoneLookupStore, LookupEngine, None] = None,
+        *,
+        threads: int = DEFAULT_THREADS,
+        max_batch: int = DEFAULT_CHUNK_SIZE,
+        window: float = 0.0,
+    ):
+        self.store = store
+        self.source = source if source is not None else store
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="phone-lookup")
+        self._threads = threads
+        self._max_batch = max_batch
+        self._window = window
+        self.batcher: Optional[MicroBatcher] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._refresher: Optional[asyncio.Task[None]] = None
+        self.started = time.monotonic()
+
+    def _resolve(self, numbers: List[str]) -> List[LookupResult]:
+        # Refreshing is coordinated by the service so no thread reopens the store under another.
+        return list(run_lookup(self.source, numbers, chunk_size=len(numbers), refresh=False))
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Tuple[str, int]:
+        """Start listening; returns the bound ``(host, port)`` (useful with port 0)."""
+        self.batcher = MicroBatcher(
+            self._resolve,
+            self._executor,
+            threads=self._threads,
+            max_batch=self._max_batch,
+            window=self._window,
+        )
+        self.batcher.start()
+        self._refresher = asyncio.get_running_loop().create_task(self._refresh_periodically())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        address = self._server.sockets[0].getsockname()
+        return address[0], address[1]
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None, "call start() first"
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+        if self.batcher is not None:
+            await self.batcher.close()
+        self._executor.shutdown(wait=True)
+
+    async def _refresh_periodically(self) -> None:
+        assert self.batcher is not None
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            # A store picks up new generations, a snapshot engine a re-exported file.
+            try:
+                await self.batcher.exclusive(self.source.refresh)
+            except Exception as exc:
+                # Keep serving the data already open and try again on the next tick.
+                report_error("Refreshing the lookup source failed", exc)
+
+    async def lookup_many(self, numbers: Sequence[str]) -> List[LookupResult]:
+        assert self.batcher is not None, "call start() first"
+        return await self.batcher.submit(numbers)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if len(parts) != 3:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "malformed request line"}, False)
+                    break
+                method, target, version = parts
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                try:
+                    status, payload = await self._route(method, target, body)
+                except Exception as exc:
+                    report_error("Lookup request failed", exc)
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:  # pragma: no cover - peer already gone
+                pass
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[HTTPStatus, Any]:
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use GET"}
+            return HTTPStatus.OK, self.health()
+        if url.path != "/lookup":
+            return HTTPStatus.NOT_FOUND, {"error": f"no such endpoint: {url.path}"}
+        if method == "GET":
+            numbers = parse_qs(url.query).get("number")
+            if not numbers:
+                return HTTPStatus.BAD_REQUEST, {"error": "missing 'number' query parameter"}
+            (result,) = await self.lookup_many(numbers[:1])
+            return HTTPStatus.OK, result_to_json(result)
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use GET or POST"}
+        try:
+            request = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            return HTTPStatus.BAD_REQUEST, {"error": "body must be JSON"}
+        if isinstance(request, dict) and isinstance(request.get("number"), str):
+            (result,) = await self.lookup_many([request["number"]])
+            return HTTPStatus.OK, result_to_json(result)
+        numbers = request.get("numbers") if isinstance(request, dict) else None
+        if not isinstance(numbers, list) or not all(isinstance(number, str) for number in numbers):
+            return HTTPStatus.BAD_REQUEST, {"error": "expected {\"numbers\": [\"...\"]} or {\"number\": \"...\"}"}
+        if len(numbers) > MAX_REQUEST_NUMBERS:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"at most {MAX_REQUEST_NUMBERS} numbers per request"}
+        results = await self.lookup_many(numbers)
+        return HTTPStatus.OK, {"results": [result_to_json(result) for result in results]}
+
+    def health(self) -> Dict[str, Any]:
+        stats = self.batcher.stats if self.batcher is not None else BatchStats()
+        return {
+            "status": "ok",
+            "generation": self.store.generation if self.store is not None else None,
+            "uptime": round(time.monotonic() - self.started, 3),
+            "requests": stats.requests,
+            "batches": stats.batches,
+            "numbers": stats.numbers,
+        }
+
+
+async def serve(service: LookupService, host: str, port: int, *, ready: Callable[[str, int], None]) -> None:
+    """Run ``service`` until cancelled, then drain in-flight batches and stop."""
+    bound = await service.start(host, port)
+    ready(*bound)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
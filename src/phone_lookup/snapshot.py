@@ -0,0 +1,264 @@
+"""Immutable, memory-mapped snapshots of the resolved NPA-NXX-block table.
+
+A snapshot is one little-endian file::
+
+    header    magic, version, override / record / entry / string counts, string bytes
+    numbers   overridden 10-digit numbers as sorted u64 values
+    overrides entry u32 of every overridden number
+    records   (prefix u32, entry u32) pairs sorted by the 7-digit prefix
+    entries   (LTYPE string u32, carrier name string u32) pairs
+    offsets   string count + 1 u32 offsets into the string bytes
+    strings   UTF-8 text of every distinct line type and carrier name
+
+:class:`SnapshotIndex` maps the file read-only and binary-searches the
+prefix column through a :class:`memoryview`, so the records are never copied
+into Python objects and every process opening the same file shares one copy
+in the page cache.  Numbers of the store's override table are kept in their own
+sorted column and checked first, so snapshots answer ported numbers like the
+store does.  Only the strings of entries that are actually returned
+are decoded, once each.  Reading needs neither the store nor a storage
+backend, so the file can be shipped to hosts without lmdb.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .lookup import NOT_FOUND, LookupEngine, Resolution, merge_overrides
+
+if TYPE_CHECKING:
+    from .store import PhoneLookupStore
+
+SNAPSHOT_MAGIC = b"PLSN"
+SNAPSHOT_VERSION = 2
+# Padded to 8 bytes so the u64 number column that follows is aligned.
+_HEADER = struct.Struct("<4sB3xIIIII4x")
+
+
+def _resolved_entries(store: "PhoneLookupStore") -> Iterator[Tuple[int, Tuple[str, str]]]:
+    """``(prefix, (LTYPE, carrier name))`` of every NPA-NXX-block of ``store``, in prefix order."""
+    from .codec import decode_record
+    from .keys import NPANXX_TABLE, RESOLVED_TABLE
+    from .lookup import LOOKUP_FIELDS
+    from .store import resolve_blocks
+
+    if store.resolved_is_current():
+        for key, raw in store.iterate_encoded(RESOLVED_TABLE):
+            if len(key) != 4:
+                continue  # The generation stamp sorts after every prefix.
+            data = decode_record(raw)
+            yield int.from_bytes(key, "big"), (data.get("LTYPE", ""), data.get("CommonName", ""))
+        return
+    # Stale or older stores: derive the entries the same way the resolved table is built.
+    yield from resolve_blocks(store.iterate_table(NPANXX_TABLE, LOOKUP_FIELDS), store.resolve_carrier)
+
+
+def _override_entries(store: "PhoneLookupStore") -> Iterator[Tuple[int, Tuple[str, str]]]:
+    """``(number, (LTYPE, carrier name))`` of every override of ``store``, in number order."""
+    from .keys import OVERRIDE_TABLE
+    from .lookup import override_resolution
+
+    for key, data in store.iterate_table(OVERRIDE_TABLE):
+        _, ltype, name = override_resolution(store, data)
+        yield int.from_bytes(key, "big"), (ltype, name)
+
+
+def write_snapshot(store: "PhoneLookupStore", path: Path) -> Tuple[int, int]:
+    """Write the snapshot of ``store`` to ``path``; returns ``(records, distinct entries)``.
+
+    The file is written next to ``path`` and renamed over it, so processes
+    that still map the previous snapshot keep reading it unchanged.
+    """
+    strings: Dict[str, int] = {}
+    entries: Dict[Tuple[str, str], int] = {}
+    numbers = array("Q")
+    overrides = array("I")
+    records = array("I")
+    for column, keys, items in (
+        (overrides, numbers, _override_entries(store)),
+        (records, records, _resolved_entries(store)),
+    ):
+        for key, entry in items:
+            entry_id = entries.get(entry)
+            if entry_id is None:
+                entry_id = entries[entry] = len(entries)
+            keys.append(key)
+            column.append(entry_id)
+    table = array("I")
+    for ltype, name in entries:
+        table.append(strings.setdefault(ltype, len(strings)))
+        table.append(strings.setdefault(name, len(strings)))
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = array("I", [0])
+    for text in encoded:
+        offsets.append(offsets[-1] + len(text))
+    if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+        for column in (numbers, overrides, records, table, offsets):
+            column.byteswap()
+
+    path = Path(path)
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(numbers), len(records) // 2, len(entries), len(encoded), offsets[-1]
+    )
+    fd, temporary = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(header)
+            numbers.tofile(handle)
+            overrides.tofile(handle)
+            records.tofile(handle)
+            table.tofile(handle)
+            offsets.tofile(handle)
+            handle.write(b"".join(encoded))
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return len(records) // 2, len(entries)
+
+
+def _file_identity(stat: os.stat_result) -> Tuple[int, int, int, int]:
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class SnapshotIndex(LookupEngine):
+    """Answer lookups from a memory-mapped snapshot written by :func:`write_snapshot`.
+
+    :meth:`refresh` maps the file again once a new export has replaced it.
+    """
+
+    def __init__(self, path: Path):
+        if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+            raise ValueError("Snapshots can only be read on little-endian hosts")
+        self.path = Path(path)
+        self._map_file()
+
+    def _map_file(self) -> None:
+        with self.path.open("rb") as handle:
+            try:
+                self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # An empty file cannot be mapped.
+                raise ValueError(f"Not a lookup snapshot: {self.path}") from exc
+            self._identity = _file_identity(os.fstat(handle.fileno()))
+        try:
+            self._views = self._map_sections()
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    def refresh(self) -> bool:
+        """Map the snapshot again if ``export-snapshot`` replaced the file; returns whether it did.
+
+        Like :meth:`~phone_lookup.store.PhoneLookupStore.refresh`, this must not
+        run while another thread is looking up.  A replacement that cannot be
+        read raises and leaves the current snapshot in use.
+        """
+        try:
+            identity = _file_identity(os.stat(self.path))
+        except FileNotFoundError:
+            return False
+        if identity == self._identity:
+            return False
+        mapped, views, current = self._mmap, self._views, self._identity
+        try:
+            self._map_file()
+        except BaseException:
+            self._mmap, self._views, self._identity = mapped, views, current
+            raise
+        _unmap(mapped, views)
+        return True
+
+    def _map_sections(self) -> List[memoryview]:
+        try:
+            magic, version, overridden, count, entries, strings, text_size = _HEADER.unpack_from(self._mmap)
+        except struct.error as exc:
+            raise ValueError(f"Not a lookup snapshot: {self.path}") from exc
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported lookup snapshot: {self.path}")
+        typecodes = "QIIII"
+        sizes = [words * 4 for words in (overridden * 2, overridden, count * 2, entries * 2, strings + 1)]
+        if _HEADER.size + sum(sizes) + text_size != len(self._mmap):
+            raise ValueError(f"Corrupt lookup snapshot: {self.path}")
+        view = memoryview(self._mmap)
+        views = [view]
+        start = _HEADER.size
+        for typecode, size in zip(typecodes, sizes):
+            views.append(view[start : start + size].cast(typecode))
+            start += size
+        self._numbers, self._overrides, records, self._entries, self._offsets = views[1:]
+        self._keys = records[0::2]
+        self._values = records[1::2]
+        self._text = view[start:]
+        views.extend((self._keys, self._values, self._text))
+        self._resolutions: List[Optional[Resolution]] = [None] * entries
+        return views
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _string(self, string_id: int) -> str:
+        return str(self._text[self._offsets[string_id] : self._offsets[string_id + 1]], "utf-8")
+
+    def _resolution(self, entry_id: int) -> Resolution:
+        resolution = self._resolutions[entry_id]
+        if resolution is None:
+            ltype = self._string(self._entries[entry_id * 2])
+            name = self._string(self._entries[entry_id * 2 + 1])
+            resolution = self._resolutions[entry_id] = (True, ltype, name)
+        return resolution
+
+    def lookup(self, digits: str) -> Resolution:
+        return self.lookup_many([digits])[0]
+
+    def lookup_many(self, numbers: Sequence[str]) -> list[Resolution]:
+        if not len(self._numbers):
+            return self.lookup_blocks(numbers)
+        return list(merge_overrides(self.overrides(numbers), numbers, self.lookup_blocks))
+
+    def overrides(self, numbers: Sequence[str]) -> Dict[int, Resolution]:
+        overridden = self._numbers
+        count = len(overridden)
+        found: Dict[int, Resolution] = {}
+        if not count:
+            return found
+        for index, digits in enumerate(numbers):
+            number = int(digits)
+            position = bisect_left(overridden, number)
+            if position != count and overridden[position] == number:
+                found[index] = self._resolution(self._overrides[position])
+        return found
+
+    def lookup_blocks(self, numbers: Sequence[str]) -> list[Resolution]:
+        keys = self._keys
+        values = self._values
+        resolutions = self._resolutions
+        count = len(keys)
+        results: list[Resolution] = []
+        append = results.append
+        for digits in numbers:
+            prefix = int(digits[:7])
+            index = bisect_left(keys, prefix)
+            if index == count or keys[index] != prefix:
+                append(NOT_FOUND)
+                continue
+            entry_id = values[index]
+            append(resolutions[entry_id] or self._resolution(entry_id))
+        return results
+
+    def close(self) -> None:
+        _unmap(self._mmap, self._views)
+        self._views = []
+
+
+def _unmap(mapped: mmap.mmap, views: List[memoryview]) -> None:
+    # Views must be released, most derived first, before the map can close.
+    for view in reversed(views):
+        view.release()
+    mapped.close()
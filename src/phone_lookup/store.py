@@ -1,77 +1,833 @@
-"""LMDB-backed storage utilities for phone lookup data."""
+"""LMDB-backed storage utilities for phone lookup data.
+
+NPANXX and OCN records live in separate named databases keyed by the compact
+binary keys from :mod:`phone_lookup.keys`, next to the optional exact-number
+``override`` table.  Textual keys such as
+``npanxx:415555:1`` are still accepted by the generic accessors and routed to
+the right table.  The environment comes from one of the backends in
+:mod:`phone_lookup.backends`: py-lmdb, or SQLite where lmdb is not installed.
+"""
 from __future__ import annotations
 
-import json
 import os
+import struct
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from itertools import groupby
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
-try:
-    import lmdb  # type: ignore[import]
-except ModuleNotFoundError:  # pragma: no cover - fallback for constrained environments
-    from . import _lmdb_stub as lmdb  # type: ignore[import]
+from .backends import default_backend, detect_backend, load_backend
+from .carriers import CARRIER_NAME_FIELDS, DEFAULT_CARRIER_CACHE_SIZE, CarrierCache, carrier_name
+from .codec import OVERRIDE_FIELDS, RESOLVED_SCHEMA, TABLE_SCHEMAS, decode_record, encode_record, is_binary
+from .generations import current_generation, generation_path
+from .instrumentation import CARRIER, DECODE, LMDB_GET, StageStats
+from .keys import (
+    NPANXX_TABLE,
+    OCN_TABLE,
+    OVERRIDE_TABLE,
+    RESOLVED_TABLE,
+    TABLE_NAMES,
+    join_key,
+    pack_key,
+    pack_npanxx,
+    pack_number,
+    pack_ocn,
+    pack_prefix,
+    split_key,
+    unpack_key,
+    unpack_npanxx,
+    unpack_ocn,
+)
+from .overrides import BloomFilter, OverrideCounter
 
 DEFAULT_MAP_SIZE = int(os.getenv("PHONE_LOOKUP_LMDB_MAP_SIZE", str(1 << 33)))
+# Seconds a thread may keep reading one snapshot before it picks up newer commits; 0 renews on every read.
+DEFAULT_MAX_STALENESS = float(os.getenv("PHONE_LOOKUP_MAX_STALENESS", "0"))
+# Reader slots in the LMDB lock table; every thread that reads holds one while its transaction is open.
+DEFAULT_MAX_READERS = int(os.getenv("PHONE_LOOKUP_MAX_READERS", "126"))
+# Finished read transactions py-lmdb keeps reset for renewal, so reader threads never allocate a new one.
+MAX_SPARE_TXNS = 32
+MAX_DBS = 4
+# Keys a forward scan steps over with ``next`` before it searches the B-tree again.
+SCAN_STEPS = 2
 
 MappingItem = Tuple[str, Dict[str, str]]
+EncodedItem = Tuple[bytes, bytes]
+# (found, LTYPE, carrier name), as returned by phone_lookup.lookup.
+ResolvedEntry = Tuple[bool, str, str]
+
+# The resolved table is stamped with the ID of the transaction that built it.  The
+# stamp key sorts after every 4-byte prefix key.
+RESOLVED_STAMP_KEY = b"\xff" * 5
+# The Bloom filter of the override table is derived in the same transaction and stored next to the stamp.
+OVERRIDE_FILTER_KEY = b"\xff" * 6
+_STAMP = struct.Struct(">Q")
+# Tables a store may lack: derived ones, and the override table until overrides are first written.
+_OPTIONAL_TABLES = (RESOLVED_TABLE, OVERRIDE_TABLE)
+_DERIVE_FIELDS = ("LTYPE", "OCN")
+# Exchange-wide NPANXX record used for thousands blocks without one of their own.
+FALLBACK_BLOCK = "A"
+
+# Backend module that new stores use by default (py-lmdb, or the SQLite backend without it).
+lmdb = load_backend()
+
+# Key prefixes of the single-keyspace layout used before named databases.
+_LEGACY_PREFIXES = tuple(f"{table}:".encode("utf-8") for table in TABLE_NAMES)
+
+
+class LegacyLayoutError(ValueError):
+    """The store still keeps every table in the main database; run ``phone-lookup migrate``."""
+
+
+def encode_value(table: str, mapping: Dict[str, str]) -> bytes:
+    """Encode ``mapping`` as a record of ``table``."""
+    return encode_record(mapping, TABLE_SCHEMAS[table])
+
+
+def _decode_mapping(raw: bytes | None, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+    return decode_record(raw, fields)
+
+
+class StoreReader:
+    """Read-only view that serves many lookups from one transaction and a cursor per table.
+
+    ``resolved`` is true when the derived ``resolved`` table is current in this
+    transaction, so :meth:`get_resolved` can answer a lookup with one read.
+    ``overrides`` is the Bloom filter of the numbers in the override table, or
+    ``None`` when the store has no overrides; readers add what they checked to
+    ``override_counts``.
+    """
+
+    def __init__(
+        self,
+        cursors: Mapping[str, lmdb.Cursor],
+        carriers: CarrierCache,
+        entries: Optional[Dict[bytes, ResolvedEntry]] = None,
+        overrides: Optional[BloomFilter] = None,
+        override_counts: Optional[OverrideCounter] = None,
+        txn_id: Optional[int] = None,
+    ):
+        self._cursors = cursors
+        self.carriers = carriers
+        # Carrier names are only cached while the cache is kept for this transaction.
+        self.txn_id = txn_id
+        self.resolved = entries is not None
+        self.overrides = overrides
+        self.override_counts = override_counts if override_counts is not None else OverrideCounter()
+        # Decoded resolved values by their stored bytes; shared by every reader of a store.
+        self._entries: Dict[bytes, ResolvedEntry] = entries if entries is not None else {}
+        # Per table: (target, key) of the last seek, so ascending seeks can move forward from it.
+        self._seeks: Dict[str, Tuple[bytes, Optional[bytes]]] = {}
+
+    def get_packed(self, table: str, key: bytes, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Return the record of ``table`` stored under the packed ``key``."""
+        cursor = self._cursors[table]
+        if not cursor.set_key(key):
+            return {}
+        return decode_record(cursor.value(), fields)
+
+    def get_resolved(self, digits: str) -> Optional[ResolvedEntry]:
+        """``(True, LTYPE, carrier name)`` of a normalized number from the resolved table, ``None`` if absent."""
+        cursor = self._cursors[RESOLVED_TABLE]
+        if not cursor.set_key(pack_prefix(digits)):
+            return None
+        return self._entry(cursor.value())
+
+    def _entry(self, raw: bytes) -> ResolvedEntry:
+        entry = self._entries.get(raw)
+        if entry is None:
+            data = decode_record(raw)
+            entry = self._entries[raw] = (True, data.get("LTYPE", ""), data.get("CommonName", ""))
+        return entry
+
+    def seek(self, table: str, key: bytes) -> Optional[bytes]:
+        """Position the cursor of ``table`` on the first key ``>= key`` and return it (``None`` past the end).
+
+        When keys are sought in ascending order, the cursor moves forward with
+        ``next`` from the previous position and only searches the B-tree again
+        after :data:`SCAN_STEPS` keys, so neighbouring pages are read in order.
+        """
+        cursor = self._cursors[table]
+        previous = self._seeks.get(table)
+        # Reuse the previous position only if nothing else (e.g. get_packed) has moved the cursor.
+        if previous is not None and previous[0] <= key and (previous[1] is None or cursor.key() == previous[1]):
+            found = previous[1]
+            steps = SCAN_STEPS
+            while found is not None and found < key:
+                if not steps:
+                    found = bytes(cursor.key()) if cursor.set_range(key) else None
+                    break
+                found = bytes(cursor.key()) if cursor.next() else None
+                steps -= 1
+        else:
+            found = bytes(cursor.key()) if cursor.set_range(key) else None
+        self._seeks[table] = (key, found)
+        return found
+
+    def current(self, table: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Decode the record under the cursor of ``table`` after a :meth:`seek`."""
+        return decode_record(self._cursors[table].value(), fields)
+
+    def get_npanxx(self, npanxx: str, block: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        return self.get_packed(NPANXX_TABLE, pack_npanxx(npanxx, block), fields)
+
+    def get_ocn(self, ocn: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        if not ocn:
+            return {}
+        return self.get_packed(OCN_TABLE, pack_ocn(ocn), fields)
+
+    def get_override(self, digits: str) -> Dict[str, str]:
+        """The override record (``OCN``, ``LTYPE``) of a normalized number, empty if it has none."""
+        if OVERRIDE_TABLE not in self._cursors:
+            return {}
+        return self.get_packed(OVERRIDE_TABLE, pack_number(digits), OVERRIDE_FIELDS)
+
+    def get_mapping(self, key: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        try:
+            table, packed = split_key(key)
+        except ValueError:
+            return {}
+        if table not in self._cursors:
+            return {}
+        return self.get_packed(table, packed, fields)
+
+    def get_many(self, keys: Iterable[str]) -> List[Dict[str, str]]:
+        return [self.get_mapping(key) for key in keys]
+
+    def resolve_carrier(self, ocn: str) -> str:
+        return _resolve_carrier(self, ocn)
+
+
+class TimedStoreReader(StoreReader):
+    """:class:`StoreReader` that charges NPANXX reads, decoding and carrier resolution to ``stats``.
+
+    Carrier resolution is timed as a whole, including its own OCN reads.
+    """
 
+    def __init__(
+        self,
+        cursors: Mapping[str, lmdb.Cursor],
+        carriers: CarrierCache,
+        stats: StageStats,
+        entries: Optional[Dict[bytes, ResolvedEntry]] = None,
+        overrides: Optional[BloomFilter] = None,
+        override_counts: Optional[OverrideCounter] = None,
+        txn_id: Optional[int] = None,
+    ):
+        super().__init__(cursors, carriers, entries, overrides, override_counts, txn_id)
+        self.stats = stats
+        self._untimed = StoreReader(cursors, carriers, txn_id=txn_id)
 
-def _encode_mapping(mapping: Dict[str, str]) -> bytes:
-    return json.dumps(mapping, ensure_ascii=False).encode("utf-8")
+    def get_packed(self, table: str, key: bytes, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        clock = time.perf_counter
+        start = clock()
+        cursor = self._cursors[table]
+        found = cursor.set_key(key)
+        read = clock()
+        self.stats.add(LMDB_GET, read - start, 1)
+        if not found:
+            return {}
+        record = decode_record(cursor.value(), fields)
+        self.stats.add(DECODE, clock() - read, 1)
+        return record
 
+    def get_resolved(self, digits: str) -> Optional[ResolvedEntry]:
+        clock = time.perf_counter
+        start = clock()
+        cursor = self._cursors[RESOLVED_TABLE]
+        found = cursor.set_key(pack_prefix(digits))
+        read = clock()
+        self.stats.add(LMDB_GET, read - start, 1)
+        if not found:
+            return None
+        entry = self._entry(cursor.value())
+        self.stats.add(DECODE, clock() - read, 1)
+        return entry
 
-def _decode_mapping(raw: bytes | None) -> Dict[str, str]:
-    if raw is None:
-        return {}
+    def seek(self, table: str, key: bytes) -> Optional[bytes]:
+        start = time.perf_counter()
+        found = super().seek(table, key)
+        self.stats.add(LMDB_GET, time.perf_counter() - start, 1)
+        return found
+
+    def current(self, table: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        start = time.perf_counter()
+        record = super().current(table, fields)
+        self.stats.add(DECODE, time.perf_counter() - start, 1)
+        return record
+
+    def resolve_carrier(self, ocn: str) -> str:
+        start = time.perf_counter()
+        name = self._untimed.resolve_carrier(ocn)
+        self.stats.add(CARRIER, time.perf_counter() - start, 1)
+        return name
+
+
+def _resolve_carrier(source: StoreReader, ocn: str) -> str:
+    name = source.carriers.get(ocn)
+    if name is None:
+        name = carrier_name(source.get_ocn(ocn, CARRIER_NAME_FIELDS))
+        source.carriers.put(ocn, name, source.txn_id)
+    return name
+
+
+def resolve_blocks(
+    records: Iterable[Tuple[bytes, Mapping[str, str]]], carrier: Callable[[str], str]
+) -> Iterator[Tuple[int, Tuple[str, str]]]:
+    """``(7-digit prefix, (LTYPE, carrier name))`` of every NPA-NXX-block a lookup finds.
+
+    ``records`` are packed NPANXX keys with their decoded ``LTYPE`` and ``OCN``,
+    in key order; ``carrier`` names an OCN and is called once per distinct
+    OCN.  Blocks without a record take the exchange's ``A`` record.  The
+    resolved table and the memory and snapshot engines are all derived here,
+    so they answer alike.
+    """
+    names: Dict[str, str] = {"": "UNKNOWN"}
+    unpacked = ((unpack_npanxx(key), data) for key, data in records)
+    for exchange, group in groupby(unpacked, key=lambda item: item[0][0]):
+        entries: Dict[str, Tuple[str, str]] = {}
+        for (_, block), data in group:
+            if data:
+                ocn = data.get("OCN") or ""
+                name = names.get(ocn)
+                if name is None:
+                    name = names[ocn] = carrier(ocn) or "UNKNOWN"
+                entries[block] = (data.get("LTYPE") or "UNKNOWN", name)
+        fallback = entries.get(FALLBACK_BLOCK)
+        base = exchange * 10
+        for digit, block in enumerate("0123456789"):
+            entry = entries.get(block, fallback)
+            if entry is not None:
+                yield base + digit, entry
+
+
+def _derive_override_filter(txn: lmdb.Transaction, db: object) -> Optional[BloomFilter]:
+    """Bloom filter of every number in the override table ``db``; ``None`` when it is empty."""
+    count = int(txn.stat(db)["entries"])
+    if not count:
+        return None
+    with txn.cursor(db=db) as cursor:
+        cursor.first()
+        return BloomFilter.build((int.from_bytes(key, "big") for key, _ in cursor.iternext()), count)
+
+
+def _has_legacy_keys(env: lmdb.Environment) -> bool:
+    with env.begin() as txn:
+        with txn.cursor() as cursor:
+            for prefix in _LEGACY_PREFIXES:
+                if cursor.set_range(prefix) and bytes(cursor.key()).startswith(prefix):
+                    return True
+    return False
+
+
+def _backend_for(path: Path, backend: Optional[str]) -> str:
+    """Backend of the environment at ``path``; ``backend`` (or the default) for a new one."""
+    found = detect_backend(path)
+    if found is None:
+        return backend or default_backend()
+    if backend is not None and backend != found:
+        raise ValueError(f"{path} holds a {found} store, not {backend}")
+    return found
+
+
+def _open_environment(path: Path, *, map_size: int, readonly: bool, backend: str) -> lmdb.Environment:
+    if readonly:
+        if not path.exists():
+            raise FileNotFoundError(f"Database path does not exist: {path}")
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+    return load_backend(backend).open(
+        str(path),
+        map_size=map_size,
+        subdir=True,
+        readonly=readonly,
+        max_dbs=MAX_DBS,
+        max_readers=DEFAULT_MAX_READERS,
+        max_spare_txns=MAX_SPARE_TXNS,
+        lock=True,
+        readahead=True,
+        writemap=False,
+    )
+
+
+def _open_tables(env: lmdb.Environment, path: Path, *, readonly: bool, backend: str) -> Dict[str, object]:
+    """Open every named table, refusing stores that still use the single-keyspace layout."""
+    not_found = load_backend(backend).NotFoundError
+    if _has_legacy_keys(env):
+        raise LegacyLayoutError(f"{path} uses the pre-table key layout; run `phone-lookup migrate` to convert it")
+    tables = {}
+    for table in TABLE_NAMES:
+        try:
+            tables[table] = env.open_db(table.encode("utf-8"), create=not readonly)
+        except not_found as exc:
+            raise ValueError(f"Database at {path} has no {table} table") from exc
     try:
-        return json.loads(raw.decode("utf-8"))
-    except json.JSONDecodeError:
-        return {}
+        tables[RESOLVED_TABLE] = env.open_db(RESOLVED_TABLE.encode("utf-8"), create=not readonly)
+    except not_found:
+        pass  # Imported before the derived table existed; lookups read the source tables.
+    try:
+        # Created by the first write to it, so opening an existing store never writes.
+        tables[OVERRIDE_TABLE] = env.open_db(OVERRIDE_TABLE.encode("utf-8"), create=False)
+    except not_found:
+        pass
+    return tables
+
+
+class _ReadSlot:
+    """One thread's read transaction on a store, kept open between reads while it is fresh enough."""
+
+    __slots__ = ("txn", "cursors", "entries", "overrides", "started", "epoch", "depth", "__weakref__")
+
+    def __init__(self) -> None:
+        self.txn: Optional[lmdb.Transaction] = None
+        # Cursors and resolved-table state of the outermost reader, kept as long as ``txn``.
+        self.cursors: Optional[Dict[str, lmdb.Cursor]] = None
+        self.entries: Optional[Dict[bytes, ResolvedEntry]] = None
+        self.overrides: Optional[BloomFilter] = None
+        self.started = 0.0
+        self.epoch = -1
+        # Nesting depth of the reads currently using ``txn``.
+        self.depth = 0
+
+    def abort(self) -> None:
+        # py-lmdb resets an aborted read transaction and renews it on the next begin().
+        if self.cursors is not None:
+            for cursor in self.cursors.values():
+                cursor.close()
+            self.cursors = self.entries = self.overrides = None
+        if self.txn is not None:
+            self.txn.abort()
+            self.txn = None
 
 
 class PhoneLookupStore:
-    """Convenience wrapper around an LMDB environment."""
+    """Convenience wrapper around an LMDB environment with one named database per table.
+
+    ``backend`` names the :mod:`~phone_lookup.backends` module behind ``env``.
 
-    def __init__(self, env: lmdb.Environment):
+    One store can be shared by many threads.  Each thread reads through its
+    own read transaction; by default it is reset after every read and
+    renewed for the next one, which reuses the same LMDB reader slot.  With
+    ``max_staleness`` seconds, a thread keeps its snapshot between reads and
+    renews it only once it is older than that or this store has written
+    since.  Commits from other processes then become visible within the bound.
+    """
+
+    def __init__(
+        self,
+        env: lmdb.Environment,
+        tables: Mapping[str, object],
+        *,
+        carrier_cache_size: int = DEFAULT_CARRIER_CACHE_SIZE,
+        backend: str = "lmdb",
+        max_staleness: float = DEFAULT_MAX_STALENESS,
+    ):
+        if max_staleness < 0:
+            raise ValueError("max_staleness must not be negative")
         self._env = env
+        self.backend = backend
+        self._tables = dict(tables)
+        self.carriers = CarrierCache(carrier_cache_size)
+        self.max_staleness = max_staleness
+        self._local = threading.local()
+        self._slots: "weakref.WeakSet[_ReadSlot]" = weakref.WeakSet()
+        self._slots_lock = threading.Lock()
+        # Bumped after every write through this store, so its threads renew their snapshots.
+        self._epoch = 0
+        self._resolved_entries: Dict[bytes, ResolvedEntry] = {}
+        # Override numbers checked, Bloom filter candidates and hits, over every reader of the store.
+        self.override_counts = OverrideCounter()
+        # (transaction ID, Bloom filter) of the override table as last seen by a reader.
+        self._override_filter: Optional[Tuple[int, Optional[BloomFilter]]] = None
+        # Set by :meth:`open` so :meth:`refresh` can follow newly published generations.
+        self.root: Optional[Path] = None
+        self.generation: Optional[str] = None
+        self._map_size = DEFAULT_MAP_SIZE
+        self._readonly = False
 
     @classmethod
-    def open(cls, path: Path, *, map_size: int = DEFAULT_MAP_SIZE) -> "PhoneLookupStore":
+    def open(
+        cls,
+        path: Path,
+        *,
+        map_size: int = DEFAULT_MAP_SIZE,
+        carrier_cache_size: int = DEFAULT_CARRIER_CACHE_SIZE,
+        readonly: bool = False,
+        backend: Optional[str] = None,
+        max_staleness: float = DEFAULT_MAX_STALENESS,
+    ) -> "PhoneLookupStore":
+        """Open (creating unless ``readonly``) the LMDB environment at ``path``.
+
+        When ``path`` is a generational root (see :mod:`phone_lookup.generations`)
+        the generation named by its ``CURRENT`` file is opened instead.  Existing
+        environments use the backend they were written with; ``backend`` picks
+        the one for a new environment.  A ``readonly`` store never takes the
+        writer lock, so lookup-only processes do not contend with imports.
+        Raises :class:`LegacyLayoutError` for stores that need
+        :meth:`upgrade_layout`.
+        """
         path = Path(path)
         if path.exists() and not path.is_dir():
             raise ValueError(f"Database path must be a directory: {path}")
-        path.mkdir(parents=True, exist_ok=True)
-        env = lmdb.open(
-            str(path),
-            map_size=map_size,
-            subdir=True,
-            max_dbs=1,
-            lock=True,
-            readahead=True,
-            writemap=False,
+        generation = current_generation(path)
+        env, tables, backend = cls._open_generation(
+            generation_path(path, generation), map_size=map_size, readonly=readonly, backend=backend
         )
-        return cls(env)
+        store = cls(env, tables, carrier_cache_size=carrier_cache_size, backend=backend, max_staleness=max_staleness)
+        store.root = path
+        store.generation = generation
+        store._map_size = map_size
+        store._readonly = readonly
+        return store
+
+    @staticmethod
+    def _open_generation(
+        path: Path, *, map_size: int, readonly: bool, backend: Optional[str] = None
+    ) -> Tuple[lmdb.Environment, Dict[str, object], str]:
+        backend = _backend_for(path, backend)
+        env = _open_environment(path, map_size=map_size, readonly=readonly, backend=backend)
+        try:
+            return env, _open_tables(env, path, readonly=readonly, backend=backend), backend
+        except BaseException:
+            env.close()
+            raise
+
+    @staticmethod
+    def upgrade_layout(path: Path, *, map_size: int = DEFAULT_MAP_SIZE) -> Tuple[int, int]:
+        """Move single-keyspace records at ``path`` into the named tables.
+
+        Records are moved in one write transaction.  Keys that cannot be packed
+        (and so could never be looked up) are dropped.  Returns ``(moved, dropped)``.
+        """
+        path = generation_path(Path(path), current_generation(Path(path)))
+        env = _open_environment(path, map_size=map_size, readonly=False, backend=_backend_for(path, None))
+        try:
+            tables = {table: env.open_db(table.encode("utf-8")) for table in TABLE_NAMES}
+            moved = dropped = 0
+            with env.begin(write=True) as txn:
+                legacy: List[Tuple[bytes, bytes]] = []
+                with txn.cursor() as cursor:
+                    for prefix in _LEGACY_PREFIXES:
+                        if not cursor.set_range(prefix):
+                            continue
+                        for key, value in cursor.iternext():
+                            if not key.startswith(prefix):
+                                break
+                            legacy.append((bytes(key), bytes(value)))
+                for key, value in legacy:
+                    txn.delete(key)
+                    try:
+                        table, packed = split_key(key.decode("utf-8"))
+                    except ValueError:
+                        dropped += 1
+                        continue
+                    txn.put(packed, value, db=tables[table])
+                    moved += 1
+        finally:
+            env.close()
+        return moved, dropped
+
+    def refresh(self) -> bool:
+        """Reopen on the published generation if it changed since this store was opened.
+
+        Must not be called while any thread is reading from the store.  Returns ``True``
+        when the store switched to a new generation.
+        """
+        if self.root is None:
+            return False
+        generation = current_generation(self.root)
+        if generation == self.generation:
+            return False
+        env, tables, backend = self._open_generation(
+            generation_path(self.root, generation),
+            map_size=self._map_size,
+            readonly=self._readonly,
+        )
+        self._abort_read_slots()
+        previous, self._env, self._tables, self.backend = self._env, env, tables, backend
+        self.generation = generation
+        self.carriers.clear()
+        self._override_filter = None
+        previous.close()
+        return True
+
+    @property
+    def path(self) -> Optional[Path]:
+        """Directory of the open LMDB environment (the current generation, if any)."""
+        if self.root is None:
+            return None
+        return generation_path(self.root, self.generation)
+
+    def last_transaction_id(self) -> int:
+        """ID of the last committed write transaction; changes on every write."""
+        return int(self._env.info()["last_txnid"])
 
     def close(self) -> None:
+        self._abort_read_slots()
         self._env.close()
 
+    def _abort_read_slots(self) -> None:
+        # Only called when no thread is reading (see refresh); idle slots then begin afresh.
+        with self._slots_lock:
+            slots = list(self._slots)
+        for slot in slots:
+            slot.abort()
+
+    def _begin_read(self) -> _ReadSlot:
+        """Return this thread's read slot, its transaction renewed if stale; pair with :meth:`_end_read`."""
+        try:
+            slot = self._local.slot
+        except AttributeError:
+            slot = self._local.slot = _ReadSlot()
+            with self._slots_lock:
+                self._slots.add(slot)
+        if slot.depth:
+            slot.depth += 1
+            return slot
+        epoch = self._epoch
+        if slot.txn is not None:
+            # Only kept between reads when max_staleness is set.
+            if epoch == slot.epoch and time.monotonic() - slot.started <= self.max_staleness:
+                slot.depth = 1
+                return slot
+            slot.abort()
+        slot.txn = self._env.begin(buffers=False)
+        slot.epoch = epoch
+        if self.max_staleness:
+            slot.started = time.monotonic()
+        slot.depth = 1
+        return slot
+
+    def _end_read(self) -> None:
+        slot = self._local.slot
+        slot.depth -= 1
+        if not slot.depth and not self.max_staleness:
+            # Release the snapshot at once so an idle thread never holds back page reuse.
+            slot.abort()
+
+    def _written(self) -> None:
+        self._epoch += 1
+        self.carriers.clear()
+        self._override_filter = None
+
+    def _db(self, table: str, txn: lmdb.Transaction) -> object:
+        """Handle of ``table`` for a write in ``txn``, creating the override table on its first write."""
+        db = self._tables.get(table)
+        if db is None and table == OVERRIDE_TABLE:
+            db = self._tables[table] = self._env.open_db(table.encode("utf-8"), txn=txn)
+        if db is None:
+            raise KeyError(table)
+        return db
+
     def __enter__(self) -> "PhoneLookupStore":
         return self
 
     def __exit__(self, exc_type, exc, tb) -> None:  # type: ignore[override]
         self.close()
 
-    def get_mapping(self, key: str) -> Dict[str, str]:
-        encoded_key = key.encode("utf-8")
-        with self._env.begin(buffers=False) as txn:
-            raw = txn.get(encoded_key)
-        return _decode_mapping(raw)
+    def get_packed(self, table: str, key: bytes, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Return the record of ``table`` stored under the packed ``key``."""
+        slot = self._begin_read()
+        try:
+            raw = slot.txn.get(key, db=self._tables[table])
+        finally:
+            self._end_read()
+        return _decode_mapping(raw, fields)
+
+    def get_npanxx(self, npanxx: str, block: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Return the NPANXX record for a 6-digit NPA-NXX and block (``0``-``9`` or ``A``)."""
+        return self.get_packed(NPANXX_TABLE, pack_npanxx(npanxx, block), fields)
+
+    def get_ocn(self, ocn: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Return the OCN record for ``ocn``."""
+        if not ocn:
+            return {}
+        return self.get_packed(OCN_TABLE, pack_ocn(ocn), fields)
+
+    def get_mapping(self, key: str, fields: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """Return the mapping stored at ``table:key``; ``fields`` limits which values are decoded."""
+        try:
+            table, packed = split_key(key)
+        except ValueError:
+            return {}
+        return self.get_packed(table, packed, fields)
+
+    @contextmanager
+    def reader(self, stats: Optional[StageStats] = None) -> Iterator[StoreReader]:
+        """Yield a :class:`StoreReader` bound to a single read transaction.
+
+        With ``stats`` the reader is a :class:`TimedStoreReader`.  The
+        transaction is the calling thread's own (see the class docstring).
+        """
+        slot = self._begin_read()
+        try:
+            if slot.depth == 1 and slot.cursors is not None:
+                cursors, entries, overrides = slot.cursors, slot.entries, slot.overrides
+            else:
+                txn = slot.txn
+                cursors = {table: txn.cursor(db=db) for table, db in self._tables.items()}
+                entries = self._resolved_entries if self._resolved_current(txn) else None
+                overrides = self._overrides(txn, entries is not None)
+                if slot.depth == 1:
+                    slot.cursors, slot.entries, slot.overrides = cursors, entries, overrides
+            # Like the override filter, cached carrier names only hold for the transaction they were read in.
+            txn_id = slot.txn.id()
+            self.carriers.sync(txn_id)
+            try:
+                if stats is None:
+                    yield StoreReader(cursors, self.carriers, entries, overrides, self.override_counts, txn_id)
+                else:
+                    yield TimedStoreReader(cursors, self.carriers, stats, entries, overrides, self.override_counts, txn_id)
+            finally:
+                if cursors is not slot.cursors:
+                    for cursor in cursors.values():
+                        cursor.close()
+        finally:
+            self._end_read()
+
+    def _resolved_current(self, txn: lmdb.Transaction) -> bool:
+        db = self._tables.get(RESOLVED_TABLE)
+        return db is not None and txn.get(RESOLVED_STAMP_KEY, db=db) == _STAMP.pack(txn.id())
+
+    def _overrides(self, txn: lmdb.Transaction, resolved: bool) -> Optional[BloomFilter]:
+        """Bloom filter of the override table as of ``txn``; ``None`` when it is empty.
+
+        A current resolved table holds the filter derived with it.  Otherwise
+        (overrides written since) the filter is built from the table itself.
+        The last filter is kept until the store changes.
+        """
+        db = self._tables.get(OVERRIDE_TABLE)
+        if db is None:
+            return None
+        cached = self._override_filter
+        if cached is not None and cached[0] == txn.id():
+            return cached[1]
+        if resolved:
+            raw = txn.get(OVERRIDE_FILTER_KEY, db=self._tables[RESOLVED_TABLE])
+            bloom = BloomFilter.from_bytes(raw) if raw is not None else None
+        else:
+            bloom = _derive_override_filter(txn, db)
+        self._override_filter = (txn.id(), bloom)
+        return bloom
+
+    def resolved_is_current(self) -> bool:
+        """Whether the resolved table was built by the last write to the store."""
+        slot = self._begin_read()
+        try:
+            return self._resolved_current(slot.txn)
+        finally:
+            self._end_read()
+
+    def rebuild_resolved(self, exchanges: Optional[Iterable[int]] = None) -> int:
+        """Derive the ``resolved`` table from the NPANXX and OCN tables; returns the entries written.
+
+        Every NPA-NXX-block maps to the line type and carrier name a lookup
+        would return, with the ``A`` fallback applied.  Without ``exchanges``
+        (NPA-NXX values as ints) the whole table is rebuilt; otherwise only
+        those exchanges are.  The Bloom filter of the override table is always
+        rebuilt.  The table is stamped with its write transaction, so readers
+        ignore it after any later write until it is rebuilt.
+        """
+        db = self._tables.get(RESOLVED_TABLE)
+        if db is None:
+            raise ValueError("This store has no resolved table; open it writable to create one")
+        with self._env.begin(write=True) as txn:
+            npanxx = txn.cursor(db=self._tables[NPANXX_TABLE])
+            ocns = txn.cursor(db=self._tables[OCN_TABLE])
+            names: Dict[str, str] = {}
+            values: Dict[Tuple[str, str], bytes] = {}
+
+            def carrier(ocn: str) -> str:
+                # Partial rebuilds derive one exchange at a time; keep names across them.
+                name = names.get(ocn)
+                if name is None:
+                    raw = ocns.value() if ocns.set_key(pack_ocn(ocn)) else None
+                    name = names[ocn] = carrier_name(decode_record(raw, CARRIER_NAME_FIELDS))
+                return name
+
+            def derive(records: Iterable[EncodedItem]) -> Iterator[EncodedItem]:
+                decoded = ((key, decode_record(raw, _DERIVE_FIELDS)) for key, raw in records)
+                for prefix, entry in resolve_blocks(decoded, carrier):
+                    value = values.get(entry)
+                    if value is None:
+                        value = values[entry] = encode_record(dict(zip(RESOLVED_SCHEMA.fields, entry)), RESOLVED_SCHEMA)
+                    yield pack_prefix(f"{prefix:07d}"), value
+
+            if exchanges is None:
+                txn.drop(db, delete=False)
+                records = npanxx.iternext() if npanxx.set_range(b"") else iter(())
+                with txn.cursor(db=db) as cursor:
+                    _, written = cursor.putmulti(derive(records), append=True)
+            else:
+                written = 0
+                for exchange in sorted(set(exchanges)):
+                    prefix = f"{exchange:06d}"
+                    for digit in "0123456789":
+                        txn.delete(pack_prefix(prefix + digit), db=db)
+                    group: List[EncodedItem] = []
+                    if npanxx.set_range(pack_npanxx(prefix, "0")):
+                        for key, raw in npanxx.iternext():
+                            if unpack_npanxx(key)[0] != exchange:
+                                break
+                            group.append((bytes(key), bytes(raw)))
+                    for key, value in derive(group):
+                        txn.put(key, value, db=db)
+                        written += 1
+            overrides = self._tables.get(OVERRIDE_TABLE)
+            bloom = _derive_override_filter(txn, overrides) if overrides is not None else None
+            if bloom is not None:
+                txn.put(OVERRIDE_FILTER_KEY, bloom.to_bytes(), db=db)
+            else:
+                txn.delete(OVERRIDE_FILTER_KEY, db=db)
+            txn.put(RESOLVED_STAMP_KEY, _STAMP.pack(txn.id()), db=db)
+        self._written()
+        return written
+
+    def get_many(self, keys: Iterable[str]) -> List[Dict[str, str]]:
+        """Fetch several mappings inside one read transaction, preserving order."""
+        with self.reader() as reader:
+            return reader.get_many(keys)
+
+    def resolve_carrier(self, ocn: str) -> str:
+        """Return the carrier name for ``ocn`` through the in-process cache."""
+        with self.reader() as reader:
+            return reader.resolve_carrier(ocn)
+
+    def preload_carriers(self) -> int:
+        """Warm the carrier cache with every stored OCN; returns the number cached."""
+        self.carriers.clear()
+        loaded = 0
+        with self._env.begin() as txn:
+            txn_id = txn.id()
+            self.carriers.sync(txn_id)
+            with txn.cursor(db=self._tables[OCN_TABLE]) as cursor:
+                if cursor.first():
+                    for key, raw in cursor.iternext():
+                        if loaded >= self.carriers.maxsize:
+                            break
+                        self.carriers.put(unpack_ocn(bytes(key)), carrier_name(_decode_mapping(bytes(raw))), txn_id)
+                        loaded += 1
+        return loaded
+
+    def count(self, table: str) -> int:
+        """Number of records in ``table``; optional tables the store lacks have none."""
+        db = self._tables.get(table)
+        if db is None and table in _OPTIONAL_TABLES:
+            return 0
+        slot = self._begin_read()
+        try:
+            return int(slot.txn.stat(self._tables[table])["entries"])
+        finally:
+            self._end_read()
 
     def put_mapping(self, key: str, mapping: Dict[str, str]) -> None:
-        encoded_key = key.encode("utf-8")
-        encoded_value = _encode_mapping(mapping)
+        table, packed = split_key(key)
         with self._env.begin(write=True) as txn:
-            txn.put(encoded_key, encoded_value, overwrite=True)
+            txn.put(packed, encode_value(table, mapping), overwrite=True, db=self._db(table, txn))
+        self._written()
 
     def bulk_put(self, items: Iterable[MappingItem], *, batch_size: int = 10_000) -> None:
         if batch_size <= 0:
@@ -81,7 +837,8 @@ class PhoneLookupStore:
         count = 0
         try:
             for key, mapping in items:
-                txn.put(key.encode("utf-8"), _encode_mapping(mapping), overwrite=True)
+                table, packed = split_key(key)
+                txn.put(packed, encode_value(table, mapping), overwrite=True, db=self._db(table, txn))
                 count += 1
                 if count % batch_size == 0:
                     txn.commit()
@@ -95,10 +852,120 @@ class PhoneLookupStore:
         except Exception:
             txn.abort()
             raise
+        finally:
+            self._written()
 
-    def iterate_keys(self) -> Iterator[str]:
+    def migrate_encoding(self, *, batch_size: int = 10_000) -> int:
+        """Re-encode legacy JSON values in the binary record format; returns the count."""
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        migrated = 0
+        for table in TABLE_NAMES:
+            schema = TABLE_SCHEMAS[table]
+            legacy = [
+                (key, encode_record(_decode_mapping(raw), schema))
+                for key, raw in self.iterate_encoded(table)
+                if not is_binary(raw)
+            ]
+            for start in range(0, len(legacy), batch_size):
+                self.put_sorted(table, legacy[start : start + batch_size])
+            migrated += len(legacy)
+        return migrated
+
+    def put_sorted(self, table: str, items: Sequence[EncodedItem]) -> int:
+        """Write pre-encoded items of ``table``, sorted by packed key, in one transaction.
+
+        When every key sorts after the last stored key the items are appended
+        without B-tree searches (``append=True``); otherwise they are inserted
+        normally, overwriting existing values.  Returns the number written.
+        """
+        if not items:
+            return 0
+        try:
+            with self._env.begin(write=True) as txn:
+                with txn.cursor(db=self._db(table, txn)) as cursor:
+                    append = not cursor.last() or bytes(cursor.key()) < items[0][0]
+                    _, added = cursor.putmulti(items, overwrite=True, append=append)
+        finally:
+            self._written()
+        return added
+
+    def apply_changes(
+        self,
+        puts: Mapping[str, Sequence[EncodedItem]],
+        deletes: Mapping[str, Iterable[bytes]],
+    ) -> int:
+        """Write ``puts`` and remove ``deletes`` (both by table) atomically; returns the transaction ID.
+
+        Readers observe either none or all of the changes.
+        """
+        try:
+            with self._env.begin(write=True) as txn:
+                txn_id = txn.id()
+                for table, items in puts.items():
+                    if items:
+                        with txn.cursor(db=self._db(table, txn)) as cursor:
+                            cursor.putmulti(items, overwrite=True)
+                for table, keys in deletes.items():
+                    keys = list(keys)
+                    if not keys:
+                        continue
+                    db = self._db(table, txn)
+                    for key in keys:
+                        txn.delete(key, db=db)
+        finally:
+            self._written()
+        return txn_id
+
+    def iterate_encoded(self, table: str, start: bytes = b"") -> Iterator[EncodedItem]:
+        """Yield raw ``(packed key, value)`` pairs of ``table`` from ``start`` on, in key order."""
+        if table in _OPTIONAL_TABLES and table not in self._tables:
+            return
         with self._env.begin() as txn:
-            with txn.cursor() as cursor:
-                for key, _ in cursor:
-                    yield key.decode("utf-8")
+            with txn.cursor(db=self._tables[table]) as cursor:
+                if not cursor.set_range(start):
+                    return
+                for key, value in cursor.iternext():
+                    yield bytes(key), bytes(value)
+
+    def iterate_table(self, table: str, fields: Optional[Sequence[str]] = None) -> Iterator[Tuple[bytes, Dict[str, str]]]:
+        """Yield ``(packed key, mapping)`` for every record of ``table``, in key order."""
+        for key, raw in self.iterate_encoded(table):
+            yield key, _decode_mapping(raw, fields)
+
+    def iterate_keys(self, table: Optional[str] = None) -> Iterator[str]:
+        """Yield ``table:key`` strings of one table, or of every table when ``table`` is ``None``."""
+        for name in (table,) if table is not None else TABLE_NAMES:
+            for key, _ in self.iterate_encoded(name):
+                yield join_key(name, key)
+
+    def iterate_mappings(self, prefix: str = "", fields: Optional[Sequence[str]] = None) -> Iterator[MappingItem]:
+        """Yield ``(table:key, mapping)`` pairs whose key starts with ``prefix``, in key order.
+
+        Only the tables the prefix can match are scanned, starting at the first
+        candidate key.
+        """
+        for table in TABLE_NAMES:
+            table_prefix = f"{table}:"
+            if not (table_prefix.startswith(prefix) or prefix.startswith(table_prefix)):
+                continue
+            local = prefix[len(table_prefix) :]
+            for key, raw in self.iterate_encoded(table, _lower_bound(table, local)):
+                name = unpack_key(table, key)
+                if not name.startswith(local):
+                    if name > local:
+                        break
+                    continue
+                yield f"{table_prefix}{name}", _decode_mapping(raw, fields)
+
 
+def _lower_bound(table: str, local: str) -> bytes:
+    """Smallest packed key of ``table`` whose textual form could start with ``local``."""
+    if not local:
+        return b""
+    if table == NPANXX_TABLE:
+        digits = local[:6]
+        if not digits.isdigit() or not digits.isascii():
+            return b""
+        return pack_key(table, f"{digits.ljust(6, '0')}:0")
+    return local.encode("utf-8")
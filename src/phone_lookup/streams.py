@@ -0,0 +1,79 @@
+"""Streaming input/output helpers for bulk lookup jobs.
+
+Paths may be ``-`` for stdin/stdout, and files ending in ``.gz`` are
+transparently (de)compressed, so jobs can be piped between tools without
+materializing their input in memory.
+"""
+from __future__ import annotations
+
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+STDIO = "-"
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+
+def is_stdio(path: Path | str) -> bool:
+    return str(path) == STDIO
+
+
+def _is_gzip(path: Path | str) -> bool:
+    return str(path).endswith(".gz")
+
+
+@contextmanager
+def open_input(path: Path | str) -> Iterator[IO[str]]:
+    """Open ``path`` for text reading; ``-`` is stdin and ``.gz`` is decompressed."""
+    if is_stdio(path):
+        yield sys.stdin
+        return
+    if _is_gzip(path):
+        import gzip
+
+        handle: IO[str] = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        handle = open(path, "r", encoding="utf-8")
+    with handle:
+        yield handle
+
+
+@contextmanager
+def open_output(path: Path | str) -> Iterator[IO[str]]:
+    """Open ``path`` for buffered text writing; ``-`` is stdout and ``.gz`` is compressed."""
+    if is_stdio(path):
+        try:
+            yield sys.stdout
+        finally:
+            sys.stdout.flush()
+        return
+    if _is_gzip(path):
+        import gzip
+
+        handle: IO[str] = gzip.open(path, "wt", encoding="utf-8")
+    else:
+        handle = open(path, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE)
+    with handle:
+        yield handle
+
+
+def iter_numbers(handle: IO[str]) -> Iterator[str]:
+    """Yield stripped, non-blank lines from ``handle`` one at a time."""
+    for line in handle:
+        number = line.strip()
+        if number:
+            yield number
+
+
+def count_numbers(path: Path | str) -> Optional[int]:
+    """Cheap pre-pass counting non-blank lines; ``None`` when the input is a stream."""
+    if is_stdio(path):
+        return None
+    opener = open
+    if _is_gzip(path):
+        import gzip
+
+        opener = gzip.open
+    with opener(path, "rb") as handle:
+        return sum(1 for line in handle if not line.isspace())
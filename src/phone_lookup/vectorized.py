@@ -0,0 +1,122 @@
+"""NumPy-vectorized normalization and lookup for large batches.
+
+Requires the optional ``numpy`` dependency (``pip install phone-lookup[fast]``).
+Numbers are loaded into a fixed-width code-point matrix, digits are extracted
+with one boolean mask and gathered per row, and the 7-digit NPA-NXX-block keys are resolved against a
+:class:`~phone_lookup.memory_index.MemoryIndex` with one gather.  Results are
+identical to :func:`~phone_lookup.lookup.run_lookup` with the same index,
+including the overrides of an :class:`~phone_lookup.lookup.OverriddenEngine`.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Iterator, Sequence, Union
+
+try:
+    import numpy as np
+except ModuleNotFoundError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+from .lookup import LookupResult, OverriddenEngine, chunked, normalize_number
+from .memory_index import MemoryIndex
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy.typing as npt
+
+DEFAULT_VECTOR_CHUNK_SIZE = 100_000
+# Wider inputs are rare; they fall back to the scalar normalizer.
+MAX_WIDTH = 32
+_ZERO = ord("0")
+_KEY_WEIGHTS = (1_000_000, 100_000, 10_000, 1_000, 100, 10, 1)
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("The vectorized lookup path requires numpy (pip install 'phone-lookup[fast]')")
+
+
+def normalize_array(numbers: Sequence[str]) -> tuple["npt.NDArray[np.str_]", "npt.NDArray[np.bool_]", list[int]]:
+    """Normalize ``numbers`` in bulk.
+
+    Returns the 10-digit numbers (``""`` where invalid), a validity mask and
+    the positions that need the scalar normalizer (non-ASCII or over-long input).
+    """
+    _require_numpy()
+    count = len(numbers)
+    lengths = np.fromiter(map(len, numbers), dtype=np.int64, count=count)
+    width = max(1, int(min(MAX_WIDTH, lengths.max(initial=0))))
+    codes = np.array(numbers, dtype=f"U{width}").view(np.uint32).reshape(count, width)
+    scalar_rows = (codes > 127).any(axis=1) | (lengths > width)
+
+    is_digit = (codes >= _ZERO) & (codes <= _ZERO + 9)
+    digit_counts = is_digit.sum(axis=1)
+    # Every row's digits, concatenated in order; row i owns flat[starts[i]:starts[i] + digit_counts[i]].
+    flat = codes[is_digit]
+    starts = np.cumsum(digit_counts) - digit_counts
+    first = flat[np.minimum(starts, len(flat) - 1)] if len(flat) else np.zeros(count, dtype=np.uint32)
+    has_country_code = (digit_counts == 11) & (first == _ZERO + 1)
+    valid = ((digit_counts == 10) | has_country_code) & ~scalar_rows
+
+    rows = np.flatnonzero(valid)
+    ten = np.zeros((count, 10), dtype=np.uint32)
+    # The last ten digits of a valid row are the number without its country code.
+    ten[rows] = flat[(starts[rows] + digit_counts[rows] - 10)[:, None] + np.arange(10)]
+    normalized = ten.view("U10").reshape(count)
+    return normalized, valid, np.flatnonzero(scalar_rows).tolist()
+
+
+def prefix_keys(normalized: "npt.NDArray[np.str_]", valid: "npt.NDArray[np.bool_]") -> "npt.NDArray[np.int64]":
+    """Compute ``npa*10000 + nxx*10 + block`` for every valid number."""
+    _require_numpy()
+    codes = normalized.view(np.uint32).reshape(len(normalized), 10)[:, :7].astype(np.int64) - _ZERO
+    keys = codes @ np.array(_KEY_WEIGHTS, dtype=np.int64)
+    return np.where(valid, keys, 0)
+
+
+def vectorized_lookup(index: Union[MemoryIndex, OverriddenEngine], numbers: Sequence[str]) -> list[LookupResult]:
+    """Resolve one batch of raw numbers against ``index``."""
+    _require_numpy()
+    if not numbers:
+        return []
+    if isinstance(index, OverriddenEngine):
+        return index.apply(vectorized_lookup(index.engine, numbers))  # type: ignore[arg-type]
+    normalized, valid, scalar_rows = normalize_array(numbers)
+    slots = np.frombuffer(index.slots, dtype=np.dtype(index.slots.typecode))
+    entry_ids = slots[prefix_keys(normalized, valid)]
+
+    resolutions = index.resolutions
+    results: list[LookupResult] = []
+    append = results.append
+    for number, digits, is_valid, entry_id in zip(
+        numbers, normalized.tolist(), valid.tolist(), entry_ids.tolist()
+    ):
+        if not is_valid:
+            append(LookupResult(number, None, "INVALID", "UNKNOWN", False))
+            continue
+        found, ltype, common_name = resolutions[entry_id]
+        append(LookupResult(number, digits, ltype, common_name, found))
+
+    for row in scalar_rows:
+        number = numbers[row]
+        digits = normalize_number(number)
+        if digits:
+            found, ltype, common_name = index.lookup(digits)
+            results[row] = LookupResult(number, digits, ltype, common_name, found)
+    return results
+
+
+def run_vectorized_lookup(
+    index: Union[MemoryIndex, OverriddenEngine],
+    numbers: Iterable[str],
+    *,
+    chunk_size: int = DEFAULT_VECTOR_CHUNK_SIZE,
+) -> Iterator[LookupResult]:
+    """Streaming counterpart of :func:`~phone_lookup.lookup.run_lookup` using NumPy batches."""
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    _require_numpy()
+    for chunk in chunked(numbers, chunk_size):
+        yield from vectorized_lookup(index, chunk)
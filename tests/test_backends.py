@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup import _sqlite_backend as sqlite_backend
+from phone_lookup.backends import detect_backend, lmdb_available, load_backend
+from phone_lookup.lookup import lookup_many
+from phone_lookup.store import PhoneLookupStore
+
+
+class SqliteBackendTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "env"
+        self.env = sqlite_backend.open(str(self.path), max_dbs=4)
+        self.db = self.env.open_db(b"table")
+
+    def tearDown(self) -> None:
+        self.env.close()
+        self._tmp.cleanup()
+
+    def test_transaction_ids_advance_only_on_writes_that_change_data(self) -> None:
+        self.assertEqual(self.env.info()["last_txnid"], 0)
+        with self.env.begin(write=True) as txn:
+            self.assertEqual(txn.id(), 1)
+            txn.put(b"a", b"1", db=self.db)
+        with self.env.begin(write=True) as txn:
+            self.assertIsNone(txn.get(b"missing", db=self.db))
+        self.assertEqual(self.env.info()["last_txnid"], 1)
+        with self.env.begin() as txn:
+            self.assertEqual(txn.id(), 1)
+
+    def test_read_transaction_keeps_its_snapshot(self) -> None:
+        with self.env.begin(write=True) as txn:
+            txn.put(b"a", b"old", db=self.db)
+        reader = self.env.begin()
+        with self.env.begin(write=True) as txn:
+            txn.put(b"a", b"new", db=self.db)
+        self.assertEqual(reader.get(b"a", db=self.db), b"old")
+        reader.abort()
+        with self.env.begin() as txn:
+            self.assertEqual(txn.get(b"a", db=self.db), b"new")
+
+    def test_aborted_write_is_discarded(self) -> None:
+        with self.assertRaises(RuntimeError):
+            with self.env.begin(write=True) as txn:
+                txn.put(b"a", b"1", db=self.db)
+                raise RuntimeError("boom")
+        with self.env.begin() as txn:
+            self.assertIsNone(txn.get(b"a", db=self.db))
+        self.assertEqual(self.env.info()["last_txnid"], 0)
+
+    def test_cursor_moves_and_putmulti(self) -> None:
+        with self.env.begin(write=True) as txn:
+            cursor = txn.cursor(db=self.db)
+            self.assertEqual(cursor.putmulti([(b"b", b"2"), (b"d", b"4")], append=True), (2, 2))
+            self.assertEqual(cursor.putmulti([(b"b", b"x"), (b"c", b"3")], overwrite=False), (2, 1))
+        with self.env.begin() as txn:
+            cursor = txn.cursor(db=self.db)
+            self.assertTrue(cursor.set_range(b"a"))
+            self.assertEqual((cursor.key(), cursor.value()), (b"b", b"2"))
+            self.assertTrue(cursor.next())
+            self.assertEqual(cursor.key(), b"c")
+            self.assertEqual(list(cursor.iternext()), [(b"c", b"3"), (b"d", b"4")])
+            self.assertFalse(cursor.set_key(b"a"))
+            self.assertFalse(cursor.set_range(b"e"))
+            self.assertTrue(cursor.last())
+            self.assertEqual(cursor.key(), b"d")
+            self.assertEqual(txn.stat(self.db)["entries"], 3)
+
+    def test_drop_and_missing_databases(self) -> None:
+        with self.env.begin(write=True) as txn:
+            txn.put(b"a", b"1", db=self.db)
+            txn.drop(self.db, delete=False)
+        with self.env.begin() as txn:
+            self.assertEqual(txn.stat(self.db)["entries"], 0)
+        with self.assertRaises(sqlite_backend.NotFoundError):
+            self.env.open_db(b"other", create=False)
+
+    def test_readonly_environment_refuses_writes(self) -> None:
+        readonly = sqlite_backend.open(str(self.path), readonly=True)
+        try:
+            with self.assertRaises(sqlite_backend.ReadonlyError):
+                readonly.begin(write=True)
+        finally:
+            readonly.close()
+
+    def test_pickled_stub_store_is_converted(self) -> None:
+        path = Path(self._tmp.name) / "stub"
+        path.mkdir()
+        state = {"version": 2, "databases": {None: {}, b"table": {b"k": b"v"}}, "last_txnid": 7}
+        (path / "stub-lmdb.pickle").write_bytes(pickle.dumps(state))
+        self.assertEqual(detect_backend(path), "sqlite")
+        with self.assertRaises(sqlite_backend.Error):
+            sqlite_backend.open(str(path), readonly=True)
+
+        env = sqlite_backend.open(str(path))
+        try:
+            db = env.open_db(b"table", create=False)
+            with env.begin() as txn:
+                self.assertEqual(txn.get(b"k", db=db), b"v")
+                self.assertEqual(txn.id(), 7)
+        finally:
+            env.close()
+        self.assertFalse((path / "stub-lmdb.pickle").exists())
+
+
+class StoreBackendTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_sqlite_store_answers_lookups(self) -> None:
+        with PhoneLookupStore.open(self.path / "db", backend="sqlite") as store:
+            self.assertEqual(store.backend, "sqlite")
+            store.bulk_put(
+                [
+                    ("npanxx:415555:1", {"OCN": "1234", "LTYPE": "C"}),
+                    ("npanxx:415555:A", {"OCN": "9999", "LTYPE": "L"}),
+                    ("ocn:1234", {"CommonName": "Carrier"}),
+                ]
+            )
+            store.rebuild_resolved()
+        with PhoneLookupStore.open(self.path / "db", readonly=True) as store:
+            self.assertEqual(store.backend, "sqlite")
+            self.assertTrue(store.resolved_is_current())
+            results = lookup_many(store, ["4155551234", "4155552000"])
+        self.assertEqual(results, [(True, "C", "Carrier"), (True, "L", "UNKNOWN")])
+
+    @unittest.skipUnless(lmdb_available(), "lmdb is not installed")
+    def test_existing_store_keeps_its_backend(self) -> None:
+        with PhoneLookupStore.open(self.path / "db", backend="lmdb") as store:
+            store.put_mapping("ocn:0001", {"CommonName": "One"})
+        with PhoneLookupStore.open(self.path / "db") as store:
+            self.assertEqual(store.backend, "lmdb")
+        with self.assertRaises(ValueError):
+            PhoneLookupStore.open(self.path / "db", backend="sqlite")
+
+    def test_unknown_backend_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            load_backend("berkeleydb")
+
+
+if __name__ == "__main__":
+    unittest.main()
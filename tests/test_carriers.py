@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import threading
+import unittest
+
+from phone_lookup.carriers import CarrierCache, carrier_name
+
+
+class CarrierCacheTests(unittest.TestCase):
+    def test_carrier_name_prefers_common_name_then_dba_then_company(self) -> None:
+        self.assertEqual(carrier_name({"CommonName": "Common", "DBA": "Dba", "COMPANY": "Co"}), "Common")
+        self.assertEqual(carrier_name({"CommonName": "", "DBA": "Dba", "COMPANY": "Co"}), "Dba")
+        self.assertEqual(carrier_name({"COMPANY": "Co"}), "Co")
+        self.assertEqual(carrier_name({}), "")
+
+    def test_get_counts_hits_and_misses(self) -> None:
+        cache = CarrierCache(maxsize=4)
+        self.assertIsNone(cache.get("1234"))
+        cache.put("1234", "Carrier")
+        self.assertEqual(cache.get("1234"), "Carrier")
+
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (1, 1, 1))
+        self.assertAlmostEqual(stats.hit_rate, 0.5)
+
+    def test_put_evicts_least_recently_used_entry(self) -> None:
+        cache = CarrierCache(maxsize=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "A")
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual(cache.stats().evictions, 1)
+
+    def test_requires_positive_maxsize(self) -> None:
+        with self.assertRaises(ValueError):
+            CarrierCache(maxsize=0)
+
+
+    def test_cache_can_be_shared_by_threads(self) -> None:
+        cache = CarrierCache(maxsize=8)
+
+        def churn(offset: int) -> None:
+            for index in range(5000):
+                code = f"{(index + offset) % 32:04d}"
+                if cache.get(code) is None:
+                    cache.put(code, code)
+
+        threads = [threading.Thread(target=churn, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        self.assertEqual(stats.lookups, 8 * 5000)
+        self.assertLessEqual(stats.size, 8)
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import phone_lookup
+from phone_lookup.cli import run
+from phone_lookup.store import PhoneLookupStore
+
+
+class LookupCommandTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.db_path = self.tmp_path / "db"
+        with PhoneLookupStore.open(self.db_path) as store:
+            store.bulk_put(
+                [
+                    ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                    ("ocn:1111", {"CommonName": "Wireless Co"}),
+                ]
+            )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def lookup(self, *extra: str) -> str:
+        input_path = self.tmp_path / "numbers.txt"
+        input_path.write_text("4155551234\n\nbogus\n9995550000\n", encoding="utf-8")
+        output_path = self.tmp_path / "results.txt"
+        with contextlib.redirect_stdout(io.StringIO()):
+            exit_code = run(
+                [
+                    "lookup",
+                    "--database-path",
+                    str(self.db_path),
+                    "--file",
+                    str(input_path),
+                    "--output",
+                    str(output_path),
+                    *extra,
+                ]
+            )
+        self.assertEqual(exit_code, 0)
+        return output_path.read_text(encoding="utf-8")
+
+    def test_lookup_writes_results_in_input_order(self) -> None:
+        self.assertEqual(
+            self.lookup(),
+            "4155551234:WIRELESS:Wireless Co\nbogus:INVALID:UNKNOWN\n9995550000:UNKNOWN:UNKNOWN\n",
+        )
+
+    def test_lookup_without_count_prepass_matches(self) -> None:
+        self.assertEqual(self.lookup("--no-count", "--chunk-size", "1"), self.lookup())
+
+    def test_lookup_dedup_and_no_memo_match(self) -> None:
+        expected = self.lookup()
+
+        self.assertEqual(self.lookup("--dedup"), expected)
+        self.assertEqual(self.lookup("--no-memo"), expected)
+        self.assertEqual(self.lookup("--sort-keys", "--no-memo"), expected)
+        self.assertEqual(self.lookup("--sort-keys", "--stats"), expected)
+
+    def test_lookup_stats_and_profile(self) -> None:
+        profile = self.tmp_path / "profile.txt"
+
+        self.assertEqual(self.lookup("--stats", "json", "--profile", str(profile)), self.lookup())
+        self.assertIn("function calls", profile.read_text(encoding="utf-8"))
+
+    def test_lookup_numbers_from_arguments_as_csv_with_stored_fields(self) -> None:
+        output_path = self.tmp_path / "results.csv"
+        with contextlib.redirect_stdout(io.StringIO()):
+            exit_code = run(
+                [
+                    "lookup",
+                    "--database-path",
+                    str(self.db_path),
+                    "--output",
+                    str(output_path),
+                    "--format",
+                    "csv",
+                    "--fields",
+                    "number,carrier,OCN,CommonName",
+                    "4155551234",
+                    "bogus",
+                ]
+            )
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(
+            output_path.read_text(encoding="utf-8"),
+            "number,carrier,OCN,CommonName\n4155551234,Wireless Co,1111,Wireless Co\nbogus,UNKNOWN,,\n",
+        )
+
+    def test_lookup_does_not_load_other_subcommands(self) -> None:
+        numbers = self.tmp_path / "one.txt"
+        numbers.write_text("4155551234\n", encoding="utf-8")
+        code = (
+            "import sys\n"
+            "from phone_lookup.cli import run\n"
+            "run(sys.argv[1:])\n"
+            "print(' '.join(sorted(sys.modules)), file=sys.stderr)\n"
+        )
+        argv = ["lookup", "--database-path", str(self.db_path), "--file", str(numbers), "--output", "-", "--quiet"]
+        paths = [str(Path(phone_lookup.__file__).parents[1]), os.environ.get("PYTHONPATH", "")]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, paths)))
+        output = subprocess.run([sys.executable, "-c", code, *argv], capture_output=True, text=True, check=True, env=env)
+
+        self.assertEqual(output.stdout, "4155551234:WIRELESS:Wireless Co\n")
+        modules = set(output.stderr.split())
+        for name in ("phone_lookup.importer", "phone_lookup.server", "asyncio", "csv", "multiprocessing", "termcolor"):
+            self.assertNotIn(name, modules)
+
+    def test_exported_snapshot_answers_lookups_without_the_store(self) -> None:
+        snapshot = self.tmp_path / "lookup.snapshot"
+        with contextlib.redirect_stdout(io.StringIO()):
+            exit_code = run(["export-snapshot", "--database-path", str(self.db_path), "--output", str(snapshot)])
+        self.assertEqual(exit_code, 0)
+        expected = self.lookup()
+
+        self.db_path = self.tmp_path / "missing"
+        self.assertEqual(self.lookup("--engine", "mmap", "--snapshot", str(snapshot)), expected)
+        self.assertEqual(self.lookup("--engine", "mmap", "--snapshot", str(snapshot), "--workers", "2"), expected)
+        self.assertFalse(self.db_path.exists())
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            self.lookup("--engine", "mmap")
+
+    def test_missing_index_snapshot_is_an_error(self) -> None:
+        missing = str(self.tmp_path / "missing.bin")
+        for workers in ("1", "2"):
+            with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+                self.lookup("--engine", "memory", "--index-snapshot", missing, "--workers", workers)
+            self.assertIn("missing.bin", stderr.getvalue())
+
+    def test_import_publishes_generation_read_by_lookup(self) -> None:
+        npanxx_path = self.tmp_path / "npanxx.csv"
+        npanxx_path.write_text("NPA,NXX,BLOCK_ID,OCN,LTYPE\n999,555,A,2222,S\n", encoding="utf-8")
+        ocn_path = self.tmp_path / "ocn.csv"
+        ocn_path.write_text("OCN,CommonName\n2222,Landline Co\n", encoding="utf-8")
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            exit_code = run(
+                [
+                    "import",
+                    "--database-path",
+                    str(self.db_path),
+                    "--npanxx-path",
+                    str(npanxx_path),
+                    "--ocn-path",
+                    str(ocn_path),
+                ]
+            )
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Published generation", stdout.getvalue())
+        self.assertEqual(
+            self.lookup(),
+            "4155551234:UNKNOWN:UNKNOWN\nbogus:INVALID:UNKNOWN\n9995550000:LANDLINE:Landline Co\n",
+        )
+
+    def test_import_with_overrides_reports_hits_in_the_summary(self) -> None:
+        npanxx_path = self.tmp_path / "npanxx.csv"
+        npanxx_path.write_text("NPA,NXX,BLOCK_ID,OCN,LTYPE\n415,555,A,2222,S\n", encoding="utf-8")
+        ocn_path = self.tmp_path / "ocn.csv"
+        ocn_path.write_text("OCN,CommonName\n2222,Landline Co\n3333,Ported Co\n", encoding="utf-8")
+        override_path = self.tmp_path / "overrides.csv"
+        override_path.write_text("NUMBER,OCN,LTYPE\n4155551234,3333,C\n", encoding="utf-8")
+        argv = ["--database-path", str(self.db_path), "--npanxx-path", str(npanxx_path), "--ocn-path", str(ocn_path)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run(["import", *argv, "--override-path", str(override_path)]), 0)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exit_code = run(["lookup", "--database-path", str(self.db_path), "--output", "-", "4155551234", "4155550000"])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(stdout.getvalue(), "4155551234:WIRELESS:Ported Co\n4155550000:LANDLINE:Landline Co\n")
+        self.assertIn("Overrides: 1 hits (50.0% of numbers)", stderr.getvalue())
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
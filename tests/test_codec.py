@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import unittest
+
+from phone_lookup.codec import (
+    NPANXX_FIELDS,
+    NPANXX_SCHEMA,
+    OCN_SCHEMA,
+    decode_record,
+    encode_json,
+    encode_record,
+    is_binary,
+    schema_for_key,
+)
+
+
+class CodecTests(unittest.TestCase):
+    def test_roundtrip_preserves_present_and_empty_fields(self) -> None:
+        mapping = {field: "" for field in NPANXX_FIELDS}
+        mapping.update({"OCN": "1234", "LTYPE": "C", "RCLONG": "San Francisco"})
+
+        raw = encode_record(mapping, NPANXX_SCHEMA)
+
+        self.assertTrue(is_binary(raw))
+        self.assertEqual(decode_record(raw), mapping)
+        self.assertLess(len(raw), len(encode_json(mapping)))
+
+    def test_roundtrip_of_partial_mapping_omits_absent_fields(self) -> None:
+        raw = encode_record({"CommonName": "Carrier"}, OCN_SCHEMA)
+
+        self.assertEqual(decode_record(raw), {"CommonName": "Carrier"})
+
+    def test_decode_selected_fields_only(self) -> None:
+        raw = encode_record({"OCN": "1234", "LTYPE": "S", "STATE": "CA"}, NPANXX_SCHEMA)
+
+        self.assertEqual(decode_record(raw, ("LTYPE", "OCN", "RC")), {"LTYPE": "S", "OCN": "1234"})
+
+    def test_long_and_non_ascii_values_use_wide_lengths(self) -> None:
+        mapping = {"COMPANY": "Ä" * 400, "DBA": "Señal"}
+
+        self.assertEqual(decode_record(encode_record(mapping, OCN_SCHEMA)), mapping)
+
+    def test_mappings_outside_schema_fall_back_to_json(self) -> None:
+        mapping = {"OCN": "1234", "CommonName": "Carrier"}
+
+        raw = encode_record(mapping, OCN_SCHEMA)
+
+        self.assertFalse(is_binary(raw))
+        self.assertEqual(decode_record(raw), mapping)
+
+    def test_decode_reads_legacy_json_and_tolerates_garbage(self) -> None:
+        self.assertEqual(decode_record(b'{"LTYPE": "C", "OCN": "1"}', ("LTYPE",)), {"LTYPE": "C"})
+        self.assertEqual(decode_record(b"not json"), {})
+        self.assertEqual(decode_record(None), {})
+
+    def test_schema_for_key_uses_table_prefix(self) -> None:
+        self.assertIs(schema_for_key("npanxx:415555:1"), NPANXX_SCHEMA)
+        self.assertIs(schema_for_key("ocn:1234"), OCN_SCHEMA)
+        self.assertIsNone(schema_for_key("other:1"))
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import phone_lookup
+from phone_lookup.client import LookupClient
+from phone_lookup.daemon import LookupDaemon
+from phone_lookup.lookup import LookupResult
+from phone_lookup.snapshot import SnapshotIndex, write_snapshot
+from phone_lookup.store import PhoneLookupStore
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix domain sockets")
+class LookupDaemonTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.store = PhoneLookupStore.open(root / "store")
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                ("npanxx:212555:A", {"OCN": "2222", "LTYPE": "S"}),
+                ("ocn:1111", {"CommonName": "Wireless\tCo"}),
+                ("ocn:2222", {"CommonName": "City Tel"}),
+            ]
+        )
+        self.daemon = LookupDaemon(self.store, max_batch=3)
+        self.path = await self.daemon.start(root / "lookup.sock")
+
+    async def asyncTearDown(self) -> None:
+        await self.daemon.close()
+        self.store.close()
+        self._tmp.cleanup()
+
+    async def client_call(self, method: str, *args):
+        def call():
+            with LookupClient(self.path, timeout=5) as client:
+                return getattr(client, method)(*args)
+
+        return await asyncio.to_thread(call)
+
+    async def test_lookup_and_lookup_many(self) -> None:
+        single = await self.client_call("lookup", "+1 415-555-1234")
+        batch = await self.client_call("lookup_many", ["2125559999", "bogus", "9995550000", "4155551000"])
+
+        self.assertEqual(single, LookupResult("+1 415-555-1234", "4155551234", "C", "Wireless Co", True))
+        self.assertEqual(
+            batch,
+            [
+                LookupResult("2125559999", "2125559999", "S", "City Tel", True),
+                LookupResult("bogus", None, "INVALID", "UNKNOWN", False),
+                LookupResult("9995550000", "9995550000", "UNKNOWN", "UNKNOWN", False),
+                LookupResult("4155551000", "4155551000", "C", "Wireless Co", True),
+            ],
+        )
+
+    async def test_snapshot_daemon_runs_without_a_store_and_follows_reexports(self) -> None:
+        snapshot = Path(self._tmp.name) / "lookup.snapshot"
+        write_snapshot(self.store, snapshot)
+        daemon = LookupDaemon(None, SnapshotIndex(snapshot))
+        path = Path(self._tmp.name) / "snapshot.sock"
+
+        def carrier() -> str:
+            with LookupClient(path, timeout=5) as client:
+                return client.lookup("9995550000").common_name
+
+        with mock.patch("phone_lookup.daemon.REFRESH_INTERVAL", 0.01):
+            await daemon.start(path)
+            try:
+                self.assertEqual(await asyncio.to_thread(carrier), "UNKNOWN")
+                self.store.put_mapping("npanxx:999555:A", {"OCN": "2222", "LTYPE": "S"})
+                write_snapshot(self.store, snapshot)
+                await asyncio.sleep(0.1)
+                self.assertEqual(await asyncio.to_thread(carrier), "City Tel")
+            finally:
+                await daemon.close()
+                daemon.source.close()
+
+    async def test_pipelined_lines_are_answered_in_order(self) -> None:
+        reader, writer = await asyncio.open_unix_connection(str(self.path))
+        numbers = [f"4155551{index:03d}" for index in range(10)]
+        writer.write("".join(f"{number}\r\n" for number in numbers).encode())
+        await writer.drain()
+
+        lines = [await reader.readline() for _ in numbers]
+        writer.close()
+
+        self.assertEqual([line.split(b"\t")[0].decode() for line in lines], numbers)
+        self.assertTrue(all(line.endswith(b"\t1\n") for line in lines))
+        self.assertLess(self.daemon.stats.batches, len(numbers))
+
+    async def test_slow_lookup_does_not_block_other_connections(self) -> None:
+        release = threading.Event()
+        daemon = LookupDaemon(self.store, threads=2)
+        resolve = daemon.resolve
+
+        def slow_resolve(numbers):
+            if "4155551234" in numbers:
+                release.wait(5)
+            return resolve(numbers)
+
+        daemon.resolve = slow_resolve  # type: ignore[method-assign]
+        path = await daemon.start(Path(self._tmp.name) / "slow.sock")
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(path))
+            writer.write(b"4155551234\n")
+            await writer.drain()
+            other_reader, other_writer = await asyncio.open_unix_connection(str(path))
+            other_writer.write(b"2125559999\n")
+
+            other = await asyncio.wait_for(other_reader.readline(), 5)
+            release.set()
+            slow = await asyncio.wait_for(reader.readline(), 5)
+
+            self.assertTrue(other.startswith(b"2125559999\t2125559999\tS\t"))
+            self.assertTrue(slow.startswith(b"4155551234\t4155551234\tC\t"))
+            writer.close()
+            other_writer.close()
+        finally:
+            release.set()
+            await daemon.close()
+
+    async def test_overlong_line_closes_connection(self) -> None:
+        reader, writer = await asyncio.open_unix_connection(str(self.path))
+        writer.write(b"4" * 5000)
+        await writer.drain()
+
+        self.assertEqual(await reader.read(), b"ERR line too long\n")
+        writer.close()
+
+    async def test_close_answers_received_lines_and_removes_socket(self) -> None:
+        reader, writer = await asyncio.open_unix_connection(str(self.path))
+        writer.write(b"4155551234\n")
+        await writer.drain()
+
+        answer = await reader.readline()
+        await self.daemon.close()
+
+        self.assertTrue(answer.startswith(b"4155551234\t4155551234\tC\t"))
+        self.assertEqual(await reader.read(), b"")
+        self.assertFalse(self.path.exists())
+        writer.close()
+
+
+class ClientImportTests(unittest.TestCase):
+    def test_client_does_not_import_lmdb(self) -> None:
+        code = "import sys, phone_lookup.client; print('lmdb' in sys.modules)"
+        env = dict(os.environ, PYTHONPATH=str(Path(phone_lookup.__file__).parents[1]))
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+
+        self.assertEqual(output.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.delta import SIDECAR_NAME, delta_import, read_sidecar, row_hash, stored_hashes
+from phone_lookup.importer import import_all
+from phone_lookup.store import RESOLVED_STAMP_KEY, PhoneLookupStore
+
+NPANXX_HEADER = "NPA,NXX,BLOCK_ID,OCN,LTYPE\n"
+OCN_HEADER = "OCN,CommonName\n"
+
+
+class DeltaImportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.npanxx_path = self.tmp_path / "npanxx.csv"
+        self.ocn_path = self.tmp_path / "ocn.csv"
+        self.store = PhoneLookupStore.open(self.tmp_path / "db")
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def write(self, npanxx: list[str], ocn: list[str]) -> None:
+        self.npanxx_path.write_text(NPANXX_HEADER + "".join(f"{row}\n" for row in npanxx), encoding="utf-8")
+        self.ocn_path.write_text(OCN_HEADER + "".join(f"{row}\n" for row in ocn), encoding="utf-8")
+
+    @staticmethod
+    def snapshot(store: PhoneLookupStore) -> dict[tuple[str, bytes], bytes]:
+        return {(table, key): value for table in ("npanxx", "ocn") for key, value in store.iterate_encoded(table)}
+
+    @staticmethod
+    def resolved(store: PhoneLookupStore) -> dict[bytes, bytes]:
+        return {key: value for key, value in store.iterate_encoded("resolved") if key != RESOLVED_STAMP_KEY}
+
+    def test_delta_matches_full_import_and_reports_counts(self) -> None:
+        self.write(["415,555,1,1111,C", "212,555,A,2222,S", "312,555,2,1111,C"], ["1111,Wireless", "2222,Landline"])
+        import_all(self.store, self.npanxx_path, self.ocn_path)
+
+        self.write(["415,555,1,1111,V", "212,555,A,2222,S", "646,555,3,3333,C"], ["1111,Wireless", "3333,New Co"])
+        stats = delta_import(self.store, self.npanxx_path, self.ocn_path)
+
+        self.assertEqual(
+            [(s.table, s.added, s.changed, s.removed, s.unchanged) for s in stats],
+            [("npanxx", 1, 1, 1, 1), ("ocn", 1, 0, 1, 1)],
+        )
+        with PhoneLookupStore.open(self.tmp_path / "full") as full:
+            import_all(full, self.npanxx_path, self.ocn_path)
+            expected = self.snapshot(full)
+        self.assertEqual(self.snapshot(self.store), expected)
+
+    def test_delta_keeps_resolved_table_in_line_with_full_import(self) -> None:
+        self.write(["415,555,1,1111,C", "415,555,A,2222,S", "212,555,A,2222,S"], ["1111,Wireless", "2222,Landline"])
+        import_all(self.store, self.npanxx_path, self.ocn_path)
+        feeds = [
+            # NPANXX rows only: just the touched exchanges are rebuilt.
+            (["415,555,1,1111,V", "415,555,2,1111,C", "212,555,A,2222,S"], ["1111,Wireless", "2222,Landline"]),
+            # A renamed carrier changes every exchange that uses it.
+            (["415,555,1,1111,V", "415,555,2,1111,C", "212,555,A,2222,S"], ["1111,Wireless", "2222,Renamed"]),
+        ]
+        for npanxx, ocn in feeds:
+            self.write(npanxx, ocn)
+            delta_import(self.store, self.npanxx_path, self.ocn_path)
+
+            self.assertTrue(self.store.resolved_is_current())
+            with PhoneLookupStore.open(self.tmp_path / f"full-{len(ocn[1])}") as full:
+                import_all(full, self.npanxx_path, self.ocn_path)
+                expected = self.resolved(full)
+            self.assertEqual(self.resolved(self.store), expected)
+
+    def test_unchanged_feed_writes_nothing_and_reuses_sidecar(self) -> None:
+        self.write(["415,555,1,1111,C"], ["1111,Wireless"])
+        delta_import(self.store, self.npanxx_path, self.ocn_path)
+        txn_id = self.store.last_transaction_id()
+
+        stats = delta_import(self.store, self.npanxx_path, self.ocn_path)
+
+        self.assertEqual([s.written for s in stats], [0, 0])
+        self.assertEqual(self.store.last_transaction_id(), txn_id)
+        sidecar = read_sidecar(self.store.path / SIDECAR_NAME)
+        self.assertIsNotNone(sidecar)
+        self.assertEqual(sidecar[0], txn_id)
+
+    def test_stale_sidecar_falls_back_to_stored_values(self) -> None:
+        self.write(["415,555,1,1111,C"], ["1111,Wireless"])
+        delta_import(self.store, self.npanxx_path, self.ocn_path)
+        self.store.put_mapping("ocn:1111", {"CommonName": "Edited"})
+
+        edited = dict(self.store.iterate_encoded("ocn"))[b"1111"]
+
+        self.assertEqual(stored_hashes(self.store)[b"ocn:1111"], row_hash(edited))
+        stats = delta_import(self.store, self.npanxx_path, self.ocn_path)
+        self.assertEqual([(s.table, s.changed) for s in stats], [("npanxx", 0), ("ocn", 1)])
+        self.assertEqual(self.store.resolve_carrier("1111"), "Wireless")
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+import unittest
+
+from phone_lookup.formats import DEFAULT_SELECTION, create_formatter, csv_line, parse_fields
+from phone_lookup.lookup import LookupResult
+
+FOUND = LookupResult("(415) 555-1234", "4155551234", "C", "Wireless, Inc", True)
+INVALID = LookupResult("bogus", None, "INVALID", "UNKNOWN", False)
+
+
+class FormatTests(unittest.TestCase):
+    def test_parse_fields_splits_stored_fields_by_table(self) -> None:
+        selection = parse_fields("number, STATE,SMS,found,RC")
+
+        self.assertEqual(selection.columns, ("number", "STATE", "SMS", "found", "RC"))
+        self.assertEqual(selection.npanxx, ("STATE", "RC"))
+        self.assertEqual(selection.ocn, ("SMS",))
+        self.assertTrue(selection.needs_records)
+        self.assertFalse(parse_fields("number,carrier").needs_records)
+        self.assertIs(parse_fields(None), DEFAULT_SELECTION)
+
+    def test_parse_fields_rejects_unknown_duplicate_and_empty(self) -> None:
+        for spec in ("number,bogus", "number,number", " , "):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_fields(spec)
+
+    def test_line_format(self) -> None:
+        legacy = create_formatter("line", DEFAULT_SELECTION, explicit=False)
+        self.assertEqual(legacy(FOUND, {}), "4155551234:WIRELESS:Wireless, Inc\n")
+        formatter = create_formatter("line", parse_fields("normalized,found,STATE"))
+
+        self.assertEqual(formatter(FOUND, {"STATE": "CA"}), "4155551234:1:CA\n")
+        self.assertEqual(formatter(INVALID, {}), ":0:\n")
+
+    def test_csv_format_quotes_values(self) -> None:
+        formatter = create_formatter("csv", parse_fields("number,carrier,COMPANY"))
+
+        self.assertEqual(formatter(FOUND, {"COMPANY": 'The "Co"'}), '(415) 555-1234,"Wireless, Inc","The ""Co"""\n')
+        self.assertEqual(csv_line(["a", "b\nc"]), 'a,"b\nc"\n')
+
+    def test_jsonl_format(self) -> None:
+        row = json.loads(create_formatter("jsonl", parse_fields("normalized,found,RC"))(INVALID, {}))
+
+        self.assertEqual(row, {"normalized": None, "found": False, "RC": ""})
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.generations import (
+    current_generation,
+    list_generations,
+    new_generation,
+    prune_generations,
+    publish_generation,
+)
+from phone_lookup.importer import import_generation
+from phone_lookup.lookup import run_deduplicated, run_lookup
+from phone_lookup.memo import LookupMemo
+from phone_lookup.store import PhoneLookupStore
+
+NPANXX_HEADER = "NPA,NXX,BLOCK_ID,OCN,LTYPE\n"
+OCN_HEADER = "OCN,COMPANY,DBA,CommonName,TYPE,SMS,Rural\n"
+
+
+class GenerationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.root = self.tmp_path / "db"
+        self.ocn_path = self.tmp_path / "ocn.csv"
+        self.ocn_path.write_text(OCN_HEADER + "1111,,,Wireless Co,,,\n2222,,,Landline Co,,,\n", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def write_npanxx(self, *rows: str) -> Path:
+        path = self.tmp_path / "npanxx.csv"
+        path.write_text(NPANXX_HEADER + "".join(f"{row}\n" for row in rows), encoding="utf-8")
+        return path
+
+    def test_import_publishes_a_fresh_generation_without_stale_keys(self) -> None:
+        first = import_generation(self.root, self.write_npanxx("415,555,1,1111,C", "212,555,A,2222,S"), self.ocn_path)
+        second = import_generation(self.root, self.write_npanxx("415,555,1,2222,S"), self.ocn_path, fast=True)
+
+        self.assertEqual(current_generation(self.root), second.generation)
+        self.assertEqual(first.counts, {"npanxx": 2, "ocn": 2})
+        self.assertEqual(second.counts, {"npanxx": 1, "ocn": 2})
+        with PhoneLookupStore.open(self.root, readonly=True) as store:
+            self.assertEqual(store.generation, second.generation)
+            self.assertEqual(store.get_mapping("npanxx:212555:A"), {})
+            self.assertEqual(store.get_mapping("npanxx:415555:1", ("OCN",)), {"OCN": "2222"})
+
+    def test_failed_verification_keeps_the_live_generation(self) -> None:
+        live = import_generation(self.root, self.write_npanxx("415,555,1,1111,C"), self.ocn_path)
+
+        with self.assertRaises(ValueError):
+            import_generation(self.root, self.write_npanxx(), self.ocn_path)
+
+        self.assertEqual(current_generation(self.root), live.generation)
+        self.assertEqual(list_generations(self.root), [live.generation])
+
+    def test_open_store_follows_published_generation_on_refresh(self) -> None:
+        import_generation(self.root, self.write_npanxx("415,555,1,1111,C"), self.ocn_path)
+        store = PhoneLookupStore.open(self.root, readonly=True)
+        try:
+            self.assertFalse(store.refresh())
+            self.assertEqual(store.resolve_carrier("1111"), "Wireless Co")
+
+            newer = import_generation(self.root, self.write_npanxx("415,555,1,2222,S"), self.ocn_path)
+            results = list(run_lookup(store, ["4155551234"]))
+
+            self.assertEqual(store.generation, newer.generation)
+            self.assertEqual([(r.ltype, r.common_name) for r in results], [("S", "Landline Co")])
+        finally:
+            store.close()
+
+    def test_memoized_lookups_follow_a_new_generation(self) -> None:
+        import_generation(self.root, self.write_npanxx("415,555,1,1111,C"), self.ocn_path)
+        memo = LookupMemo(exact=True)
+        with PhoneLookupStore.open(self.root, readonly=True) as store:
+
+            def lookup(numbers):
+                return [r.ltype for r in run_deduplicated(lambda b: run_lookup(store, b, memo=memo), numbers, memo=memo)]
+
+            self.assertEqual(lookup(["4155551234", "4155551234"]), ["C", "C"])
+            import_generation(self.root, self.write_npanxx("415,555,1,2222,S"), self.ocn_path)
+            self.assertEqual(lookup(["4155551234", "4155551000"]), ["S", "S"])
+
+    def test_prune_keeps_newest_and_published_generations(self) -> None:
+        names = [new_generation(self.root).name for _ in range(4)]
+        publish_generation(self.root, names[0])
+
+        removed = prune_generations(self.root, keep=2)
+
+        self.assertEqual(removed, [names[1]])
+        self.assertEqual(list_generations(self.root), [names[0], names[2], names[3]])
+        with self.assertRaises(FileNotFoundError):
+            publish_generation(self.root, names[1])
+
+    def test_legacy_root_without_pointer_opens_in_place(self) -> None:
+        with PhoneLookupStore.open(self.root) as store:
+            store.put_mapping("ocn:1111", {"CommonName": "Legacy"})
+            self.assertIsNone(store.generation)
+            self.assertFalse(store.refresh())
+        self.assertIsNone(current_generation(self.root))
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -5,7 +5,16 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from phone_lookup.importer import ensure_paths_exist, import_all, load_npanxx, load_ocn
+from phone_lookup.importer import (
+    ensure_paths_exist,
+    fast_import,
+    fast_import_all,
+    import_all,
+    load_npanxx,
+    load_ocn,
+)
+from phone_lookup.instrumentation import CARRIER, LMDB_GET, StageStats
+from phone_lookup.lookup import lookup_many
 from phone_lookup.store import PhoneLookupStore
 
 
@@ -147,6 +156,100 @@ class ImporterTests(unittest.TestCase):
         self.assertTrue(self.store.get_mapping("npanxx:212555:A"))
         self.assertTrue(self.store.get_mapping("ocn:5678"))
 
+    def test_import_builds_resolved_table_read_once_per_number(self) -> None:
+        npanxx_path = self.write_npanxx(
+            "resolved.csv",
+            [("415", "555", "1", "1111", "C"), ("415", "555", "A", "2222", "S"), ("212", "555", "3", "9999", "")],
+        )
+        ocn_path = Path(self._tmp_dir.name) / "resolved_ocn.csv"
+        write_csv(ocn_path, ["OCN", "CommonName", "DBA"], [{"OCN": "1111", "DBA": "Wireless Co"}, {"OCN": "2222", "CommonName": "City Tel"}])
+        numbers = ["4155551234", "4155557000", "2125553000", "2125554000"]
+        expected = [
+            (True, "C", "Wireless Co"),
+            (True, "S", "City Tel"),
+            (True, "UNKNOWN", "UNKNOWN"),
+            (False, "UNKNOWN", "UNKNOWN"),
+        ]
+
+        fast_import_all(self.store, npanxx_path, ocn_path)
+        stats = StageStats()
+
+        self.assertTrue(self.store.resolved_is_current())
+        self.assertEqual(self.store.count("resolved"), 12)  # ten 415-555 blocks, 212-555-3 and the stamp
+        self.assertEqual(lookup_many(self.store, numbers, stats), expected)
+        self.assertEqual(stats.items(LMDB_GET), len(numbers))
+        self.assertEqual(stats.items(CARRIER), 0)
+
+        # Any other write makes the derived table stale; lookups then read the source tables.
+        self.store.bulk_put([("npanxx:212555:4", {"OCN": "1111", "LTYPE": "V"})])
+        self.assertFalse(self.store.resolved_is_current())
+        self.assertEqual(lookup_many(self.store, numbers), expected[:3] + [(True, "V", "Wireless Co")])
+
+    def write_npanxx(self, name: str, rows: list[tuple[str, str, str, str, str]]) -> Path:
+        path = Path(self._tmp_dir.name) / name
+        write_csv(
+            path,
+            ["NPA", "NXX", "BLOCK_ID", "OCN", "LTYPE", "NXXTYPE", "RC", "RCLONG", "STATE", "COUNTRY", "LATA", "SWITCH", "TBP_IND", "ADATE", "EFFDATE"],
+            [
+                {"NPA": npa, "NXX": nxx, "BLOCK_ID": block, "OCN": ocn, "LTYPE": ltype, "RCLONG": "Somewhere, USA"}
+                for npa, nxx, block, ocn, ltype in rows
+            ],
+        )
+        return path
+
+    def test_fast_import_matches_row_by_row_import(self) -> None:
+        npanxx_path = self.write_npanxx(
+            "npanxx_fast.csv",
+            [(str(200 + i), "555", str(i % 10), f"{i:04d}", "C") for i in range(50)] + [("212", "555", "A", "1", "S")],
+        )
+        ocn_path = Path(self._tmp_dir.name) / "ocn_fast.csv"
+        write_csv(ocn_path, ["OCN", "COMPANY", "DBA", "CommonName", "TYPE", "SMS", "Rural"], [{"OCN": "0001", "COMPANY": "One"}])
+        import_all(self.store, npanxx_path, ocn_path)
+        expected = {key: self.store.get_mapping(key) for key in self.store.iterate_keys()}
+
+        with PhoneLookupStore.open(Path(self._tmp_dir.name) / "fast-db") as fast_store:
+            stats = fast_import_all(fast_store, npanxx_path, ocn_path, batch_bytes=256)
+            actual = {key: fast_store.get_mapping(key) for key in fast_store.iterate_keys()}
+
+        self.assertEqual(actual, expected)
+        self.assertEqual([(item.table, item.rows, item.written) for item in stats], [("npanxx", 51, 51), ("ocn", 1, 1)])
+
+    def test_fast_import_with_workers_keeps_last_duplicate_and_existing_keys(self) -> None:
+        self.store.put_mapping("ocn:9999", {"CommonName": "Existing"})
+        self.store.put_mapping("npanxx:212555:A", {"OCN": "old"})
+        path = self.write_npanxx(
+            "npanxx_dupes.csv",
+            [("212", "555", "A", "1", "S"), ("415", "555", "1", "2", "C"), ("212", "555", "A", "3", "V")],
+        )
+
+        stats = fast_import(self.store, "npanxx", path, workers=2, batch_bytes=64)
+
+        self.assertEqual(stats.rows, 3)
+        self.assertEqual(self.store.get_mapping("npanxx:212555:A", ("OCN", "LTYPE")), {"OCN": "3", "LTYPE": "V"})
+        self.assertEqual(self.store.get_mapping("npanxx:415555:1", ("OCN",)), {"OCN": "2"})
+        self.assertEqual(self.store.get_mapping("ocn:9999"), {"CommonName": "Existing"})
+
+    def test_fast_import_keeps_quoted_newlines_within_one_record(self) -> None:
+        path = Path(self._tmp_dir.name) / "ocn_multiline.csv"
+        rows = [{"OCN": f"{i:04d}", "CommonName": f'Carrier {i}\nDivision "{i}"'} for i in range(40)]
+        write_csv(path, ["OCN", "CommonName"], rows)
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers), PhoneLookupStore.open(Path(self._tmp_dir.name) / f"multiline-{workers}") as store:
+                stats = fast_import(store, "ocn", path, workers=workers, batch_bytes=1)
+
+                self.assertEqual((stats.rows, store.count("ocn")), (40, 40))
+                self.assertEqual(store.get_mapping("ocn:0007", ("CommonName",)), {"CommonName": 'Carrier 7\nDivision "7"'})
+
+    def test_fast_import_validates_arguments(self) -> None:
+        path = self.write_npanxx("npanxx_args.csv", [])
+        with self.assertRaises(ValueError):
+            fast_import(self.store, "npanxx", path, workers=0)
+        with self.assertRaises(ValueError):
+            fast_import(self.store, "npanxx", path, batch_bytes=0)
+        with self.assertRaises(ValueError):
+            fast_import(self.store, "nope", path)
+
     def test_ensure_paths_exist_raises_for_missing_files(self) -> None:
         missing_path = Path(self._tmp_dir.name) / "missing.csv"
         with self.assertRaises(FileNotFoundError):
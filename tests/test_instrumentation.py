@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.importer import import_generation
+from phone_lookup.instrumentation import StageStats
+from phone_lookup.lookup import run_lookup
+from phone_lookup.store import PhoneLookupStore
+
+
+class StageStatsTests(unittest.TestCase):
+    def test_accumulates_and_merges_in_first_seen_order(self) -> None:
+        stats = StageStats()
+        stats.add("b", 0.5, 2)
+        stats.add("a", 0.25, 1)
+        other = StageStats()
+        other.add("a", 0.25, 3)
+        other.add("c", 1.0)
+        stats.merge(other)
+
+        self.assertEqual(stats.stages, ["b", "a", "c"])
+        self.assertEqual((stats.seconds("a"), stats.items("a")), (0.5, 4))
+        rows = stats.as_dict(elapsed=2.0)["stages"]
+        self.assertEqual(rows[0], {"stage": "b", "seconds": 0.5, "items": 2, "share": 0.25, "us_per_item": 250000.0})
+        self.assertIsNone(rows[2]["us_per_item"])
+
+    def test_timed_counts_items(self) -> None:
+        stats = StageStats()
+
+        self.assertEqual(list(stats.timed("input", iter("abc"))), ["a", "b", "c"])
+        self.assertEqual(stats.items("input"), 3)
+
+
+class InstrumentedPathsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_run_lookup_results_match_and_stages_are_recorded(self) -> None:
+        with PhoneLookupStore.open(self.root / "db") as store:
+            store.bulk_put(
+                [
+                    ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                    ("ocn:1111", {"CommonName": "Wireless Co"}),
+                ]
+            )
+            numbers = ["4155551234", "bogus", "9995550000", "4155551000"]
+            stats = StageStats()
+
+            timed = list(run_lookup(store, numbers, chunk_size=3, stats=stats))
+
+            self.assertEqual(timed, list(run_lookup(store, numbers, chunk_size=3)))
+        self.assertEqual(stats.stages, ["input", "normalize", "lmdb_get", "decode", "carrier", "resolve"])
+        self.assertEqual(stats.items("normalize"), 4)
+        self.assertEqual(stats.items("resolve"), 3)
+        self.assertEqual(stats.items("decode"), 2)
+
+    def test_import_generation_records_import_stages(self) -> None:
+        npanxx = self.root / "npanxx.csv"
+        npanxx.write_text("NPA,NXX,BLOCK_ID,OCN,LTYPE\n415,555,1,1111,C\n415,555,A,1111,S\n", encoding="utf-8")
+        ocn = self.root / "ocn.csv"
+        ocn.write_text("OCN,CommonName\n1111,Wireless Co\n", encoding="utf-8")
+
+        for fast, stages in (
+            (False, ["parse", "write", "derive", "verify", "publish"]),
+            (True, ["parse", "sort", "write", "derive", "verify", "publish"]),
+        ):
+            with self.subTest(fast=fast):
+                stats = StageStats()
+                import_generation(self.root / "store", npanxx, ocn, fast=fast, stats=stats)
+
+                self.assertEqual(stats.stages, stages)
+                self.assertEqual(stats.items("parse"), 3)
+                self.assertEqual(stats.items("write"), 3)
+                self.assertEqual(stats.items("derive"), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
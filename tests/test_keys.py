@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import unittest
+
+from phone_lookup.keys import (
+    join_key,
+    npanxx_candidates,
+    pack_npanxx,
+    split_key,
+    unpack_npanxx,
+)
+
+
+class KeyTests(unittest.TestCase):
+    def test_npanxx_keys_are_four_bytes_and_roundtrip(self) -> None:
+        key = pack_npanxx("415555", "A")
+
+        self.assertEqual(len(key), 4)
+        self.assertEqual(unpack_npanxx(key), (415555, "A"))
+        self.assertEqual(split_key("npanxx:415555:A"), ("npanxx", key))
+        self.assertEqual(join_key("npanxx", key), "npanxx:415555:A")
+        self.assertEqual(split_key("ocn:1234"), ("ocn", b"1234"))
+
+    def test_packed_order_matches_textual_order(self) -> None:
+        texts = sorted(f"{prefix}:{block}" for prefix in ("000001", "415555", "415556", "999999") for block in "0123456789A")
+        packed = [pack_npanxx(*text.split(":")) for text in texts]
+
+        self.assertEqual(sorted(packed), packed)
+
+    def test_candidates_are_block_then_fallback(self) -> None:
+        self.assertEqual(npanxx_candidates("4155551234"), (pack_npanxx("415555", "1"), pack_npanxx("415555", "A")))
+
+    def test_malformed_keys_are_rejected(self) -> None:
+        for key in ("npanxx:41555:1", "npanxx:415555:B", "npanxx:41555x:1", "ocn:", "other:1", "npanxx"):
+            with self.subTest(key=key), self.assertRaises(ValueError):
+                split_key(key)
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
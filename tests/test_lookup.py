@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.lookup import LookupResult, lookup_many, normalize_number, run_lookup, run_record_lookup
+from phone_lookup.memo import LookupMemo
+from phone_lookup.store import PhoneLookupStore
+
+
+class LookupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = PhoneLookupStore.open(Path(self._tmp.name))
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                ("npanxx:212555:A", {"OCN": "2222", "LTYPE": "S"}),
+                ("ocn:1111", {"CommonName": "", "DBA": "Wireless Co"}),
+                ("ocn:2222", {"CommonName": "City Tel"}),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_normalize_number_strips_country_code_and_punctuation(self) -> None:
+        self.assertEqual(normalize_number("+1 (415) 555-1234"), "4155551234")
+        self.assertIsNone(normalize_number("555-1234"))
+        self.assertIsNone(normalize_number("415555\u00b2234"))
+        self.assertIsNone(normalize_number("\uff14\uff11\uff15\uff15\uff15\uff15\uff11\uff12\uff13\uff14"))
+
+    def test_non_ascii_digits_are_invalid_alone_and_in_batches(self) -> None:
+        superscript = "415555\u00b2234"
+        fullwidth = "\uff14\uff11\uff15\uff15\uff15\uff15\uff11\uff12\uff13\uff14"
+        invalid = [LookupResult(number, None, "INVALID", "UNKNOWN", False) for number in (superscript, fullwidth)]
+
+        self.assertEqual(list(run_lookup(self.store, [superscript])), invalid[:1])
+        self.assertEqual(list(run_lookup(self.store, [fullwidth], memo=LookupMemo())), invalid[1:])
+        results = list(run_lookup(self.store, ["4155551234", superscript, fullwidth], chunk_size=3))
+        self.assertEqual(results[1:], invalid)
+        self.assertTrue(results[0].found)
+
+    def test_lookup_many_resolves_block_and_fallback(self) -> None:
+        results = lookup_many(self.store, ["4155551234", "2125559999", "9995550000"])
+
+        self.assertEqual(
+            results,
+            [
+                (True, "C", "Wireless Co"),
+                (True, "S", "City Tel"),
+                (False, "UNKNOWN", "UNKNOWN"),
+            ],
+        )
+
+    def test_run_lookup_preserves_order_across_chunks(self) -> None:
+        numbers = ["4155551234", "bogus", "12125559999", "9995550000", "415-555-1000"]
+
+        results = list(run_lookup(self.store, numbers, chunk_size=2))
+
+        self.assertEqual(
+            results,
+            [
+                LookupResult("4155551234", "4155551234", "C", "Wireless Co", True),
+                LookupResult("bogus", None, "INVALID", "UNKNOWN", False),
+                LookupResult("12125559999", "2125559999", "S", "City Tel", True),
+                LookupResult("9995550000", "9995550000", "UNKNOWN", "UNKNOWN", False),
+                LookupResult("415-555-1000", "4155551000", "C", "Wireless Co", True),
+            ],
+        )
+
+    def test_run_lookup_requires_positive_chunk_size(self) -> None:
+        with self.assertRaises(ValueError):
+            list(run_lookup(self.store, ["4155551234"], chunk_size=0))
+
+    def test_run_lookup_with_memo_matches_plain_lookup(self) -> None:
+        numbers = ["4155551234", "bogus", "4155551999", "2125559999", "2125550000", "9995550000"]
+        memo = LookupMemo()
+
+        results = list(run_lookup(self.store, numbers, chunk_size=2, memo=memo))
+
+        self.assertEqual(results, list(run_lookup(self.store, numbers)))
+        self.assertEqual((memo.resolved, memo.prefix_hits), (4, 1))
+
+    def test_sorted_key_lookup_matches_plain_lookup(self) -> None:
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:3", {"OCN": "2222", "LTYPE": "S"}),
+                ("npanxx:415555:A", {"OCN": "9999", "LTYPE": "V"}),
+                ("npanxx:415556:5", {"OCN": "1111"}),
+            ]
+        )
+        numbers = ["4155559000", "4155553000", "bogus", "4155551234", "4155560000", "2125559999", "4155565000"]
+        numbers += ["9995550000", "4155552000", "4155551234"]
+
+        for chunk_size in (3, 100):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(
+                    list(run_lookup(self.store, numbers, chunk_size=chunk_size, sort_keys=True)),
+                    list(run_lookup(self.store, numbers, chunk_size=chunk_size)),
+                )
+
+    def test_run_record_lookup_adds_requested_fields(self) -> None:
+        numbers = ["4155551234", "bogus", "2125559999", "9995550000"]
+
+        rows = list(run_record_lookup(self.store, numbers, npanxx_fields=("OCN",), ocn_fields=("DBA",), chunk_size=3))
+
+        self.assertEqual([result for result, _ in rows], list(run_lookup(self.store, numbers)))
+        self.assertEqual(rows[0][1]["OCN"], "1111")
+        self.assertEqual(rows[0][1]["DBA"], "Wireless Co")
+        self.assertNotIn("DBA", rows[2][1])
+        self.assertEqual(rows[1][1], {})
+        self.assertEqual(rows[3][1], {})
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import unittest
+
+from phone_lookup.lookup import run_deduplicated
+from phone_lookup.memo import LookupMemo, LookupMemoStats
+
+
+class LookupMemoTests(unittest.TestCase):
+    def test_resolves_each_prefix_once(self) -> None:
+        memo: LookupMemo[str] = LookupMemo()
+        calls = []
+
+        def resolve(batch):
+            calls.append(list(batch))
+            return [number[:7] for number in batch]
+
+        self.assertEqual(memo.resolve(["4155551234", "4155551999", "2125550000"], resolve), ["4155551", "4155551", "2125550"])
+        self.assertEqual(memo.resolve(["4155551000"], resolve), ["4155551"])
+        self.assertEqual(calls, [["4155551234", "2125550000"]])
+        self.assertEqual(memo.stats(), LookupMemoStats(resolved=2, prefix_hits=2, exact_hits=0))
+
+    def test_full_memo_is_refilled_without_losing_answers(self) -> None:
+        memo: LookupMemo[str] = LookupMemo(maxsize=2)
+        memo.resolve(["1111111000", "2222222000"], lambda batch: [number[0] for number in batch])
+
+        self.assertEqual(
+            memo.resolve(["1111111999", "3333333000"], lambda batch: [number[0] for number in batch]), ["1", "3"]
+        )
+        self.assertLessEqual(len(memo.prefixes), 2)
+
+    def test_chunk_larger_than_the_memo_keeps_it_bounded(self) -> None:
+        memo: LookupMemo[str] = LookupMemo(maxsize=2, exact=True)
+        digits = ["1111111000", "2222222000", "3333333000", "1111111999"]
+
+        self.assertEqual(memo.resolve(digits, lambda batch: [number[0] for number in batch]), ["1", "2", "3", "1"])
+        memo.remember(digits, ["a", "b", "c", "d"])
+        self.assertEqual(memo.stats(), LookupMemoStats(resolved=3, prefix_hits=1, exact_hits=0))
+        self.assertEqual((len(memo.prefixes), len(memo.numbers or {})), (2, 2))
+
+    def test_stats_combine(self) -> None:
+        combined = LookupMemoStats.combine([LookupMemoStats(1, 2, 3), LookupMemoStats(4, 5, 6)])
+
+        self.assertEqual(combined, LookupMemoStats(5, 7, 9))
+        self.assertEqual((combined.saved, combined.lookups), (16, 21))
+
+
+class RunDeduplicatedTests(unittest.TestCase):
+    def test_expands_results_in_input_order(self) -> None:
+        memo: LookupMemo[str] = LookupMemo(exact=True)
+        seen = []
+
+        def run(batch):
+            seen.extend(batch)
+            return [number.upper() for number in batch]
+
+        results = list(run_deduplicated(run, ["a", "b", "a", "c", "b", "a"], memo=memo, chunk_size=4))
+
+        self.assertEqual(results, ["A", "B", "A", "C", "B", "A"])
+        self.assertEqual(seen, ["a", "b", "c"])
+        self.assertEqual(memo.exact_hits, 3)
+
+    def test_repeats_are_resolved_again_after_the_memo_is_cleared(self) -> None:
+        memo: LookupMemo[str] = LookupMemo(exact=True)
+        generation = ["old"]
+        list(run_deduplicated(lambda batch: [generation[0]] * len(batch), ["a"], memo=memo))
+
+        def run(batch):
+            if generation[0] == "old":
+                generation[0] = "new"
+                memo.clear()  # what run_lookup does when it picks up a new generation
+            return [generation[0]] * len(batch)
+
+        self.assertEqual(list(run_deduplicated(run, ["a", "b"], memo=memo)), ["new", "new"])
+        self.assertEqual(memo.exact_hits, 0)
+
+    def test_requires_exact_memo(self) -> None:
+        with self.assertRaises(ValueError):
+            list(run_deduplicated(lambda batch: batch, ["a"], memo=LookupMemo()))
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
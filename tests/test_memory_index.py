@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.engines import create_engine
+from phone_lookup.lookup import lookup_many, run_lookup
+from phone_lookup.memory_index import MemoryIndex
+from phone_lookup.store import PhoneLookupStore
+
+NUMBERS = ["4155551234", "4155552000", "4155559999", "2125550000", "9995550000", "4155560000"]
+
+
+class MemoryIndexTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.store = PhoneLookupStore.open(self.tmp_path / "db")
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                ("npanxx:415555:A", {"OCN": "2222", "LTYPE": "S"}),
+                ("npanxx:212555:A", {"OCN": "3333", "LTYPE": ""}),
+                ("npanxx:415556:0", {"OCN": "", "LTYPE": "V"}),
+                ("ocn:1111", {"CommonName": "Wireless Co"}),
+                ("ocn:2222", {"DBA": "Landline Co"}),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_build_matches_store_lookups_including_fallback(self) -> None:
+        index = MemoryIndex.build(self.store)
+
+        self.assertEqual(index.lookup_many(NUMBERS), lookup_many(self.store, NUMBERS))
+        self.assertEqual(index.lookup("4155552000"), (True, "S", "Landline Co"))
+
+    def test_build_matches_the_resolved_table_for_every_block(self) -> None:
+        self.store.put_mapping("npanxx:415555:2", {"OCN": "", "LTYPE": ""})
+        numbers = [f"415555{digit}000" for digit in range(10)] + [f"415556{digit}000" for digit in range(10)]
+        derived = lookup_many(self.store, numbers)
+        self.store.rebuild_resolved()
+
+        self.assertEqual(lookup_many(self.store, numbers), derived)
+        self.assertEqual(MemoryIndex.build(self.store).lookup_many(numbers), derived)
+
+    def test_entries_are_interned(self) -> None:
+        index = MemoryIndex.build(self.store)
+
+        self.assertEqual(len(index.entries), 5)
+
+    def test_snapshot_roundtrip(self) -> None:
+        path = self.tmp_path / "index.bin"
+        MemoryIndex.build(self.store).save(path)
+
+        loaded = MemoryIndex.load(path)
+
+        self.assertEqual(loaded.lookup_many(NUMBERS), lookup_many(self.store, NUMBERS))
+
+    def test_load_rejects_other_files(self) -> None:
+        path = self.tmp_path / "not-an-index.bin"
+        path.write_bytes(b"garbage")
+
+        with self.assertRaises(ValueError):
+            MemoryIndex.load(path)
+
+    def test_memory_engine_plugs_into_run_lookup(self) -> None:
+        engine = create_engine("memory", self.store)
+
+        self.assertEqual(list(run_lookup(engine, NUMBERS + ["bad"])), list(run_lookup(self.store, NUMBERS + ["bad"])))
+        with self.assertRaises(ValueError):
+            create_engine("quantum", self.store)
+        with self.assertRaises(FileNotFoundError):
+            create_engine("memory", self.store, index_snapshot=self.tmp_path / "missing.bin")
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
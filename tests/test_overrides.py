@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup import vectorized
+from phone_lookup.delta import delta_import
+from phone_lookup.engines import create_engine
+from phone_lookup.importer import import_generation
+from phone_lookup.lookup import lookup_many, run_lookup, run_record_lookup
+from phone_lookup.memo import LookupMemo
+from phone_lookup.overrides import BloomFilter, OverrideStats
+from phone_lookup.parallel import ParallelLookup
+from phone_lookup.snapshot import write_snapshot
+from phone_lookup.store import PhoneLookupStore
+
+NUMBERS = ["4155551234", "4155551235", "4155559999", "2125550000", "9995550000"]
+BLOCK_RESULTS = [(True, "C", "Wireless Co"), (True, "C", "Wireless Co"), (True, "S", "Landline Co")]
+
+
+class BloomFilterTests(unittest.TestCase):
+    def test_members_are_always_found_and_false_positives_are_rare(self) -> None:
+        rng = random.Random(7)
+        members = rng.sample(range(2_000_000_000, 9_999_999_999), 5_000) + list(range(4155550000, 4155551000))
+        bloom = BloomFilter.build(members, len(members))
+        others = set(range(2_000_000_000, 2_000_020_000)) - set(members)
+
+        self.assertTrue(all(number in bloom for number in members))
+        self.assertLess(sum(number in bloom for number in others) / len(others), 0.01)
+
+    def test_roundtrip_and_validation(self) -> None:
+        bloom = BloomFilter.build([4155551234], 1)
+        loaded = BloomFilter.from_bytes(bloom.to_bytes())
+
+        self.assertIn(4155551234, loaded)
+        self.assertEqual((loaded.size, loaded.probes), (bloom.size, bloom.probes))
+        with self.assertRaises(TypeError):
+            loaded.add(1)
+        for data in (b"", b"PLBF\x01\x03\x07", b"XXXX" + bloom.to_bytes()[4:]):
+            with self.assertRaises(ValueError):
+                BloomFilter.from_bytes(data)
+
+
+class OverrideLookupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.store = PhoneLookupStore.open(self.tmp_path / "db")
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C", "STATE": "CA"}),
+                ("npanxx:415555:A", {"OCN": "2222", "LTYPE": "S", "STATE": "CA"}),
+                ("ocn:1111", {"CommonName": "Wireless Co"}),
+                ("ocn:2222", {"CommonName": "Landline Co", "TYPE": "ILEC"}),
+                ("ocn:3333", {"CommonName": "Ported Co", "TYPE": "CLEC"}),
+                ("override:4155551235", {"OCN": "3333", "LTYPE": "V"}),
+                ("override:9995550000", {"OCN": "3333", "LTYPE": ""}),
+            ]
+        )
+        self.expected = [BLOCK_RESULTS[0], (True, "V", "Ported Co"), BLOCK_RESULTS[2]]
+        self.expected += [(False, "UNKNOWN", "UNKNOWN"), (True, "UNKNOWN", "Ported Co")]
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_overrides_win_before_and_after_the_resolved_table_is_built(self) -> None:
+        self.assertEqual(lookup_many(self.store, NUMBERS), self.expected)
+        self.assertEqual(lookup_many(self.store, NUMBERS, overrides=False)[:3], BLOCK_RESULTS)
+
+        self.store.rebuild_resolved()
+        self.assertTrue(self.store.resolved_is_current())
+        self.assertEqual(lookup_many(self.store, NUMBERS), self.expected)
+        self.assertEqual(lookup_many(self.store, NUMBERS, sort_keys=True), self.expected)
+
+    def test_memoized_prefixes_do_not_leak_overrides(self) -> None:
+        self.store.rebuild_resolved()
+        memo: LookupMemo = LookupMemo()
+
+        results = list(run_lookup(self.store, NUMBERS * 3, memo=memo, chunk_size=4))
+
+        self.assertEqual([(r.found, r.ltype, r.common_name) for r in results], self.expected * 3)
+
+    def test_record_lookup_takes_carrier_fields_from_the_override(self) -> None:
+        rows = list(
+            run_record_lookup(self.store, ["4155551234", "4155551235"], npanxx_fields=("OCN", "STATE"), ocn_fields=("TYPE",))
+        )
+
+        self.assertEqual(rows[0][1], {"OCN": "1111", "LTYPE": "C", "STATE": "CA"})
+        self.assertEqual(rows[1][0].common_name, "Ported Co")
+        self.assertEqual(rows[1][1], {"OCN": "3333", "LTYPE": "V", "STATE": "CA", "TYPE": "CLEC"})
+
+    def test_filter_is_stored_with_the_resolved_table_and_counts_checks(self) -> None:
+        self.store.rebuild_resolved()
+        self.store.close()
+        with PhoneLookupStore.open(self.tmp_path / "db", readonly=True) as store:
+            self.assertEqual(lookup_many(store, NUMBERS), self.expected)
+            self.assertIsNotNone(store._override_filter[1])
+            stats = store.override_counts.stats()
+        self.assertEqual((stats.lookups, stats.hits), (5, 2))
+        self.assertEqual(stats.candidates, stats.hits + stats.false_positives)
+
+    def test_parallel_workers_apply_overrides_and_report_their_counts(self) -> None:
+        self.store.rebuild_resolved()
+        self.store.close()
+        parallel = ParallelLookup(self.tmp_path / "db", workers=2, chunk_size=3)
+
+        results = list(parallel.run(NUMBERS * 4))
+
+        self.assertEqual([(r.found, r.ltype, r.common_name) for r in results], self.expected * 4)
+        self.assertEqual(parallel.override_stats().hits, 8)
+
+    def test_every_engine_answers_overridden_numbers_alike(self) -> None:
+        numbers = NUMBERS + ["(415) 555-1235", "bogus"]
+        expected = list(run_lookup(self.store, numbers))
+        snapshot = self.tmp_path / "lookup.snapshot"
+        write_snapshot(self.store, snapshot)
+
+        for name, store in (("memory", self.store), ("mmap", None)):
+            with create_engine(name, store, snapshot=snapshot) as engine:
+                self.assertEqual(list(run_lookup(engine, numbers)), expected, name)
+                self.assertEqual(list(run_lookup(engine, numbers, memo=LookupMemo())), expected, name)
+                if name == "memory" and vectorized.available():
+                    self.assertEqual(list(vectorized.run_vectorized_lookup(engine, numbers)), expected)
+
+    def test_stores_without_overrides_skip_the_check(self) -> None:
+        with PhoneLookupStore.open(self.tmp_path / "plain") as store:
+            store.bulk_put([("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"})])
+            store.rebuild_resolved()
+            self.assertEqual(store.count("override"), 0)
+            lookup_many(store, NUMBERS)
+            self.assertEqual(store.override_counts.stats(), OverrideStats(0, 0, 0))
+
+
+class OverrideImportTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.npanxx = self.tmp_path / "npanxx.csv"
+        self.npanxx.write_text("NPA,NXX,BLOCK_ID,OCN,LTYPE\n415,555,A,1111,S\n", encoding="utf-8")
+        self.ocn = self.tmp_path / "ocn.csv"
+        self.ocn.write_text("OCN,CommonName\n1111,Landline Co\n2222,Ported Co\n", encoding="utf-8")
+        self.overrides = self.tmp_path / "overrides.csv"
+        self.overrides.write_text("NUMBER,OCN,LTYPE\n(415) 555-1234,2222,C\nbogus,2222,C\n", encoding="utf-8")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_generation_import_and_incremental_override_changes(self) -> None:
+        root = self.tmp_path / "db"
+        published = import_generation(root, self.npanxx, self.ocn, fast=True, override_path=self.overrides)
+        self.assertEqual(published.counts, {"npanxx": 1, "ocn": 2, "override": 1})
+        with PhoneLookupStore.open(root, readonly=True) as store:
+            self.assertEqual(lookup_many(store, ["4155551234", "4155555678"]), [(True, "C", "Ported Co"), (True, "S", "Landline Co")])
+
+        self.overrides.write_text("NUMBER,OCN,LTYPE\n4155555678,2222,V\n", encoding="utf-8")
+        with PhoneLookupStore.open(root) as store:
+            deltas = delta_import(store, self.npanxx, self.ocn, override_path=self.overrides)
+            self.assertEqual([(d.table, d.added, d.removed) for d in deltas][-1], ("override", 1, 1))
+            self.assertTrue(store.resolved_is_current())
+            self.assertEqual(lookup_many(store, ["4155551234", "4155555678"]), [(True, "S", "Landline Co"), (True, "V", "Ported Co")])
+            # Without an override feed the stored overrides are kept.
+            delta_import(store, self.npanxx, self.ocn)
+            self.assertEqual(store.count("override"), 1)
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.lookup import run_lookup
+from phone_lookup.parallel import ParallelLookup
+from phone_lookup.store import PhoneLookupStore
+
+
+class ParallelLookupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name)
+        with PhoneLookupStore.open(self.db_path) as store:
+            store.bulk_put(
+                [
+                    ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                    ("npanxx:212555:A", {"OCN": "2222", "LTYPE": "S"}),
+                    ("ocn:1111", {"CommonName": "Wireless Co"}),
+                    ("ocn:2222", {"CommonName": "City Tel"}),
+                ]
+            )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_results_match_serial_lookup_in_input_order(self) -> None:
+        numbers = ["4155551234", "bad", "2125550000", "9995550000"] * 25
+        parallel = ParallelLookup(self.db_path, workers=2, chunk_size=7)
+
+        results = list(parallel.run(numbers))
+
+        with PhoneLookupStore.open(self.db_path, readonly=True) as store:
+            self.assertEqual(results, list(run_lookup(store, numbers)))
+        stats = parallel.carrier_stats()
+        self.assertEqual(stats.hits + stats.misses, 50)
+
+    def test_workers_memoize_prefixes(self) -> None:
+        numbers = ["4155551234", "bad", "2125550000", "9995550000"] * 25
+        parallel = ParallelLookup(self.db_path, workers=2, chunk_size=7, memo_size=100)
+
+        results = list(parallel.run(numbers))
+
+        with PhoneLookupStore.open(self.db_path, readonly=True) as store:
+            self.assertEqual(results, list(run_lookup(store, numbers)))
+        memo_stats = parallel.memo_stats()
+        self.assertEqual(memo_stats.lookups, 75)
+        self.assertLessEqual(memo_stats.resolved, 6)
+
+    def test_requires_positive_workers(self) -> None:
+        with self.assertRaises(ValueError):
+            ParallelLookup(self.db_path, workers=0)
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import io
+import unittest
+
+from phone_lookup.lookup import LookupResult
+from phone_lookup.progress import (
+    BarProgress,
+    LineProgress,
+    Progress,
+    RateProgress,
+    create_progress,
+    format_duration,
+)
+
+FOUND = LookupResult("4155551234", "4155551234", "C", "Carrier", True)
+MISSING = LookupResult("bad", None, "INVALID", "UNKNOWN", False)
+
+
+class _TTY(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def render(idx: int, total: int | None, result: LookupResult) -> str:
+    return f"{idx}/{total} {result.original}"
+
+
+class ProgressTests(unittest.TestCase):
+    def test_auto_mode_depends_on_tty(self) -> None:
+        self.assertIsInstance(create_progress("auto", stream=_TTY(), total=1, render=render), BarProgress)
+        self.assertIsInstance(create_progress("auto", stream=io.StringIO(), total=1, render=render), RateProgress)
+        with self.assertRaises(ValueError):
+            create_progress("fancy", stream=io.StringIO(), total=1, render=render)
+
+    def test_none_mode_counts_without_output(self) -> None:
+        stream = io.StringIO()
+        progress = create_progress("none", stream=stream, total=2, render=render)
+        self.assertIs(type(progress), Progress)
+
+        progress.advance(FOUND)
+        progress.advance(MISSING)
+        progress.finish()
+
+        self.assertEqual((progress.count, progress.found), (2, 1))
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_line_mode_renders_every_result(self) -> None:
+        stream = io.StringIO()
+        progress = LineProgress(stream, None, render)
+
+        progress.advance(FOUND)
+        progress.advance(MISSING)
+
+        self.assertEqual(stream.getvalue(), "1/None 4155551234\n2/None bad\n")
+
+    def test_rate_mode_reports_totals_on_finish(self) -> None:
+        stream = io.StringIO()
+        progress = RateProgress(stream, 4)
+
+        for result in (FOUND, FOUND, MISSING):
+            progress.advance(result)
+        progress.finish()
+
+        report = stream.getvalue()
+        self.assertEqual(report.count("\n"), 1)
+        self.assertIn("Processed 3/4 (75.0%) numbers", report)
+        self.assertIn("found 66.7%", report)
+
+    def test_bar_mode_draws_a_single_line(self) -> None:
+        stream = io.StringIO()
+        progress = BarProgress(stream, 2)
+
+        progress.advance(FOUND)
+        progress.advance(FOUND)
+        progress.finish()
+
+        output = stream.getvalue()
+        self.assertTrue(output.startswith("\r["))
+        self.assertIn("100.0% 2/2", output)
+        self.assertEqual(output.count("\n"), 1)
+
+    def test_format_duration(self) -> None:
+        self.assertEqual(format_duration(3725.9), "1:02:05")
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
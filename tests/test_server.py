@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+from unittest import mock
+
+from phone_lookup.lookup import LookupResult
+from phone_lookup.server import LookupService
+from phone_lookup.store import PhoneLookupStore
+
+
+async def request(port: int, method: str, target: str, body: Optional[Any] = None) -> Tuple[int, Any]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+        + payload
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(content)
+
+
+class LookupServiceTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = PhoneLookupStore.open(Path(self._tmp.name))
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                ("npanxx:212555:A", {"OCN": "2222", "LTYPE": "S"}),
+                ("ocn:1111", {"CommonName": "Wireless Co"}),
+                ("ocn:2222", {"CommonName": "City Tel"}),
+            ]
+        )
+        self.service = LookupService(self.store, window=0.01)
+        _, self.port = await self.service.start("127.0.0.1", 0)
+
+    async def asyncTearDown(self) -> None:
+        await self.service.close()
+        self.store.close()
+        self._tmp.cleanup()
+
+    async def test_get_single_number(self) -> None:
+        status, body = await request(self.port, "GET", "/lookup?number=%2B1%20415-555-1234")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body["normalized"], "4155551234")
+        self.assertEqual(body["line_type"], "WIRELESS")
+        self.assertEqual(body["carrier"], "Wireless Co")
+        self.assertTrue(body["found"])
+
+    async def test_post_batch_preserves_order(self) -> None:
+        status, body = await request(
+            self.port, "POST", "/lookup", {"numbers": ["2125559999", "bogus", "9995550000"]}
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [(item["number"], item["ltype"], item["found"]) for item in body["results"]],
+            [("2125559999", "S", True), ("bogus", "INVALID", False), ("9995550000", "UNKNOWN", False)],
+        )
+
+    async def test_concurrent_requests_share_batches(self) -> None:
+        numbers = [f"415555{index:04d}" for index in range(20)]
+
+        responses = await asyncio.gather(
+            *(request(self.port, "GET", f"/lookup?number={number}") for number in numbers)
+        )
+
+        self.assertEqual([body["normalized"] for _, body in responses], numbers)
+        stats = self.service.batcher.stats
+        self.assertEqual(stats.requests, 20)
+        self.assertLess(stats.batches, 20)
+
+    async def test_health_and_errors(self) -> None:
+        status, body = await request(self.port, "GET", "/health")
+        self.assertEqual((status, body["status"]), (200, "ok"))
+
+        self.assertEqual((await request(self.port, "GET", "/missing"))[0], 404)
+        self.assertEqual((await request(self.port, "GET", "/lookup"))[0], 400)
+        self.assertEqual((await request(self.port, "POST", "/lookup", {"numbers": [1]}))[0], 400)
+        self.assertEqual((await request(self.port, "DELETE", "/lookup"))[0], 405)
+
+
+class FailingService(LookupService):
+    def _resolve(self, numbers: List[str]) -> List[LookupResult]:
+        if "fail" in numbers:
+            raise RuntimeError("lookup failed")
+        return super()._resolve(numbers)
+
+
+class ServiceErrorTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = PhoneLookupStore.open(Path(self._tmp.name))
+        self.store.bulk_put([("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}), ("ocn:1111", {"CommonName": "Wireless Co"})])
+        self.errors: list = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: self.errors.append(context))
+
+    async def asyncTearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    async def test_failed_request_gets_500_without_failing_its_batch(self) -> None:
+        service = FailingService(self.store, window=0.05)
+        _, port = await service.start("127.0.0.1", 0)
+        try:
+            responses = await asyncio.gather(
+                request(port, "GET", "/lookup?number=4155551234"),
+                request(port, "GET", "/lookup?number=fail"),
+                request(port, "POST", "/lookup", {"numbers": ["4155551000", "bogus"]}),
+            )
+        finally:
+            await service.close()
+
+        self.assertEqual(service.batcher.stats.batches, 1)
+        self.assertEqual([status for status, _ in responses], [200, 500, 200])
+        self.assertEqual(responses[0][1]["carrier"], "Wireless Co")
+        self.assertEqual(responses[1][1], {"error": "internal error"})
+        self.assertEqual([item["found"] for item in responses[2][1]["results"]], [True, False])
+        self.assertEqual([context["message"] for context in self.errors], ["Lookup request failed"])
+
+    async def test_refresher_survives_a_failed_refresh(self) -> None:
+        service = LookupService(self.store)
+        with mock.patch("phone_lookup.server.REFRESH_INTERVAL", 0.01), mock.patch.object(
+            self.store, "refresh", side_effect=[RuntimeError("disk gone")] + [False] * 100
+        ) as refresh:
+            await service.start("127.0.0.1", 0)
+            try:
+                for _ in range(100):
+                    if refresh.call_count >= 3:
+                        break
+                    await asyncio.sleep(0.01)
+            finally:
+                await service.close()
+
+        self.assertGreaterEqual(refresh.call_count, 3)
+        self.assertEqual(self.errors[0]["message"], "Refreshing the lookup source failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.engines import create_engine
+from phone_lookup.lookup import lookup_many, run_lookup
+from phone_lookup.parallel import ParallelLookup
+from phone_lookup.snapshot import SnapshotIndex, write_snapshot
+from phone_lookup.store import PhoneLookupStore
+
+NUMBERS = ["4155551234", "4155552000", "4155559999", "2125550000", "9995550000", "4155560000", "0000000000"]
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+        self.path = self.tmp_path / "lookup.snapshot"
+        self.store = PhoneLookupStore.open(self.tmp_path / "db")
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                ("npanxx:415555:A", {"OCN": "2222", "LTYPE": "S"}),
+                ("npanxx:212555:A", {"OCN": "3333", "LTYPE": ""}),
+                ("npanxx:415556:0", {"OCN": "", "LTYPE": "V"}),
+                ("ocn:1111", {"CommonName": "Télé Wireless"}),
+                ("ocn:2222", {"DBA": "Landline Co"}),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_matches_store_lookups_with_and_without_resolved_table(self) -> None:
+        self.assertFalse(self.store.resolved_is_current())
+        self.assertEqual(write_snapshot(self.store, self.path), (21, 4))
+        with SnapshotIndex(self.path) as index:
+            self.assertEqual(index.lookup_many(NUMBERS), lookup_many(self.store, NUMBERS))
+            self.assertEqual(index.lookup("4155551234"), (True, "C", "Télé Wireless"))
+
+        self.store.rebuild_resolved()
+        write_snapshot(self.store, self.path)
+        with SnapshotIndex(self.path) as index:
+            self.assertEqual(len(index), 21)
+            self.assertEqual(index.lookup_many(NUMBERS), lookup_many(self.store, NUMBERS))
+
+    def test_rewriting_leaves_open_readers_on_the_old_file(self) -> None:
+        write_snapshot(self.store, self.path)
+        with SnapshotIndex(self.path) as old:
+            self.store.put_mapping("npanxx:999555:A", {"OCN": "1111", "LTYPE": "W"})
+            write_snapshot(self.store, self.path)
+            with SnapshotIndex(self.path) as new:
+                self.assertEqual(old.lookup("9995550000"), (False, "UNKNOWN", "UNKNOWN"))
+                self.assertEqual(new.lookup("9995550000"), (True, "W", "Télé Wireless"))
+        self.assertEqual([path.name for path in self.tmp_path.iterdir() if path.is_file()], [self.path.name])
+
+    def test_refresh_maps_a_reexported_file(self) -> None:
+        write_snapshot(self.store, self.path)
+        with SnapshotIndex(self.path) as index:
+            self.assertFalse(index.refresh())
+            self.store.put_mapping("npanxx:999555:A", {"OCN": "1111", "LTYPE": "W"})
+            write_snapshot(self.store, self.path)
+
+            self.assertTrue(index.refresh())
+            self.assertEqual(index.lookup("9995550000"), (True, "W", "Télé Wireless"))
+            garbage = self.tmp_path / "garbage"
+            garbage.write_bytes(b"garbage")
+            os.replace(garbage, self.path)
+            with self.assertRaises(ValueError):
+                index.refresh()
+            self.assertEqual(index.lookup("9995550000"), (True, "W", "Télé Wireless"))
+
+    def test_rejects_other_and_truncated_files(self) -> None:
+        write_snapshot(self.store, self.path)
+        data = self.path.read_bytes()
+        for content in (b"", b"garbage", data[:-1], b"PLMI" + data[4:]):
+            self.path.write_bytes(content)
+            with self.assertRaises(ValueError):
+                SnapshotIndex(self.path)
+
+    def test_mmap_engine_needs_no_store(self) -> None:
+        write_snapshot(self.store, self.path)
+        with create_engine("mmap", None, snapshot=self.path) as engine:
+            self.assertEqual(list(run_lookup(engine, NUMBERS + ["bad"])), list(run_lookup(self.store, NUMBERS + ["bad"])))
+        with self.assertRaises(ValueError):
+            create_engine("mmap", self.store)
+        with self.assertRaises(ValueError):
+            create_engine("memory", None)
+
+    def test_parallel_workers_share_the_snapshot(self) -> None:
+        write_snapshot(self.store, self.path)
+        numbers = NUMBERS * 10
+        parallel = ParallelLookup(self.tmp_path / "missing", workers=2, chunk_size=7, engine="mmap", snapshot=self.path)
+
+        self.assertEqual(list(parallel.run(numbers)), list(run_lookup(self.store, numbers)))
+        self.assertEqual(parallel.carrier_stats().lookups, 0)
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import json
 import tempfile
+import threading
 import unittest
 from pathlib import Path
 
-from phone_lookup.store import PhoneLookupStore
+from phone_lookup.backends import load_backend
+from phone_lookup.keys import pack_npanxx
+from phone_lookup.store import LegacyLayoutError, PhoneLookupStore, lmdb
 
 
 class PhoneLookupStoreTests(unittest.TestCase):
@@ -26,7 +30,7 @@ class PhoneLookupStoreTests(unittest.TestCase):
         self.assertEqual(self.store.get_mapping("missing:key"), {})
 
     def test_bulk_put_with_batches(self) -> None:
-        items = [(f"npanxx:55500{i}:{i}", {"OCN": f"{i:04d}"}) for i in range(15)]
+        items = [(f"npanxx:555{i:03d}:{i % 10}", {"OCN": f"{i:04d}"}) for i in range(15)]
 
         self.store.bulk_put(items, batch_size=4)
 
@@ -37,13 +41,206 @@ class PhoneLookupStoreTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.store.bulk_put([], batch_size=0)
 
+    def test_get_many_preserves_order_and_reports_missing(self) -> None:
+        self.store.put_mapping("ocn:0001", {"CommonName": "One"})
+        self.store.put_mapping("ocn:0002", {"CommonName": "Two"})
+
+        results = self.store.get_many(["ocn:0002", "ocn:missing", "ocn:0001"])
+
+        self.assertEqual(results, [{"CommonName": "Two"}, {}, {"CommonName": "One"}])
+
+    def test_reader_serves_multiple_gets_from_one_transaction(self) -> None:
+        self.store.put_mapping("ocn:0001", {"CommonName": "One"})
+
+        with self.store.reader() as reader:
+            self.assertEqual(reader.get_mapping("ocn:0001"), {"CommonName": "One"})
+            self.assertEqual(reader.get_mapping("ocn:0002"), {})
+            self.assertEqual(reader.get_mapping("ocn:0001"), {"CommonName": "One"})
+
+    def test_seek_moves_forward_and_recovers_after_other_reads(self) -> None:
+        self.store.bulk_put([(f"npanxx:415{i:03d}:{i % 10}", {"OCN": f"{i:04d}"}) for i in range(0, 100, 3)])
+        key = lambda i: pack_npanxx(f"415{i:03d}", str(i % 10))  # noqa: E731
+
+        with self.store.reader() as reader:
+            self.assertEqual(reader.seek("npanxx", key(3)), key(3))
+            self.assertEqual(reader.current("npanxx", ("OCN",)), {"OCN": "0003"})
+            self.assertEqual(reader.seek("npanxx", key(4)), key(6))
+            # Beyond the forward steps, the cursor searches again.
+            self.assertEqual(reader.seek("npanxx", key(90)), key(90))
+            self.assertEqual(reader.get_npanxx("415009", "9"), {"OCN": "0009"})
+            self.assertEqual(reader.seek("npanxx", key(93)), key(93))
+            # A smaller key than the previous seek is still found.
+            self.assertEqual(reader.seek("npanxx", key(12)), key(12))
+            self.assertIsNone(reader.seek("npanxx", key(99) + b"\xff"))
+            self.assertIsNone(reader.seek("npanxx", pack_npanxx("999999", "A")))
+            self.assertEqual(reader.seek("npanxx", key(0)), key(0))
+
+    def test_resolve_carrier_caches_until_store_is_written(self) -> None:
+        self.store.put_mapping("ocn:0001", {"CommonName": "Old Name"})
+
+        self.assertEqual(self.store.resolve_carrier("0001"), "Old Name")
+        self.assertEqual(self.store.resolve_carrier("0001"), "Old Name")
+        self.assertEqual(self.store.carriers.stats().hits, 1)
+
+        self.store.bulk_put([("ocn:0001", {"CommonName": "New Name"})])
+        self.assertEqual(self.store.resolve_carrier("0001"), "New Name")
+
+    def test_preload_carriers_loads_only_ocn_records(self) -> None:
+        self.store.bulk_put(
+            [
+                ("npanxx:415555:1", {"OCN": "0001"}),
+                ("ocn:0001", {"CommonName": "One"}),
+                ("ocn:0002", {"DBA": "Two"}),
+            ]
+        )
+
+        self.assertEqual(self.store.preload_carriers(), 2)
+        with self.store.reader() as reader:
+            self.assertEqual(reader.resolve_carrier("0002"), "Two")
+        self.assertEqual(self.store.carriers.stats().misses, 0)
+
+    def test_iterate_mappings_filters_by_prefix(self) -> None:
+        self.store.bulk_put(
+            [("npanxx:415555:1", {"OCN": "1"}), ("npanxx:415556:A", {"OCN": "2"}), ("ocn:1", {"DBA": "x"})]
+        )
+
+        self.assertEqual(list(self.store.iterate_mappings("ocn:")), [("ocn:1", {"DBA": "x"})])
+        self.assertEqual([key for key, _ in self.store.iterate_mappings("npanxx:415556")], ["npanxx:415556:A"])
+        self.assertEqual(len(list(self.store.iterate_mappings())), 3)
+
+    def test_keys_outside_the_tables_are_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            self.store.put_mapping("zzz", {})
+        with self.assertRaises(ValueError):
+            self.store.bulk_put([("npanxx:5550010:10", {})])
+        self.assertEqual(self.store.get_mapping("npanxx:bad"), {})
+
+    def test_get_mapping_decodes_requested_fields(self) -> None:
+        self.store.put_mapping("npanxx:415555:1", {"OCN": "1234", "LTYPE": "C", "RC": "SF"})
+
+        self.assertEqual(self.store.get_mapping("npanxx:415555:1", ("LTYPE",)), {"LTYPE": "C"})
+
+    def test_migrate_encoding_rewrites_legacy_json_values(self) -> None:
+        legacy = {"OCN": "1234", "LTYPE": "C"}
+        with self.store._env.begin(write=True) as txn:
+            txn.put(pack_npanxx("415555", "1"), json.dumps(legacy).encode("utf-8"), db=self.store._tables["npanxx"])
+
+        self.assertEqual(self.store.get_mapping("npanxx:415555:1"), legacy)
+        self.assertEqual(self.store.migrate_encoding(), 1)
+        self.assertEqual(self.store.migrate_encoding(), 0)
+        self.assertEqual(self.store.get_mapping("npanxx:415555:1"), legacy)
+
+    def test_single_keyspace_store_must_be_upgraded(self) -> None:
+        path = Path(self._tmp.name) / "legacy"
+        env = lmdb.open(str(path), max_dbs=4)
+        with env.begin(write=True) as txn:
+            txn.put(b"npanxx:415555:1", json.dumps({"OCN": "1234"}).encode("utf-8"))
+            txn.put(b"npanxx:bad", b"{}")
+            txn.put(b"ocn:1234", json.dumps({"CommonName": "Legacy Co"}).encode("utf-8"))
+        env.close()
+
+        with self.assertRaises(LegacyLayoutError):
+            PhoneLookupStore.open(path)
+        self.assertEqual(PhoneLookupStore.upgrade_layout(path), (2, 1))
+
+        with PhoneLookupStore.open(path) as upgraded:
+            self.assertEqual(upgraded.get_npanxx("415555", "1"), {"OCN": "1234"})
+            self.assertEqual(upgraded.resolve_carrier("1234"), "Legacy Co")
+            self.assertEqual(upgraded.count("npanxx"), 1)
+
+    def test_readonly_store_reads_but_refuses_writes(self) -> None:
+        self.store.put_mapping("ocn:0001", {"CommonName": "One"})
+        self.store.close()
+
+        with PhoneLookupStore.open(Path(self._tmp.name), readonly=True) as readonly:
+            self.assertEqual(readonly.get_mapping("ocn:0001"), {"CommonName": "One"})
+            with self.assertRaises(load_backend(readonly.backend).ReadonlyError):
+                readonly.put_mapping("ocn:0002", {"CommonName": "Two"})
+
+    def test_readonly_open_requires_existing_path(self) -> None:
+        with self.assertRaises(FileNotFoundError):
+            PhoneLookupStore.open(Path(self._tmp.name) / "missing", readonly=True)
+
+    def test_put_sorted_appends_or_inserts(self) -> None:
+        self.store.put_mapping("npanxx:415555:1", {"OCN": "1"})
+        appended = [(pack_npanxx("999999", "0"), b'{"OCN": "9"}'), (pack_npanxx("999999", "A"), b'{"OCN": "A"}')]
+        inserted = [(pack_npanxx("000000", "A"), b'{"OCN": "0"}'), (pack_npanxx("415555", "1"), b'{"OCN": "2"}')]
+
+        self.assertEqual(self.store.put_sorted("npanxx", appended), 2)
+        self.assertEqual(self.store.put_sorted("npanxx", inserted), 2)
+        self.assertEqual(self.store.put_sorted("ocn", [(b"0001", b'{"DBA": "One"}')]), 1)
+        self.assertEqual(self.store.put_sorted("npanxx", []), 0)
+
+        self.assertEqual(self.store.get_mapping("npanxx:999999:A"), {"OCN": "A"})
+        self.assertEqual(self.store.get_mapping("npanxx:000000:A"), {"OCN": "0"})
+        self.assertEqual(self.store.get_mapping("npanxx:415555:1"), {"OCN": "2"})
+        self.assertEqual(self.store.get_ocn("0001"), {"DBA": "One"})
+        self.assertEqual((self.store.count("npanxx"), self.store.count("ocn")), (4, 1))
+
     def test_iterate_keys_returns_all_inserted_entries(self) -> None:
-        items = {f"npanxx:0000{i}:A": {"OCN": str(i)} for i in range(5)}
+        items = {f"npanxx:00000{i}:A": {"OCN": str(i)} for i in range(5)}
         for key, mapping in items.items():
             self.store.put_mapping(key, mapping)
 
         returned_keys = set(self.store.iterate_keys())
         self.assertEqual(returned_keys, set(items))
+        self.store.put_mapping("ocn:0001", {"DBA": "One"})
+        self.assertEqual(list(self.store.iterate_keys("ocn")), ["ocn:0001"])
+        self.assertEqual(list(self.store.iterate_keys("npanxx")), sorted(items))
+
+    def test_threads_share_one_store(self) -> None:
+        items = [(f"ocn:{i:04d}", {"CommonName": f"Carrier {i}"}) for i in range(200)]
+        self.store.bulk_put(items)
+        errors: list = []
+
+        def read(offset: int) -> None:
+            try:
+                for index in range(offset, offset + 1000):
+                    key, mapping = items[index % len(items)]
+                    if self.store.get_mapping(key) != mapping:
+                        errors.append(key)
+                    self.store.resolve_carrier(f"{index % 300:04d}")
+                with self.store.reader() as reader:
+                    reader.get_many(key for key, _ in items)
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+
+        threads = [threading.Thread(target=read, args=(offset * 7,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_max_staleness_bounds_how_long_commits_stay_invisible(self) -> None:
+        path = Path(self._tmp.name) / "shared"
+        with PhoneLookupStore.open(path, backend="sqlite") as writer:
+            writer.put_mapping("ocn:0001", {"CommonName": "Old"})
+            with PhoneLookupStore.open(path, readonly=True, max_staleness=60) as reader:
+                self.assertEqual(reader.resolve_carrier("0001"), "Old")
+                writer.put_mapping("ocn:0001", {"CommonName": "New"})
+                self.assertEqual(reader.get_ocn("0001"), {"CommonName": "Old"})
+                reader.max_staleness = 0
+                self.assertEqual(reader.get_ocn("0001"), {"CommonName": "New"})
+
+    def test_carrier_cache_follows_writes_by_another_store(self) -> None:
+        path = Path(self._tmp.name) / "shared"
+        with PhoneLookupStore.open(path, backend="sqlite") as writer:
+            writer.put_mapping("ocn:1111", {"CommonName": "Old"})
+            with PhoneLookupStore.open(path, readonly=True) as reader:
+                self.assertEqual(reader.resolve_carrier("1111"), "Old")
+                self.assertEqual(reader.resolve_carrier("1111"), "Old")
+                writer.bulk_put([("ocn:1111", {"CommonName": "New"})])
+                self.assertEqual(reader.resolve_carrier("1111"), "New")
+                with reader.reader() as view:
+                    self.assertEqual(view.resolve_carrier("1111"), "New")
+                self.assertEqual(reader.carriers.stats().hits, 2)
+
+    def test_own_writes_are_visible_despite_max_staleness(self) -> None:
+        with PhoneLookupStore.open(Path(self._tmp.name) / "stale", max_staleness=60) as store:
+            self.assertEqual(store.get_mapping("ocn:0001"), {})
+            store.put_mapping("ocn:0001", {"CommonName": "One"})
+            self.assertEqual(store.get_mapping("ocn:0001"), {"CommonName": "One"})
 
 
 if __name__ == "__main__":  # pragma: no cover - convenience
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import gzip
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.streams import count_numbers, is_stdio, iter_numbers, open_input, open_output
+
+
+class StreamTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_path = Path(self._tmp.name)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_iter_numbers_skips_blank_lines(self) -> None:
+        handle = io.StringIO(" 4155551234 \n\n  \n2125550000")
+
+        self.assertEqual(list(iter_numbers(handle)), ["4155551234", "2125550000"])
+
+    def test_count_numbers_reads_plain_and_gzip_files(self) -> None:
+        plain = self.tmp_path / "numbers.txt"
+        plain.write_text("1\n\n2\n3", encoding="utf-8")
+        compressed = self.tmp_path / "numbers.txt.gz"
+        with gzip.open(compressed, "wt", encoding="utf-8") as handle:
+            handle.write("1\n2\n \n")
+
+        self.assertEqual(count_numbers(plain), 3)
+        self.assertEqual(count_numbers(compressed), 2)
+        self.assertIsNone(count_numbers("-"))
+
+    def test_gzip_output_roundtrips_through_input(self) -> None:
+        path = self.tmp_path / "out.txt.gz"
+        with open_output(path) as handle:
+            handle.write("4155551234\n")
+
+        with open_input(path) as handle:
+            self.assertEqual(list(iter_numbers(handle)), ["4155551234"])
+
+    def test_dash_means_stdio(self) -> None:
+        self.assertTrue(is_stdio(Path("-")))
+        self.assertFalse(is_stdio(self.tmp_path / "-x"))
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()
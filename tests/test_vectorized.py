@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from phone_lookup.lookup import run_lookup
+from phone_lookup.memory_index import MemoryIndex
+from phone_lookup.store import PhoneLookupStore
+from phone_lookup.vectorized import available
+
+NUMBERS = [
+    "4155551234",
+    "+1 (415) 555-2000",
+    "1-212-555-0000",
+    "9995550000",
+    "bogus",
+    "",
+    "415555123",
+    "21234567890",
+    "x" * 40 + "4155551234",
+    "４１５５５５１２３４",
+]
+
+
+@unittest.skipUnless(available(), "numpy is not installed")
+class VectorizedLookupTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            with PhoneLookupStore.open(Path(tmp)) as store:
+                store.bulk_put(
+                    [
+                        ("npanxx:415555:1", {"OCN": "1111", "LTYPE": "C"}),
+                        ("npanxx:415555:A", {"OCN": "2222", "LTYPE": "S"}),
+                        ("npanxx:212555:A", {"OCN": "1111", "LTYPE": "V"}),
+                        ("ocn:1111", {"CommonName": "Wireless Co"}),
+                        ("ocn:2222", {"CommonName": "Landline Co"}),
+                    ]
+                )
+                cls.index = MemoryIndex.build(store)
+
+    def test_matches_scalar_path_including_invalid_numbers(self) -> None:
+        from phone_lookup.vectorized import run_vectorized_lookup
+
+        expected = list(run_lookup(self.index, NUMBERS))
+
+        self.assertEqual(list(run_vectorized_lookup(self.index, NUMBERS, chunk_size=4)), expected)
+
+    def test_normalize_array_masks_invalid_lengths(self) -> None:
+        from phone_lookup.vectorized import normalize_array, prefix_keys
+
+        normalized, valid, scalar_rows = normalize_array(["(415) 555-1234", "15551234", "14155551234"])
+
+        self.assertEqual(normalized.tolist(), ["4155551234", "", "4155551234"])
+        self.assertEqual(valid.tolist(), [True, False, True])
+        self.assertEqual(scalar_rows, [])
+        self.assertEqual(prefix_keys(normalized, valid).tolist(), [4155551, 0, 4155551])
+
+    def test_empty_batch(self) -> None:
+        from phone_lookup.vectorized import vectorized_lookup
+
+        self.assertEqual(vectorized_lookup(self.index, []), [])
+
+
+if __name__ == "__main__":  # pragma: no cover - convenience
+    unittest.main()